@@ -0,0 +1,61 @@
+"""
+Tempo de cold start: do processo do servidor de produção criado até a primeira resposta 200.
+
+Cada rodada sobe `python -m social_network.server` com um worker, espera o `/health/ready` e encerra.
+Sai com código 1 quando a mediana passa de `--target-ms`, para poder rodar na CI. Por padrão usa o
+grafo em memória (mede importação + lifespan); com `--neo4j` usa o banco do .env e inclui a conexão
+e a checagem do marcador de schema.
+
+    python -m benchmarks.cold_start --runs 5 --target-ms 2500
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.server_modes import wait_ready
+
+
+async def cold_start(port: int, neo4j: bool, timeout: float) -> float:
+    env = {**os.environ, "PORT": str(port), "SERVER_HOST": "127.0.0.1", "SERVER_WORKERS": "1"}
+    if not neo4j:
+        env["GRAPH_BACKEND"] = "memory"
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "social_network.server"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_ready(f"http://127.0.0.1:{port}", timeout)
+        return time.perf_counter() - start
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+async def run(args) -> bool:
+    samples = [await cold_start(args.port, args.neo4j, args.timeout) * 1000 for _ in range(args.runs)]
+    median = statistics.median(samples)
+
+    print(f"cold start em {args.runs} rodadas: mediana {median:.0f} ms, mín {min(samples):.0f} ms, máx {max(samples):.0f} ms (alvo {args.target_ms:.0f} ms)")
+    return median <= args.target_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--target-ms", type=float, default=2500.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--neo4j", action="store_true", help="conecta no Neo4j do .env em vez do grafo em memória")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
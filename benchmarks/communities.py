@@ -0,0 +1,60 @@
+"""
+Comunidades dos follows num grafo sintético, sem banco: propagação completa e rodada incremental.
+
+Os usuários são sorteados em grupos e a maior parte dos follows fica dentro do grupo, então há
+comunidades a encontrar. A rodada incremental acrescenta `--changes` follows novos e recalcula só as
+vizinhanças afetadas.
+
+    python -m benchmarks.communities --users 1000000 --edges 10000000 --changes 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from social_network.graph.communities import count_distinct, detect
+from social_network.graph.csr import FollowGraph
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--edges", type=int, default=10_000_000)
+    parser.add_argument("--groups", type=int, default=1000)
+    parser.add_argument("--changes", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    group = rng.integers(0, args.groups, args.users)
+    members = np.argsort(group, kind="stable")
+    starts = np.searchsorted(group[members], np.arange(args.groups))
+    sizes = np.bincount(group, minlength=args.groups)
+    sources = rng.integers(0, args.users, args.edges)
+    # 90% dos follows para alguém do mesmo grupo
+    inside = members[starts[group[sources]] + (rng.random(args.edges) * sizes[group[sources]]).astype(np.int64)]
+    targets = np.where(rng.random(args.edges) < 0.9, inside, rng.integers(0, args.users, args.edges))
+    uids = [str(index) for index in range(args.users)]
+    graph = FollowGraph.from_edges(uids, sources, targets)
+
+    start = time.perf_counter()
+    full = detect(graph, None)
+    detected = time.perf_counter()
+    print(f"{graph.size} usuários, {graph.edges} follows distintos, {args.groups} grupos sorteados")
+    print(f"  completa     {detected - start:6.2f}s  {count_distinct(full.labels)} comunidades")
+
+    extra_sources = rng.integers(0, args.users, args.changes)
+    extra_targets = rng.integers(0, args.users, args.changes)
+    sources = np.repeat(np.arange(graph.size), graph.out_degree)
+    grown = FollowGraph.from_edges(uids, np.concatenate((sources, extra_sources)), np.concatenate((graph.targets, extra_targets)))
+
+    start = time.perf_counter()
+    incremental = detect(grown, (graph, full.labels))
+    detected = time.perf_counter()
+    mode = "incremental" if incremental.incremental else "completa (mudanças demais)"
+    print(f"  {mode} {detected - start:6.2f}s  {incremental.changed.sum()} usuários mudaram de comunidade")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Gerador de grafos sociais sintéticos.
+
+Tudo é derivado de hashes de (seed, tipo, índice), então os uids de usuários e posts podem ser
+recalculados a qualquer momento sem guardar o grafo: a memória fica constante de 10 mil a 10 milhões
+de usuários. Os graus de seguidores seguem uma lei de potência (poucos perfis concentram a maior
+parte dos seguidores), a quantidade de posts por usuário é assimétrica (Pareto) e os comentários
+formam threads profundas (cada resposta tende a responder a anterior).
+
+Os registros usam os mesmos campos da importação em massa (`python -m social_network.bulk import`).
+"""
+
+import hashlib
+import struct
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from uuid import UUID
+
+TOPICS = 1000
+
+
+@dataclass
+class GraphShape:
+    users: int = 10_000
+    mean_follows: float = 20.0
+    follow_alpha: float = 1.8
+    mean_posts: float = 5.0
+    post_alpha: float = 1.5
+    comment_ratio: float = 0.3
+    mean_comments: float = 6.0
+    thread_depth: float = 0.7
+    mean_reactions: float = 10.0
+    dislike_ratio: float = 0.1
+    max_degree: int = 5_000
+    seed: int = 42
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class SocialGraphGenerator:
+    def __init__(self, shape: GraphShape, password_hash: str = ""):
+        self.shape = shape
+        self.password_hash = password_hash
+        self.now = datetime(2024, 12, 1)
+
+    # Números determinísticos
+
+    def _digest(self, *key) -> bytes:
+        return hashlib.blake2b(repr((self.shape.seed, *key)).encode(), digest_size=16).digest()
+
+    def unit(self, *key) -> float:
+        """Número em [0, 1) derivado só da chave"""
+        return (struct.unpack("<Q", self._digest(*key)[:8])[0] >> 11) / float(1 << 53)
+
+    def pareto(self, mean: float, alpha: float, *key) -> int:
+        minimum = mean * (alpha - 1) / alpha
+        return min(self.shape.max_degree, int(minimum / (1.0 - self.unit(*key)) ** (1 / alpha)))
+
+    def popular_user(self, *key) -> int:
+        """Índice de usuário com P(i) proporcional a 1/(i+1): os primeiros índices são as celebridades"""
+        return min(self.shape.users - 1, int((self.shape.users + 1) ** self.unit(*key)) - 1)
+
+    # Identificadores
+
+    def user_uid(self, index: int) -> str:
+        return str(UUID(bytes=self._digest("user", index), version=4))
+
+    def username(self, index: int) -> str:
+        return f"user_{index}"
+
+    def post_count(self, index: int) -> int:
+        return max(1, self.pareto(self.shape.mean_posts, self.shape.post_alpha, "posts", index))
+
+    def post_uid(self, owner: int, number: int) -> str:
+        return str(UUID(bytes=self._digest("post", owner, number), version=4))
+
+    def comment_uid(self, post_uid: str, number: int) -> str:
+        return str(UUID(bytes=self._digest("comment", post_uid, number), version=4))
+
+    def topic(self, *key) -> str:
+        return f"topic{int(self.unit('topic', *key) * TOPICS)}"
+
+    def created_at(self, *key) -> datetime:
+        return self.now - timedelta(seconds=int(self.unit("created", *key) * 365 * 24 * 3600))
+
+    # Fluxos de registros
+
+    def users(self) -> Iterator[dict]:
+        for index in range(self.shape.users):
+            created_at = self.created_at("user", index)
+            yield {
+                "uid": self.user_uid(index),
+                "username": self.username(index),
+                "email": f"{self.username(index)}@example.com",
+                "full_name": f"User {index}",
+                "bio": "",
+                "avatar_link": "",
+                "password_hash": self.password_hash,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def follows(self) -> Iterator[dict]:
+        for index in range(self.shape.users):
+            degree = self.pareto(self.shape.mean_follows, self.shape.follow_alpha, "follows", index)
+            targets = set()
+            for attempt in range(degree * 2):
+                if len(targets) >= degree:
+                    break
+                target = self.popular_user("follow", index, attempt)
+                if target != index and target not in targets:
+                    targets.add(target)
+                    yield {"source_uid": self.user_uid(index), "target_uid": self.user_uid(target)}
+
+    def posts(self) -> Iterator[dict]:
+        """Posts e comentários; comentários têm `parent_uid` (relação LINKED_TO)"""
+        for owner in range(self.shape.users):
+            for number in range(self.post_count(owner)):
+                uid = self.post_uid(owner, number)
+                created_at = self.created_at("post", owner, number)
+                yield {
+                    "uid": uid,
+                    "content": f"#{self.topic(uid)} Post {number} de {self.username(owner)}",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "owner_uid": self.user_uid(owner),
+                    "parent_uid": None,
+                }
+
+                if self.unit("thread", uid) < self.shape.comment_ratio:
+                    yield from self.thread(uid, created_at)
+
+    def thread(self, root_uid: str, created_at: datetime) -> Iterator[dict]:
+        thread = [root_uid]
+        for number in range(self.pareto(self.shape.mean_comments, 1.5, "comments", root_uid)):
+            # Com probabilidade `thread_depth` responde o último comentário, aprofundando a thread
+            deeper = self.unit("depth", root_uid, number) < self.shape.thread_depth
+            parent_uid = thread[-1] if deeper else thread[int(self.unit("parent", root_uid, number) * len(thread))]
+
+            uid = self.comment_uid(root_uid, number)
+            commenter = int(self.unit("commenter", root_uid, number) * self.shape.users)
+            thread.append(uid)
+            yield {
+                "uid": uid,
+                "content": f"Comentário {number} de {self.username(commenter)}",
+                "created_at": created_at + timedelta(minutes=number + 1),
+                "updated_at": created_at + timedelta(minutes=number + 1),
+                "owner_uid": self.user_uid(commenter),
+                "parent_uid": parent_uid,
+            }
+
+    def random_post(self, *key) -> str:
+        owner = self.popular_user("post_owner", *key)
+        return self.post_uid(owner, int(self.unit("post_number", *key) * self.post_count(owner)))
+
+    def reactions(self) -> Iterator[dict]:
+        for index in range(self.shape.users):
+            seen = set()
+            for number in range(self.pareto(self.shape.mean_reactions, 1.5, "reactions", index)):
+                post_uid = self.random_post("reaction", index, number)
+                if post_uid in seen:
+                    continue
+                seen.add(post_uid)
+                kind = "DISLIKED" if self.unit("kind", index, number) < self.shape.dislike_ratio else "LIKED"
+                yield {"user_uid": self.user_uid(index), "post_uid": post_uid, "type": kind}
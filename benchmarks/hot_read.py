@@ -0,0 +1,80 @@
+"""
+Leituras simultâneas do mesmo post (post viral) com e sem single-flight.
+
+Monta no grafo em memória um post com `--comments` comentários, dispara `--concurrency` leituras de
+`details` ao mesmo tempo, cada uma de um usuário diferente, e conta as idas ao "banco" (com
+`--latency-ms` de latência simulada por consulta) e o tempo até a última resposta.
+
+    python -m benchmarks.hot_read --concurrency 500 --comments 50 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from social_network.core.memory import MemoryGraph
+from social_network.posts.repository import MemoryPostReadRepository
+
+
+def build_graph(args) -> tuple[MemoryGraph, str, list[str]]:
+    graph = MemoryGraph(latency=args.latency_ms / 1000)
+    now = datetime.now()
+    viewers = []
+    for index in range(args.concurrency):
+        uid = str(uuid4())
+        graph.add_node("User", {"uid": uid, "username": f"user_{index}", "full_name": f"User {index}", "bio": "", "avatar_link": ""})
+        viewers.append(uid)
+
+    owner = graph.find("User", {"uid": viewers[0]})[0]
+    post_uid = str(uuid4())
+    post = graph.add_node("Post", {"uid": post_uid, "content": "Viral", "created_at": now, "updated_at": now})
+    graph.connect(owner, "OWNS", post)
+    for index in range(args.comments):
+        comment = graph.add_node("Post", {"uid": str(uuid4()), "content": f"Comentário {index}", "created_at": now, "updated_at": now})
+        graph.connect(owner, "OWNS", comment)
+        graph.connect(comment, "LINKED_TO", post)
+    return graph, post_uid, viewers
+
+
+async def measure(reader: MemoryPostReadRepository, post_uid: str, viewers: list[str], coalesce: bool) -> tuple[int, float]:
+    graph = reader.graph
+    round_trips = 0
+    round_trip = graph.round_trip
+
+    async def counted(shape: str):
+        nonlocal round_trips
+        round_trips += 1
+        await round_trip(shape)
+
+    graph.round_trip = counted
+    start = time.perf_counter()
+    await asyncio.gather(*(reader.details(post_uid, viewer, coalesce=coalesce) for viewer in viewers))
+    elapsed = time.perf_counter() - start
+    graph.round_trip = round_trip
+    return round_trips, elapsed
+
+
+async def run(args):
+    graph, post_uid, viewers = build_graph(args)
+    reader = MemoryPostReadRepository(graph)
+
+    print(f"{args.concurrency} leituras simultâneas de um post com {args.comments} comentários ({args.latency_ms} ms por consulta)")
+    for label, coalesce in (("sem single-flight", False), ("com single-flight", True)):
+        round_trips, elapsed = await measure(reader, post_uid, viewers, coalesce)
+        print(f"  {label:<18} {round_trips:>6} consultas  {elapsed * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--comments", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
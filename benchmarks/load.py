@@ -0,0 +1,260 @@
+"""
+Carga de ponta a ponta contra a API.
+
+Gera um grafo sintético, carrega no backend e dispara requisições concorrentes com httpx, misturando
+feed, perfil, curtida, comentário e follow. Por endpoint são reportados p50/p95/p99, vazão e consultas
+por requisição (lidas do `Server-Timing` da QueryInstrumentationMiddleware). O resultado pode ser salvo
+como baseline JSON e comparado com uma execução anterior.
+
+Em processo, com o grafo em memória (nenhum serviço externo):
+
+    python -m benchmarks.load --users 10000 --duration 30 --output baseline.json
+
+Contra um servidor rodando, carregando antes o grafo no Neo4j do .env (o servidor precisa usar o
+mesmo JWT_SECRET, os tokens são assinados localmente):
+
+    python -m benchmarks.load --url http://localhost:8000 --seed --users 1000000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.generator import GraphShape, SocialGraphGenerator
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+DEFAULT_MIX = {"feed": 30, "profile": 30, "post": 15, "like": 10, "comment": 10, "follow": 5}
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    wire_bytes: list[int] = field(default_factory=list)
+    errors: int = 0
+
+    def record(self, latency: float, response: httpx.Response | None):
+        self.latencies.append(latency)
+        if response is None or response.status_code >= 500:
+            self.errors += 1
+            return
+
+        # Bytes como vieram na rede, antes da descompressão pelo httpx
+        self.wire_bytes.append(response.num_bytes_downloaded)
+
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries.append(int(match.group(1)))
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "queries_per_request": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+            "kb_per_request": round(sum(self.wire_bytes) / len(self.wire_bytes) / 1024, 2) if self.wire_bytes else None,
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Workload:
+    """Escolhe as operações e os alvos a partir do gerador, sem precisar consultar a API"""
+
+    def __init__(self, generator: SocialGraphGenerator, mix: dict[str, int], sessions: int, seed: int):
+        self.generator = generator
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.random = random.Random(seed)
+        self.users = [generator.popular_user("session", index) for index in range(sessions)]
+        self.tokens = {}
+
+    def headers(self, user: int) -> dict:
+        from social_network.auth.auth_handler import sign_jwt
+
+        if user not in self.tokens:
+            self.tokens[user] = sign_jwt(self.generator.username(user)).acess_token
+        return {"Authorization": f"Bearer {self.tokens[user]}"}
+
+    def next_request(self) -> tuple[str, int, str, str, dict]:
+        operation = self.random.choices(self.operations, self.weights)[0]
+        user = self.random.choice(self.users)
+        key = ("workload", self.random.random())
+        return (operation, user, *self.request(operation, key))
+
+    def request(self, operation: str, key: tuple) -> tuple[str, str, dict]:
+        if operation == "feed":
+            return "GET", "/posts/feed", {"params": {"content_i": f"#{self.generator.topic(*key)} "}}
+        if operation == "profile":
+            return "GET", f"/users/{self.generator.username(self.generator.popular_user(*key))}", {}
+        if operation == "post":
+            return "GET", f"/posts/{self.generator.random_post(*key)}", {}
+        if operation == "like":
+            return "POST", f"/posts/{self.generator.random_post(*key)}/toggle-like", {}
+        if operation == "comment":
+            return "POST", f"/posts/{self.generator.random_post(*key)}/comment", {"json": {"content": "Comentário do benchmark"}}
+        return "POST", f"/users/follow/{self.generator.user_uid(self.generator.popular_user(*key))}", {}
+
+
+async def worker(client: httpx.AsyncClient, workload: Workload, stats: dict[str, EndpointStats], deadline: float):
+    while time.perf_counter() < deadline:
+        operation, user, method, url, kwargs = workload.next_request()
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=workload.headers(user), **kwargs)
+        except httpx.HTTPError:
+            response = None
+        stats[operation].record(time.perf_counter() - start, response)
+
+
+async def run_load(client: httpx.AsyncClient, workload: Workload, concurrency: int, duration: float) -> dict:
+    stats = defaultdict(EndpointStats)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, workload, stats, start + duration) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    total = EndpointStats()
+    for endpoint in stats.values():
+        total.latencies += endpoint.latencies
+        total.queries += endpoint.queries
+        total.wire_bytes += endpoint.wire_bytes
+        total.errors += endpoint.errors
+
+    return {"elapsed": round(elapsed, 2), "total": total.summary(elapsed), "endpoints": {name: stats[name].summary(elapsed) for name in sorted(stats)}}
+
+
+async def seed_neo4j(generator: SocialGraphGenerator, batch_size: int, workers: int) -> dict:
+    from pyneo4j_ogm import Pyneo4jClient
+
+    from benchmarks.loader import Neo4jLoader
+    from social_network.dependencies import try_to_connect_neo4j
+
+    client = Pyneo4jClient()
+    await try_to_connect_neo4j(client)
+    try:
+        return await Neo4jLoader(client, batch_size, workers).load(generator)
+    finally:
+        await client.close()
+
+
+async def run_in_process(args, generator: SocialGraphGenerator, workload: Workload) -> tuple[dict, dict]:
+    os.environ["GRAPH_BACKEND"] = "memory"
+    os.environ["MEMORY_QUERY_LATENCY_MS"] = str(args.latency_ms)
+
+    from benchmarks.loader import MemoryLoader
+    from social_network.main import app
+
+    async with app.router.lifespan_context(app):
+        counts = await MemoryLoader(app.state.memory_graph).load(generator)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return counts, await run_load(client, workload, args.concurrency, args.duration)
+
+
+async def run_remote(args, generator: SocialGraphGenerator, workload: Workload) -> tuple[dict, dict]:
+    counts = await seed_neo4j(generator, args.batch_size, args.workers) if args.seed else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        return counts, await run_load(client, workload, args.concurrency, args.duration)
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    print(f"{'endpoint':<10}{'reqs':>8}{'erros':>7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'KB':>9}")
+    rows = {**report["endpoints"], "total": report["total"]}
+    for name, row in rows.items():
+        queries = row["queries_per_request"] if row["queries_per_request"] is not None else "-"
+        kilobytes = row.get("kb_per_request") if row.get("kb_per_request") is not None else "-"
+        print(f"{name:<10}{row['requests']:>8}{row['errors']:>7}{row['throughput']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{queries:>9}{kilobytes:>9}")
+
+    if not baseline:
+        return
+
+    print(f"\nComparado com {baseline.get('commit') or 'baseline'}:")
+    previous_rows = {**baseline.get("endpoints", {}), "total": baseline.get("total", {})}
+    for name, row in rows.items():
+        previous = previous_rows.get(name)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        p95 = (row["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        throughput = (row["throughput"] - previous["throughput"]) / previous["throughput"] * 100 if previous["throughput"] else 0.0
+        queries = f"queries {previous['queries_per_request']} -> {row['queries_per_request']}"
+        print(f"  {name:<10} p95 {p95:+6.1f}%  req/s {throughput:+6.1f}%  {queries}  KB {previous.get('kb_per_request')} -> {row.get('kb_per_request')}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--graph-seed", type=int, default=42)
+    parser.add_argument("--url", help="servidor alvo; sem ele a API roda em processo com o grafo em memória")
+    parser.add_argument("--seed", action="store_true", help="carrega o grafo no Neo4j antes da carga (com --url)")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=4, help="tarefas de escrita em paralelo na carga do Neo4j")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latência simulada por consulta no grafo em memória")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--sessions", type=int, default=200, help="quantidade de usuários logados distintos")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='pesos das operações em JSON, ex.: \'{"feed": 50, "like": 50}\'')
+    parser.add_argument("--output", help="salva o resultado como baseline JSON")
+    parser.add_argument("--compare", help="baseline JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    shape = GraphShape(users=args.users, seed=args.graph_seed)
+    generator = SocialGraphGenerator(shape)
+    if args.url is None or args.seed:
+        from social_network.security import get_password_hash
+
+        generator.password_hash = get_password_hash("benchmark")
+
+    workload = Workload(generator, args.mix, args.sessions, args.graph_seed)
+    runner = run_remote if args.url else run_in_process
+    counts, result = asyncio.run(runner(args, generator, workload))
+
+    report = {
+        "commit": current_commit(),
+        "target": args.url or "in-process",
+        "shape": shape.as_dict(),
+        "graph": counts,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        **result,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
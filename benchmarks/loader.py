@@ -0,0 +1,72 @@
+"""
+Carga do grafo gerado.
+
+No Neo4j os registros passam pelo BulkImporter (`python -m social_network.bulk`): lotes `UNWIND`
+gravados em paralelo. Os posts são percorridos duas vezes, na segunda para as relações LINKED_TO
+dos comentários, assim o pai sempre existe quando a relação é criada e nada precisa ficar em memória.
+"""
+
+from uuid import UUID
+
+from pyneo4j_ogm import Pyneo4jClient
+
+from benchmarks.generator import SocialGraphGenerator
+from social_network.bulk.importer import BulkImporter
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository
+
+
+class Neo4jLoader:
+    def __init__(self, client: Pyneo4jClient, batch_size: int = 5_000, workers: int = 4):
+        self.importer = BulkImporter(GraphRepository(client._driver), batch_size, workers)
+
+    async def load(self, generator: SocialGraphGenerator) -> dict[str, int]:
+        steps = [
+            ("users", generator.users()),
+            ("posts", generator.posts()),
+            ("links", generator.posts()),
+            ("follows", generator.follows()),
+            ("reactions", generator.reactions()),
+        ]
+        return {kind: (await self.importer.run(kind, records)).written for kind, records in steps}
+
+
+class MemoryLoader:
+    """Carrega o mesmo grafo no MemoryGraph, para rodar a carga sem Neo4j (até algumas centenas de milhares de nós)"""
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+        self.node_ids: dict[str, int] = {}
+
+    def add(self, label: str, props: dict) -> int:
+        node_id = self.graph.add_node(label, {**props, "uid": UUID(props["uid"])})
+        self.node_ids[props["uid"]] = node_id
+        return node_id
+
+    async def load(self, generator: SocialGraphGenerator) -> dict[str, int]:
+        counts = dict.fromkeys(("users", "posts", "links", "follows", "reactions"), 0)
+
+        for user in generator.users():
+            user["password"] = user.pop("password_hash")
+            self.add("User", user)
+            counts["users"] += 1
+
+        for post in generator.posts():
+            parent_uid = post.pop("parent_uid")
+            owner_uid = post.pop("owner_uid")
+            node_id = self.add("Post", post)
+            self.graph.connect(self.node_ids[owner_uid], "OWNS", node_id)
+            if parent_uid:
+                self.graph.connect(node_id, "LINKED_TO", self.node_ids[parent_uid])
+                counts["links"] += 1
+            counts["posts"] += 1
+
+        for follow in generator.follows():
+            self.graph.connect(self.node_ids[follow["source_uid"]], "FOLLOWING", self.node_ids[follow["target_uid"]])
+            counts["follows"] += 1
+
+        for reaction in generator.reactions():
+            self.graph.connect(self.node_ids[reaction["user_uid"]], reaction["type"], self.node_ids[reaction["post_uid"]])
+            counts["reactions"] += 1
+
+        return counts
@@ -0,0 +1,91 @@
+"""
+Custo de CPU por registro para montar uma página do feed.
+
+Compara o caminho do OGM (NodeModel -> model_dump -> schema de resposta) com os mapas projetados
+retornados pelo PostReadRepository, validados direto no schema. Não precisa de banco: os registros
+são sintéticos, só a construção dos objetos é medida.
+
+    python -m benchmarks.read_path --posts 1000
+"""
+
+import argparse
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from social_network.posts.models import Post
+from social_network.posts.schemas import PostDetails, PostList, UserMinimal
+from social_network.users.models import User
+
+
+def make_records(count: int):
+    now = datetime.now()
+    owner = {
+        "uid": str(uuid4()),
+        "avatar_link": "https://example.com/avatar.png",
+        "bio": "Bio",
+        "username": "roberto_carlos",
+        "full_name": "Roberto Carlos",
+        "email": "roberto@carlos.com",
+    }
+    posts = [
+        {
+            "uid": str(uuid4()),
+            "content": f"Post {index} " * 10,
+            "created_at": now,
+            "updated_at": now,
+            "likes": index % 17,
+            "dislikes": index % 5,
+        }
+        for index in range(count)
+    ]
+    return owner, posts
+
+
+def ogm_path(owner: dict, posts: list[dict]):
+    results = []
+    for props in posts:
+        post = Post(**{key: props[key] for key in ("uid", "content", "created_at", "updated_at")})
+        user = User(**owner)
+        results.append(
+            PostDetails(
+                **post.model_dump(exclude=["comments", "owner"]),
+                owner=UserMinimal(**user.model_dump()),
+                likes=props["likes"],
+                dislikes=props["dislikes"],
+                comments=[],
+            )
+        )
+    return PostList.model_validate({"posts": results})
+
+
+def projected_path(owner: dict, posts: list[dict]):
+    return PostList.model_validate({"posts": [{**props, "owner": owner, "comments": []} for props in posts]})
+
+
+def measure(function, owner, posts, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        function(owner, posts)
+        best = min(best, time.process_time() - start)
+    return best / len(posts) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    owner, posts = make_records(args.posts)
+    ogm = measure(ogm_path, owner, posts, args.rounds)
+    projected = measure(projected_path, owner, posts, args.rounds)
+
+    print(f"{args.posts} posts por página, melhor de {args.rounds} rodadas")
+    print(f"  OGM + model_dump + schema: {ogm:8.2f} µs/registro")
+    print(f"  mapas projetados:          {projected:8.2f} µs/registro ({ogm / projected:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
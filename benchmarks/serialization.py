@@ -0,0 +1,92 @@
+"""
+Custo de CPU por KB para serializar uma página do feed.
+
+Compara o caminho padrão do FastAPI (validação contra o response_model, `dump_python(mode="json")` e
+`json.dumps` no JSONResponse) com o PydanticJSONResponse usado quando `FAST_JSON_RESPONSES` está
+ligado. Não precisa de banco: a página é montada com registros sintéticos, só a serialização é medida.
+
+    python -m benchmarks.serialization --posts 200 --comments 5
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from social_network.core.responses import PydanticJSONResponse
+from social_network.posts.schemas import PostList
+
+
+def make_feed(count: int, comments: int) -> PostList:
+    now = datetime.now()
+    owner = {
+        "uid": uuid4(),
+        "avatar_link": "https://example.com/avatar.png",
+        "bio": "Bio",
+        "username": "roberto_carlos",
+        "full_name": "Roberto Carlos",
+    }
+
+    def post(index: int, children: list[dict]) -> dict:
+        return {
+            "uid": uuid4(),
+            "content": f"Post {index} " * 10,
+            "owner": owner,
+            "created_at": now,
+            "updated_at": now,
+            "likes": index % 17,
+            "dislikes": index % 5,
+            "liked_by_me": index % 2 == 0,
+            "comments": children,
+        }
+
+    return PostList.model_validate({"posts": [post(index, [post(index, []) for _ in range(comments)]) for index in range(count)]})
+
+
+async def default_path(feed: PostList) -> bytes:
+    field = create_model_field(name="Response_feed", type_=PostList, mode="serialization")
+    content = await serialize_response(field=field, response_content=feed)
+    return JSONResponse(content).body
+
+
+async def fast_path(feed: PostList) -> bytes:
+    return PydanticJSONResponse(feed, PostList).body
+
+
+async def measure(function, feed: PostList, rounds: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        body = await function(feed)
+        best = min(best, time.process_time() - start)
+    return best, len(body)
+
+
+async def run(args):
+    feed = make_feed(args.posts, args.comments)
+    default, size = await measure(default_path, feed, args.rounds)
+    fast, fast_size = await measure(fast_path, feed, args.rounds)
+    kilobytes = size / 1024
+
+    print(f"{args.posts} posts com {args.comments} comentários ({kilobytes:.0f} KB), melhor de {args.rounds} rodadas")
+    print(f"  FastAPI padrão:       {default / kilobytes * 1_000_000:8.2f} µs/KB")
+    print(f"  PydanticJSONResponse: {fast / (fast_size / 1024) * 1_000_000:8.2f} µs/KB ({default / fast:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
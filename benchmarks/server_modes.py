@@ -0,0 +1,126 @@
+"""
+Compara o `fastapi dev` (reload, um worker, asyncio + h11) com o servidor de produção
+(`python -m social_network.server`: uvloop, httptools, um worker por CPU).
+
+Cada modo sobe num subprocesso com o grafo em memória, recebe carga concorrente nas rotas escolhidas
+e é encerrado com SIGTERM; são reportados tempo de subida, req/s, latências e tempo de shutdown.
+
+    python -m benchmarks.server_modes --duration 15 --concurrency 64 --path /health/ready --path /openapi.json
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load import percentile
+
+MODES = {
+    "dev": lambda port: [sys.executable, "-m", "fastapi", "dev", "social_network/main.py", "--port", str(port)],
+    "production": lambda port: [sys.executable, "-m", "social_network.server"],
+}
+
+
+async def wait_ready(url: str, timeout: float) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.perf_counter() - start < timeout:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.02)
+    raise TimeoutError(f"{url} did not become ready in {timeout}s")
+
+
+async def hammer(url: str, paths: list[str], concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[index % len(paths)])
+                    errors += response.status_code >= 500
+                except httpx.TransportError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                index += 1
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_mode(mode: str, args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "GRAPH_BACKEND": "memory", "PORT": str(args.port), "SERVER_HOST": "127.0.0.1", "SERVER_WORKERS": str(args.workers)}
+    process = subprocess.Popen(MODES[mode](args.port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+    try:
+        startup = await wait_ready(url, args.startup_timeout)
+        result = await hammer(url, args.path, args.concurrency, args.duration)
+    finally:
+        start = time.perf_counter()
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        shutdown = time.perf_counter() - start
+
+    return {**result, "startup_s": round(startup, 2), "shutdown_s": round(shutdown, 2)}
+
+
+async def run(args):
+    results = {}
+    for mode in MODES:
+        results[mode] = await run_mode(mode, args)
+
+    print(f"{'modo':<12}{'reqs':>8}{'erros':>7}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'subida':>9}{'shutdown':>10}")
+    for mode, row in results.items():
+        print(f"{mode:<12}{row['requests']:>8}{row['errors']:>7}{row['throughput']:>10}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['startup_s']:>9}{row['shutdown_s']:>10}")
+
+    dev, production = results["dev"], results["production"]
+    if dev["throughput"]:
+        print(f"\nprodução: {production['throughput'] / dev['throughput']:.2f}x req/s, p95 {dev['p95_ms']} -> {production['p95_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=0, help="workers do modo produção (0 = um por CPU)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--path", action="append", help="rotas GET usadas na carga (repetível)")
+    args = parser.parse_args()
+    args.path = args.path or ["/health/ready", "/openapi.json"]
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
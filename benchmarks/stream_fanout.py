@@ -0,0 +1,70 @@
+"""
+Custo das conexões ociosas do /stream e do fan-out do broker, sem rede.
+
+Abre `--connections` consumidores do gerador SSE (o mesmo que cada requisição do /stream roda), metade
+seguindo o mesmo autor, e mede a memória residente por conexão e o tempo até uma publicação
+chegar a todas as filas. Sockets e buffers do kernel ficam de fora: é o custo do processo Python.
+
+    python -m benchmarks.stream_fanout --connections 20000
+"""
+
+import argparse
+import asyncio
+import gc
+import resource
+import time
+
+from social_network.core.broker import Broker
+from social_network.stream.router import events
+
+
+async def consume(stream, received: asyncio.Queue):
+    async for frame in stream:
+        if frame.startswith(b"event: post"):
+            received.put_nowait(time.perf_counter())
+
+
+async def run(args):
+    broker = Broker(queue_size=args.queue_size)
+    received: asyncio.Queue[float] = asyncio.Queue()
+
+    gc.collect()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tasks = []
+    for index in range(args.connections):
+        topics = {"user:popular:posts"} if index % 2 == 0 else {f"user:{index}:posts", f"post:{index}"}
+        tasks.append(asyncio.create_task(consume(events(broker.subscribe(topics)), received)))
+    await asyncio.sleep(0.5)
+    # ru_maxrss vem em KB no Linux
+    per_connection = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024 / args.connections
+
+    followers = (args.connections + 1) // 2
+    # Uma coleta completa agora em vez de no meio da medição
+    gc.collect()
+    start = time.perf_counter()
+    broker.publish("user:popular:posts", "post", {"uid": "popular", "content": "x" * 200})
+    publish = time.perf_counter() - start
+    last = start
+    for _ in range(followers):
+        last = max(last, await received.get())
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{args.connections} conexões ociosas: {per_connection / 1024:.2f} KB por conexão (sem socket)")
+    print(f"publish para {followers} assinantes: {publish * 1000:.1f} ms no publicador, {(last - start) * 1000:.1f} ms até o último consumidor")
+    print(f"após o cancelamento: {broker.subscribers} assinantes, {len(broker.topics)} tópicos")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=20000)
+    parser.add_argument("--queue-size", type=int, default=256)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ set -e
 # echo "Rodando migrações..."
 # alembic upgrade head
 
-# Iniciar o servidor FastAPI
+# Iniciar o servidor FastAPI (SERVER_MODE=production usa o servidor com vários workers)
+if [ "$SERVER_MODE" = "production" ]; then
+  echo "Iniciando o servidor FastAPI em modo de produção..."
+  exec python -m social_network.server
+fi
+
 echo "Iniciando o servidor FastAPI..."
 exec fastapi dev social_network/main.py --port 8000 --host 0.0.0.0
@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from social_network.admin.schemas import ExportJob, ExportOptions, ProfileSummary
+from social_network.bulk.exporter import GraphExporter, MemoryGraphExporter
+from social_network.core.profiler import profiler
+from social_network.dependencies import get_admin_user, get_repository
+from social_network.settings import settings
+
+logger = logging.getLogger(__name__)
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+# O estado de cada exportação fica em EXPORT_DIR/<id>/status.json, legível por qualquer worker e depois de um
+# restart; aqui só as tarefas deste processo, referenciadas até terminar para não serem coletadas
+EXPORT_STATUS_FILE = "status.json"
+export_tasks: set[asyncio.Task] = set()
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # PermissionError também significa que o processo existe
+    except PermissionError:
+        pass
+    return True
+
+
+def save_job(job: ExportJob):
+    path = os.path.join(job.directory, EXPORT_STATUS_FILE)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        file.write(job.model_dump_json(indent=2))
+    os.replace(temporary, path)
+
+
+def load_job(job_id: str) -> ExportJob | None:
+    if job_id in ("", ".", "..") or os.path.basename(job_id) != job_id:
+        return None
+    try:
+        with open(os.path.join(settings.EXPORT_DIR, job_id, EXPORT_STATUS_FILE)) as file:
+            job = ExportJob.model_validate_json(file.read())
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+
+    # Processo desta máquina que não existe mais: a exportação foi interrompida (deploy, restart, OOM)
+    host, _, pid = job.worker.rpartition(":")
+    if job.status == "running" and host == socket.gethostname() and not process_alive(int(pid)):
+        job.status, job.error = "failed", "Export interrupted before finishing"
+    return job
+
+
+def get_exporter(request: Request, directory: str, options: ExportOptions) -> GraphExporter:
+    arguments = {"page_size": settings.EXPORT_PAGE_SIZE, "include_passwords": options.include_passwords, "parquet": options.parquet}
+    if settings.GRAPH_BACKEND == "memory":
+        return MemoryGraphExporter(request.app.state.memory_graph, directory, **arguments)
+    return GraphExporter(get_repository(request), directory, **arguments)
+
+
+async def run_export(job: ExportJob, exporter: GraphExporter):
+    try:
+        job.manifest = await exporter.export()
+        job.status = "done"
+    except Exception as error:
+        logger.exception("Exportação %s falhou", job.id)
+        job.status = "failed"
+        job.error = str(error)
+    finally:
+        job.finished_at = datetime.now()
+        with contextlib.suppress(OSError):
+            await asyncio.to_thread(save_job, job)
+
+
+@admin_router.post(
+    "/exports",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=ExportJob,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Parquet export is not available."},
+        status.HTTP_403_FORBIDDEN: {"description": "Admin access required."},
+    },
+)
+async def start_export(request: Request, options: ExportOptions):
+    started_at = datetime.now()
+    job_id = started_at.strftime("%Y%m%dT%H%M%S%f")
+    directory = os.path.join(settings.EXPORT_DIR, job_id)
+
+    try:
+        exporter = get_exporter(request, directory, options)
+    except RuntimeError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    job = ExportJob(id=job_id, status="running", directory=directory, started_at=started_at, worker=worker_id())
+    os.makedirs(directory, exist_ok=True)
+    save_job(job)
+    task = asyncio.create_task(run_export(job, exporter))
+    export_tasks.add(task)
+    task.add_done_callback(export_tasks.discard)
+    return job
+
+
+@admin_router.get("/exports", response_model=list[ExportJob])
+async def list_exports():
+    try:
+        job_ids = sorted(os.listdir(settings.EXPORT_DIR))
+    except FileNotFoundError:
+        return []
+    return [job for job in map(load_job, job_ids) if job is not None]
+
+
+@admin_router.get(
+    "/exports/{job_id}",
+    response_model=ExportJob,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Export not found."},
+    },
+)
+async def get_export(job_id: str):
+    job = load_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return job
+
+
+# Os perfis ficam na memória de cada worker: com vários workers, cada chamada vê só os do worker que a
+# atendeu (o `pid` da resposta), e um id listado por um worker dá 404 nos outros
+@admin_router.get("/profiles", response_model=list[ProfileSummary])
+async def list_profiles():
+    return [
+        ProfileSummary(
+            id=profile.id,
+            pid=os.getpid(),
+            method=profile.method,
+            path=profile.path,
+            status_code=profile.status_code,
+            started_at=profile.started_at,
+            duration_ms=round(profile.duration * 1000, 1),
+            samples=profile.samples.total(),
+            sampled=profile.sampled,
+        )
+        for profile in reversed(profiler.profiles)
+    ]
+
+
+@admin_router.get(
+    "/profiles/{profile_id}",
+    responses={
+        status.HTTP_200_OK: {"description": "Collapsed stacks (text) or a speedscope profile (JSON).", "content": {"text/plain": {}}},
+        status.HTTP_404_NOT_FOUND: {"description": "Profile not found in the worker that served the request."},
+    },
+)
+async def get_profile(profile_id: int, format: Literal["collapsed", "speedscope"] = "collapsed"):
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "speedscope":
+        return profile.speedscope(profiler.interval)
+    return PlainTextResponse(profile.collapsed())
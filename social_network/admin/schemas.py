@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ExportOptions(BaseModel):
+    """Modelo usado para iniciar uma exportação do grafo"""
+
+    parquet: bool = False
+    include_passwords: bool = False
+
+
+class ExportJob(BaseModel):
+    """Modelo usado para acompanhar uma exportação em andamento"""
+
+    id: str
+    status: Literal["running", "done", "failed"]
+    directory: str
+    # host:pid do worker que roda a exportação
+    worker: str
+    started_at: datetime
+    finished_at: datetime | None = None
+    manifest: dict | None = None
+    error: str | None = None
+
+
+class ProfileSummary(BaseModel):
+    """Modelo usado para listar os perfis de requisições lentas guardados no worker que atendeu"""
+
+    id: int
+    pid: int
+    method: str
+    path: str
+    status_code: int | None
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    sampled: bool
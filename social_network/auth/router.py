@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import Depends, HTTPException, status
 from fastapi.routing import APIRouter
 from jwt import InvalidTokenError
@@ -12,6 +14,7 @@ from social_network.security import get_password_hash
 # from social_network.database import get_session
 # from social_network.dependencies import get_user_repository
 from social_network.users.models import User
+from social_network.users.repository import UserReadRepository, get_user_reader
 from social_network.users.schemas import UserCreate, UserPublic
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
@@ -22,10 +25,10 @@ auth_router = APIRouter(prefix="/auth", tags=["auth"])
     status_code=status.HTTP_200_OK,
     response_model=UserPublic,
 )
-async def register(user: UserCreate):
+async def register(user: UserCreate, user_reader: UserReadRepository = Depends(get_user_reader)):
     db_user: User = User(**user.model_dump(exclude="password"))
 
-    existent_user = await User.find_one({"username": user.username, "email": user.email})
+    existent_user = await User.find_one({"username": user.username})
     if not existent_user:
         existent_user = await User.find_one({"email": user.email})
 
@@ -41,10 +44,11 @@ async def register(user: UserCreate):
                 detail="User with the same email exists",
             )
 
-    db_user.password = get_password_hash(user.password)
+    # argon2 numa thread: o hash leva dezenas de ms e travaria o event loop
+    db_user.password = await asyncio.to_thread(get_password_hash, user.password)
     await db_user.create()
     await db_user.refresh()
-    return await UserPublic.from_user(db_user, db_user)
+    return await UserPublic.from_user(db_user, db_user, user_reader)
 
 
 @auth_router.post(
@@ -57,7 +61,7 @@ async def login(user: UserAuthSchema):
     if not existent_user:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User credentials not valid 👎")
 
-    if existent_user.verify_password(user.password):
+    if await asyncio.to_thread(existent_user.verify_password, user.password):
         return sign_jwt(user.username)
     else:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User credentials not valid 👎")
@@ -0,0 +1,99 @@
+"""
+Importação e exportação em massa de usuários, posts, follows e reações.
+
+A importação lê arquivos JSONL ou CSV (.gz opcional):
+
+    python -m social_network.bulk import --users users.jsonl --posts posts.csv --follows follows.jsonl \\
+        --reactions reactions.jsonl --batch-size 5000 --workers 4 --checkpoint import.checkpoint.json
+
+Campos de cada arquivo:
+    users:     username, email, full_name, password_hash (ou password em texto), uid, bio, avatar_link, created_at
+    posts:     uid, owner_uid, content, parent_uid (comentários), created_at
+    follows:   source_uid, target_uid
+    reactions: user_uid, post_uid, type (LIKED ou DISLIKED)
+
+Os arquivos são importados nessa ordem; as relações LINKED_TO dos comentários são gravadas numa segunda
+passada sobre o arquivo de posts, depois de todos os posts existirem.
+
+A exportação grava os mesmos arquivos em JSONL comprimido (e Parquet com `--parquet`), mais um manifest.json:
+
+    python -m social_network.bulk export --output exports/hoje --page-size 10000 --parquet
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from pyneo4j_ogm import Pyneo4jClient
+
+from social_network.bulk.exporter import GraphExporter
+from social_network.bulk.importer import BulkImporter, Checkpoint, ImportResult
+from social_network.bulk.records import read_records
+from social_network.core.repository import GraphRepository
+from social_network.dependencies import try_to_connect_neo4j
+from social_network.settings import settings
+
+
+async def import_files(importer: BulkImporter, users: str | None, posts: str | None, follows: str | None, reactions: str | None) -> list[ImportResult]:
+    steps = [("users", users), ("posts", posts), ("links", posts), ("follows", follows), ("reactions", reactions)]
+    results = []
+    for kind, path in steps:
+        if path:
+            results.append(await importer.run(kind, read_records(path), key=f"{kind}:{path}"))
+    return results
+
+
+async def run_import(args) -> list[ImportResult]:
+    client = Pyneo4jClient()
+    await try_to_connect_neo4j(client)
+    try:
+        repository = GraphRepository(client._driver)
+        importer = BulkImporter(repository, args.batch_size, args.workers, Checkpoint(args.checkpoint))
+        return await import_files(importer, args.users, args.posts, args.follows, args.reactions)
+    finally:
+        await client.close()
+
+
+async def run_export(args) -> dict:
+    client = Pyneo4jClient()
+    await try_to_connect_neo4j(client)
+    try:
+        repository = GraphRepository(client._driver)
+        exporter = GraphExporter(repository, args.output, args.page_size, args.include_passwords, args.parquet)
+        return await exporter.export()
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m social_network.bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="importa arquivos JSONL/CSV direto no Neo4j")
+    importer.add_argument("--users")
+    importer.add_argument("--posts")
+    importer.add_argument("--follows")
+    importer.add_argument("--reactions")
+    importer.add_argument("--batch-size", type=int, default=settings.BULK_BATCH_SIZE)
+    importer.add_argument("--workers", type=int, default=settings.BULK_WORKERS)
+    importer.add_argument("--checkpoint", help="arquivo de checkpoint para retomar uma importação interrompida")
+
+    exporter = commands.add_parser("export", help="exporta o grafo do Neo4j para JSONL comprimido/Parquet")
+    exporter.add_argument("--output", default=settings.EXPORT_DIR)
+    exporter.add_argument("--page-size", type=int, default=settings.EXPORT_PAGE_SIZE)
+    exporter.add_argument("--parquet", action="store_true", help="grava também arquivos Parquet (requer pyarrow)")
+    exporter.add_argument("--include-passwords", action="store_true", help="inclui os hashes de senha, necessários para reimportar os usuários")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.command == "import":
+        for result in asyncio.run(run_import(args)):
+            print(f"{result.kind:<10} {result.written:>10} gravados {result.rejected:>8} rejeitados {result.per_minute:>12.0f}/min")
+    elif args.command == "export":
+        print(json.dumps(asyncio.run(run_export(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
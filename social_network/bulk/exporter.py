@@ -0,0 +1,251 @@
+"""
+Exportação do grafo em arquivos JSONL comprimidos (e Parquet quando o pyarrow está instalado).
+
+Cada label e cada tipo de relação é percorrido por faixas de id interno: `UNWIND range($start, $end - 1)`
+seguido de `WHERE id(n) = item_id` vira um NodeByIdSeek (ou DirectedRelationshipByIdSeek), então cada
+página custa só as linhas dela, independente do tamanho do grafo. Cada página é uma transação de leitura
+curta, o que não trava as escritas da API, mas também não forma um snapshot consistente: o que for
+gravado durante a exportação pode ou não aparecer.
+
+Os arquivos usam os mesmos campos da importação em massa (`users`, `posts` com `owner_uid` e
+`parent_uid`, `follows` e `reactions`), então uma exportação pode ser importada de volta. O manifest
+registra, para cada arquivo, a quantidade de linhas, o tamanho e o sha256.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = {
+    "uid": "string",
+    "username": "string",
+    "email": "string",
+    "full_name": "string",
+    "bio": "string",
+    "avatar_link": "string",
+    "created_at": "timestamp",
+    "updated_at": "timestamp",
+    "password_hash": "string",
+}
+POST_COLUMNS = {"uid": "string", "owner_uid": "string", "parent_uid": "string", "content": "string", "created_at": "timestamp", "updated_at": "timestamp"}
+FOLLOW_COLUMNS = {"source_uid": "string", "target_uid": "string"}
+REACTION_COLUMNS = {"user_uid": "string", "post_uid": "string", "type": "string"}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    file: str
+    match: str
+    variable: str
+    projection: str
+    rel_type: str | None = None
+
+    def max_id_query(self) -> str:
+        return f"MATCH {self.match} RETURN max(id({self.variable})) AS max_id"
+
+    def page_query(self) -> str:
+        return f"UNWIND range($start, $end - 1) AS item_id MATCH {self.match} WHERE id({self.variable}) = item_id RETURN {self.projection} AS row"
+
+
+EXPORTS = (
+    ExportSpec(
+        "users",
+        "(u:User)",
+        "u",
+        "u {.uid, .username, .email, .full_name, .bio, .avatar_link, .created_at, .updated_at, password_hash: CASE WHEN $include_passwords THEN u.password END}",
+    ),
+    ExportSpec(
+        "posts",
+        "(p:Post)",
+        "p",
+        "p {.uid, .content, .created_at, .updated_at, owner_uid: [(owner:User)-[:OWNS]->(p) | owner.uid][0], parent_uid: [(p)-[:LINKED_TO]->(parent:Post) | parent.uid][0]}",
+    ),
+    ExportSpec("follows", "(source:User)-[r:FOLLOWING]->(target:User)", "r", "{source_uid: source.uid, target_uid: target.uid}", "FOLLOWING"),
+    ExportSpec("reactions", "(u:User)-[r:LIKED]->(p:Post)", "r", "{user_uid: u.uid, post_uid: p.uid, type: 'LIKED'}", "LIKED"),
+    ExportSpec("reactions", "(u:User)-[r:DISLIKED]->(p:Post)", "r", "{user_uid: u.uid, post_uid: p.uid, type: 'DISLIKED'}", "DISLIKED"),
+)
+
+COLUMNS = {"users": USER_COLUMNS, "posts": POST_COLUMNS, "follows": FOLLOW_COLUMNS, "reactions": REACTION_COLUMNS}
+
+
+def to_json(value):
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_parquet_value(value, kind: str):
+    if value is None:
+        return None
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if kind == "timestamp":
+        return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return str(value)
+
+
+def file_sha256(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+class ExportWriter:
+    """Escreve as páginas de um arquivo à medida que chegam; só uma página fica em memória"""
+
+    def __init__(self, directory: str, name: str, columns: dict[str, str], parquet: bool):
+        self.name = name
+        self.columns = columns
+        self.rows = 0
+        self.paths = [os.path.join(directory, f"{name}.jsonl.gz")]
+        self.jsonl = gzip.open(self.paths[0], "wt", encoding="utf-8")
+        self.parquet = None
+
+        if parquet:
+            # Importado só quando pedido: o pyarrow sozinho custa centenas de ms no boot da API
+            import pyarrow
+            import pyarrow.parquet
+
+            types = {"string": pyarrow.string(), "timestamp": pyarrow.timestamp("us")}
+            self.schema = pyarrow.schema([(column, types[kind]) for column, kind in columns.items()])
+            self.paths.append(os.path.join(directory, f"{name}.parquet"))
+            self.parquet = pyarrow.parquet.ParquetWriter(self.paths[1], self.schema, compression="zstd")
+
+    def write(self, rows: list[dict]):
+        for row in rows:
+            row = {key: value for key, value in row.items() if value is not None}
+            self.jsonl.write(json.dumps(row, default=to_json, ensure_ascii=False))
+            self.jsonl.write("\n")
+
+        if self.parquet and rows:
+            import pyarrow
+
+            columns = {column: [to_parquet_value(row.get(column), kind) for row in rows] for column, kind in self.columns.items()}
+            self.parquet.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+
+        self.rows += len(rows)
+
+    def close(self) -> dict[str, dict]:
+        self.jsonl.close()
+        if self.parquet:
+            self.parquet.close()
+        return {os.path.basename(path): {"rows": self.rows, "bytes": os.path.getsize(path), "sha256": file_sha256(path)} for path in self.paths}
+
+
+class GraphExporter:
+    def __init__(self, repository: GraphRepository, directory: str, page_size: int = 10_000, include_passwords: bool = False, parquet: bool = False):
+        if parquet and importlib.util.find_spec("pyarrow") is None:
+            raise RuntimeError("Parquet export requires pyarrow")
+
+        self.repository = repository
+        self.directory = directory
+        self.page_size = page_size
+        self.include_passwords = include_passwords
+        self.parquet = parquet
+
+    async def export(self) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        started_at = datetime.now()
+        files = {}
+
+        for name in dict.fromkeys(spec.file for spec in EXPORTS):
+            writer = ExportWriter(self.directory, name, COLUMNS[name], self.parquet)
+            for spec in EXPORTS:
+                if spec.file != name:
+                    continue
+                max_id = await self.max_id(spec)
+                for start in range(0, (max_id if max_id is not None else -1) + 1, self.page_size):
+                    rows = await self.page(spec, start, start + self.page_size)
+                    await asyncio.to_thread(writer.write, rows)
+
+            files.update(await asyncio.to_thread(writer.close))
+            logger.info("Exportação: %s com %d linhas", name, writer.rows)
+
+        manifest = {
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "page_size": self.page_size,
+            "include_passwords": self.include_passwords,
+            "files": files,
+        }
+        with open(os.path.join(self.directory, "manifest.json"), "w") as file:
+            json.dump(manifest, file, indent=2)
+        return manifest
+
+    async def max_id(self, spec: ExportSpec) -> int | None:
+        records = await self.repository.read(spec.max_id_query())
+        return records[0]["max_id"] if records else None
+
+    async def page(self, spec: ExportSpec, start: int, end: int) -> list[dict]:
+        records = await self.repository.read(spec.page_query(), start=start, end=end, include_passwords=self.include_passwords)
+        return [record["row"] for record in records]
+
+
+class MemoryGraphExporter(GraphExporter):
+    """Mesma exportação sobre o grafo em memória, com as relações numeradas na ordem de iteração"""
+
+    def __init__(self, graph: MemoryGraph, directory: str, page_size: int = 10_000, include_passwords: bool = False, parquet: bool = False):
+        super().__init__(None, directory, page_size, include_passwords, parquet)
+        self.graph = graph
+        self._relationships: dict[str, list[tuple[int, int]]] = {}
+
+    def relationships(self, rel_type: str) -> list[tuple[int, int]]:
+        if rel_type not in self._relationships:
+            self._relationships[rel_type] = [(start, end) for start in list(self.graph.outgoing) for end in self.graph.outgoing[start].get(rel_type, {})]
+        return self._relationships[rel_type]
+
+    def uid(self, node_id: int) -> str:
+        return str(self.graph.nodes[node_id].props["uid"])
+
+    async def max_id(self, spec: ExportSpec) -> int | None:
+        await self.graph.round_trip("memory:export_max_id")
+        if spec.file in ("users", "posts"):
+            label = "User" if spec.file == "users" else "Post"
+            return max((node_id for node_id, node in self.graph.nodes.items() if node.label == label), default=None)
+        return len(self.relationships(spec.rel_type)) - 1
+
+    async def page(self, spec: ExportSpec, start: int, end: int) -> list[dict]:
+        await self.graph.round_trip("memory:export_page")
+        if spec.file == "users":
+            nodes = [node_id for node_id in range(start, end) if node_id in self.graph.nodes and self.graph.nodes[node_id].label == "User"]
+            return [
+                {
+                    **self.graph.project(node_id, ("uid", "username", "email", "full_name", "bio", "avatar_link", "created_at", "updated_at")),
+                    "password_hash": self.graph.nodes[node_id].props.get("password") if self.include_passwords else None,
+                }
+                for node_id in nodes
+            ]
+
+        if spec.file == "posts":
+            rows = []
+            for node_id in range(start, end):
+                node = self.graph.nodes.get(node_id)
+                if node is None or node.label != "Post":
+                    continue
+                owners = list(self.graph.neighbors(node_id, "OWNS", "INCOMING"))
+                parents = list(self.graph.neighbors(node_id, "LINKED_TO", "OUTGOING"))
+                rows.append(
+                    {
+                        **self.graph.project(node_id, ("uid", "content", "created_at", "updated_at")),
+                        "owner_uid": self.uid(owners[0]) if owners else None,
+                        "parent_uid": self.uid(parents[0]) if parents else None,
+                    }
+                )
+            return rows
+
+        pairs = self.relationships(spec.rel_type)[start:end]
+        if spec.file == "follows":
+            return [{"source_uid": self.uid(source), "target_uid": self.uid(target)} for source, target in pairs]
+        return [{"user_uid": self.uid(user), "post_uid": self.uid(post), "type": spec.rel_type} for user, post in pairs]
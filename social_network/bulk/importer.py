@@ -0,0 +1,263 @@
+"""
+Importação em massa direto no Neo4j, sem passar pela API.
+
+Os registros são lidos em fluxo, agrupados em lotes de `batch_size` e gravados por `workers` tarefas
+em paralelo, cada lote num único `UNWIND $rows` dentro de uma transação gerenciada (com as retentativas
+do GraphRepository). A fila entre leitura e escrita é limitada, então a memória não depende do tamanho
+do arquivo.
+
+Todas as escritas usam MERGE, então reprocessar um lote não duplica nada. O checkpoint guarda, por
+arquivo, quantos registros do início já foram gravados (só o prefixo contínuo, já que os lotes terminam
+fora de ordem); ao retomar, esses registros são pulados.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import batched, islice
+from uuid import uuid4
+
+from social_network.bulk.records import parse_datetime, parse_uid
+from social_network.core.repository import GraphRepository
+from social_network.security import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+MERGE_USERS = """
+UNWIND $rows AS row
+MERGE (u:User {username: row.username})
+ON CREATE SET u.uid = row.uid
+SET u += row.props
+RETURN count(*) AS written
+"""
+
+MERGE_POSTS = """
+UNWIND $rows AS row
+MATCH (owner:User {uid: row.owner_uid})
+MERGE (p:Post {uid: row.uid})
+SET p += row.props
+MERGE (owner)-[:OWNS]->(p)
+RETURN count(*) AS written
+"""
+
+MERGE_LINKS = """
+UNWIND $rows AS row
+MATCH (comment:Post {uid: row.uid}), (parent:Post {uid: row.parent_uid})
+MERGE (comment)-[:LINKED_TO]->(parent)
+RETURN count(*) AS written
+"""
+
+MERGE_FOLLOWS = """
+UNWIND $rows AS row
+MATCH (source:User {uid: row.source_uid}), (target:User {uid: row.target_uid})
+WHERE source <> target
+MERGE (source)-[:FOLLOWING]->(target)
+RETURN count(*) AS written
+"""
+
+MERGE_REACTIONS = """
+UNWIND $rows AS row
+MATCH (u:User {uid: row.user_uid}), (p:Post {uid: row.post_uid})
+FOREACH (_ IN CASE row.type WHEN 'LIKED' THEN [1] ELSE [] END | MERGE (u)-[:LIKED]->(p))
+FOREACH (_ IN CASE row.type WHEN 'DISLIKED' THEN [1] ELSE [] END | MERGE (u)-[:DISLIKED]->(p))
+RETURN count(*) AS written
+"""
+
+REACTION_TYPES = {"LIKED", "DISLIKED"}
+
+
+def prepare_user(record: dict, now: datetime) -> dict:
+    if "password_hash" not in record and "password" not in record:
+        raise ValueError("password or password_hash is required")
+
+    created_at = parse_datetime(record.get("created_at"), now)
+    return {
+        "username": record["username"],
+        "uid": parse_uid(record["uid"]) if record.get("uid") else str(uuid4()),
+        "plain_password": None if "password_hash" in record else record["password"],
+        "props": {
+            "password": record.get("password_hash"),
+            "email": record["email"],
+            "full_name": record["full_name"],
+            "bio": record.get("bio", ""),
+            "avatar_link": record.get("avatar_link", ""),
+            "created_at": created_at,
+            "updated_at": parse_datetime(record.get("updated_at"), created_at),
+        },
+    }
+
+
+def prepare_post(record: dict, now: datetime) -> dict:
+    created_at = parse_datetime(record.get("created_at"), now)
+    return {
+        "uid": parse_uid(record["uid"]),
+        "owner_uid": parse_uid(record["owner_uid"]),
+        "props": {
+            "content": record["content"],
+            "created_at": created_at,
+            "updated_at": parse_datetime(record.get("updated_at"), created_at),
+        },
+    }
+
+
+def prepare_link(record: dict, now: datetime) -> dict | None:
+    if not record.get("parent_uid"):
+        return None
+    return {"uid": parse_uid(record["uid"]), "parent_uid": parse_uid(record["parent_uid"])}
+
+
+def prepare_follow(record: dict, now: datetime) -> dict:
+    return {"source_uid": parse_uid(record["source_uid"]), "target_uid": parse_uid(record["target_uid"])}
+
+
+def prepare_reaction(record: dict, now: datetime) -> dict:
+    reaction = record.get("type", "LIKED").upper()
+    if reaction not in REACTION_TYPES:
+        raise ValueError(f"unknown reaction type {reaction}")
+    return {"user_uid": parse_uid(record["user_uid"]), "post_uid": parse_uid(record["post_uid"]), "type": reaction}
+
+
+@dataclass(frozen=True)
+class ImportKind:
+    query: str
+    prepare: Callable[[dict, datetime], dict | None]
+
+
+KINDS = {
+    "users": ImportKind(MERGE_USERS, prepare_user),
+    "posts": ImportKind(MERGE_POSTS, prepare_post),
+    "links": ImportKind(MERGE_LINKS, prepare_link),
+    "follows": ImportKind(MERGE_FOLLOWS, prepare_follow),
+    "reactions": ImportKind(MERGE_REACTIONS, prepare_reaction),
+}
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    written: int = 0
+    rejected: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def per_minute(self) -> float:
+        return self.written / self.elapsed * 60 if self.elapsed else 0.0
+
+
+class Checkpoint:
+    """Quantos registros do início de cada arquivo já foram gravados, salvo de forma atômica"""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.positions: dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.positions = json.load(file)
+
+    def get(self, key: str) -> int:
+        return self.positions.get(key, 0)
+
+    def save(self, key: str, position: int):
+        self.positions[key] = position
+        if not self.path:
+            return
+
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.positions, file)
+        os.replace(temporary, self.path)
+
+
+class BulkImporter:
+    def __init__(self, repository: GraphRepository, batch_size: int = 5_000, workers: int = 4, checkpoint: Checkpoint | None = None):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = checkpoint or Checkpoint(None)
+
+    async def run(self, kind: str, records: Iterable[dict], key: str | None = None) -> ImportResult:
+        import_kind = KINDS[kind]
+        key = key or kind
+        result = ImportResult(kind, skipped=self.checkpoint.get(key))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        finished: dict[int, int] = {}
+        position = result.skipped
+        next_batch = 0
+        now = datetime.now()
+        start = time.perf_counter()
+
+        async def produce():
+            for number, batch in enumerate(batched(islice(records, result.skipped, None), self.batch_size)):
+                await queue.put((number, batch))
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        def commit(number: int, size: int):
+            nonlocal position, next_batch
+            finished[number] = size
+            advanced = False
+            while next_batch in finished:
+                position += finished.pop(next_batch)
+                next_batch += 1
+                advanced = True
+            if advanced:
+                self.checkpoint.save(key, position)
+
+        async def write():
+            while (item := await queue.get()) is not None:
+                number, batch = item
+                rows = []
+                for record in batch:
+                    try:
+                        row = import_kind.prepare(record, now)
+                    except (KeyError, ValueError, TypeError) as error:
+                        result.rejected += 1
+                        logger.warning("%s: registro ignorado (%s): %s", kind, error, record)
+                        continue
+                    if row is not None:
+                        rows.append(row)
+
+                if kind == "users":
+                    await hash_passwords(rows)
+
+                written = 0
+                if rows:
+                    records = await self.repository.write(import_kind.query, rows=rows)
+                    written = records[0]["written"]
+                    # O MATCH descarta sem erro as linhas cujo usuário ou post não existe no banco
+                    if written < len(rows):
+                        result.rejected += len(rows) - written
+                        logger.warning("%s: %d registros ignorados, usuário ou post inexistente no banco", kind, len(rows) - written)
+                result.written += written
+                commit(number, len(batch))
+
+        tasks = [asyncio.create_task(produce()), *(asyncio.create_task(write()) for _ in range(self.workers))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # O checkpoint já aponta para o último prefixo gravado
+            for task in tasks:
+                task.cancel()
+            raise
+
+        result.elapsed = time.perf_counter() - start
+        logger.info("%s: %d gravados, %d rejeitados, %d já importados (%.1fs, %.0f/min)", kind, result.written, result.rejected, result.skipped, result.elapsed, result.per_minute)
+        return result
+
+
+async def hash_passwords(rows: list[dict]):
+    """Gera o hash das senhas em texto numa thread; senhas já com hash (`password_hash`) passam direto"""
+    plain = [row for row in rows if row["plain_password"] is not None]
+    if plain:
+        hashes = await asyncio.to_thread(lambda: [get_password_hash(row["plain_password"]) for row in plain])
+        for row, password in zip(plain, hashes, strict=True):
+            row["props"]["password"] = password
+
+    for row in rows:
+        del row["plain_password"]
@@ -0,0 +1,31 @@
+import csv
+import gzip
+import json
+from collections.abc import Iterator
+from datetime import datetime
+from uuid import UUID
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Lê um arquivo JSONL ou CSV (opcionalmente .gz) registro a registro, sem carregar o arquivo inteiro"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        if path.removesuffix(".gz").endswith(".csv"):
+            for row in csv.DictReader(file):
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def parse_uid(value) -> str:
+    return str(UUID(str(value)))
+
+
+def parse_datetime(value, default: datetime) -> datetime:
+    if value is None:
+        return default
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
@@ -0,0 +1,140 @@
+"""
+Controle de admissão: recusa cedo, com 503 e `Retry-After`, o que não vai conseguir ser atendido.
+
+Cada requisição cai numa classe de rota pelo método e caminho. Todas as classes têm um limite de
+requisições em andamento (`ADMISSION_MAX_IN_FLIGHT`), e a pressão do processo, medida pelo atraso do
+event loop e pela espera por conexões do pool do Neo4j, corta as classes por prioridade:
+
+- pressão moderada (`*_SOFT_MS`): recusa as renderizações caras (`expensive`: perfis com posts,
+  recomendações, feed, admin);
+- pressão alta (`*_HARD_MS`): recusa também leituras simples, escritas e novas conexões do /stream;
+- `auth` e `critical` (health, métricas, docs) nunca são recusadas por pressão, só `auth` pelo limite
+  próprio, que também limita quantos hashes argon2 rodam ao mesmo tempo.
+
+Assim, num pico, login e leituras baratas continuam respondendo enquanto o resto recebe um 503 rápido
+em vez de ficar na fila até todo mundo estourar o timeout junto.
+"""
+
+import json
+import random
+import re
+from dataclasses import dataclass
+
+from social_network.core.metrics import Counter, Gauge, loop_lag_monitor, registry
+from social_network.core.pool import pool_monitor
+
+ADMISSION_REJECTED = registry.register(Counter("admission_rejected_total", "Requisições recusadas pelo controle de admissão", ("route_class", "reason")))
+ADMISSION_IN_FLIGHT = registry.register(Gauge("admission_in_flight", "Requisições em andamento por classe de rota", ("route_class",)))
+
+NORMAL, ELEVATED, OVERLOADED = 0, 1, 2
+
+# Pressão a partir da qual cada classe é recusada; None nunca é recusada por pressão
+SHED_AT = {"critical": None, "auth": None, "expensive": ELEVATED, "read": OVERLOADED, "write": OVERLOADED, "stream": OVERLOADED}
+
+# Primeira regra que casar define a classe: (classe, métodos ou None para todos, caminho)
+ROUTE_CLASSES = (
+    ("critical", None, re.compile(r"^/($|health|metrics|docs|redoc|openapi\.json)")),
+    ("auth", None, re.compile(r"^/auth/")),
+    ("auth", {"POST"}, re.compile(r"^/users/?$")),
+    ("stream", None, re.compile(r"^/stream")),
+    ("expensive", None, re.compile(r"^/admin/")),
+    ("expensive", {"GET", "HEAD"}, re.compile(r"^/posts/feed")),
+    ("read", {"GET", "HEAD"}, re.compile(r"^/users/?$")),
+    ("expensive", None, re.compile(r"^/users/")),
+    ("read", {"GET", "HEAD", "OPTIONS"}, re.compile(r"")),
+    ("write", None, re.compile(r"")),
+)
+
+
+def route_class(method: str, path: str) -> str:
+    for name, methods, pattern in ROUTE_CLASSES:
+        if (methods is None or method in methods) and pattern.match(path):
+            return name
+    return "write"
+
+
+@dataclass
+class AdmissionLimits:
+    max_in_flight: dict[str, int]
+    lag_soft: float = 0.1
+    lag_hard: float = 0.5
+    pool_wait_soft: float = 0.05
+    pool_wait_hard: float = 0.5
+    retry_after: int = 2
+
+
+class AdmissionController:
+    def __init__(self, limits: AdmissionLimits):
+        self.limits = limits
+        self.in_flight: dict[str, int] = dict.fromkeys(SHED_AT, 0)
+
+    def pressure(self) -> int:
+        lag = loop_lag_monitor.lag
+        wait = pool_monitor.current_wait()
+        if lag >= self.limits.lag_hard or wait >= self.limits.pool_wait_hard:
+            return OVERLOADED
+        if lag >= self.limits.lag_soft or wait >= self.limits.pool_wait_soft:
+            return ELEVATED
+        return NORMAL
+
+    def admit(self, name: str) -> str | None:
+        """Reserva uma vaga na classe, ou retorna o motivo da recusa"""
+        limit = self.limits.max_in_flight.get(name)
+        if limit is not None and self.in_flight[name] >= limit:
+            return "in_flight"
+
+        shed_at = SHED_AT[name]
+        if shed_at is not None and self.pressure() >= shed_at:
+            return "pressure"
+
+        self.in_flight[name] += 1
+        ADMISSION_IN_FLIGHT.labels(name).set(self.in_flight[name])
+        return None
+
+    def release(self, name: str):
+        self.in_flight[name] -= 1
+        ADMISSION_IN_FLIGHT.labels(name).set(self.in_flight[name])
+
+    def retry_after(self) -> int:
+        # Jitter para os clientes recusados não voltarem todos no mesmo segundo
+        return self.limits.retry_after + random.randint(0, self.limits.retry_after)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limits: AdmissionLimits):
+        self.app = app
+        self.controller = AdmissionController(limits)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        name = route_class(scope.get("method", "GET"), scope["path"])
+        reason = self.controller.admit(name)
+        if reason is not None:
+            ADMISSION_REJECTED.labels(name, reason).inc()
+            return await self.reject(scope, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    async def reject(self, scope, send):
+        if scope["type"] == "websocket":
+            # Fecha o handshake sem aceitar; 1013 = "try again later"
+            return await send({"type": "websocket.close", "code": 1013})
+
+        body = json.dumps({"detail": "Service overloaded, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.controller.retry_after()).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,259 @@
+"""
+Pub/sub em processo para as atualizações ao vivo do /stream.
+
+Cada conexão assina um conjunto de tópicos (`user:<uid>:posts`, `post:<uid>`) e recebe as mensagens
+numa fila própria com tamanho máximo. Quem publica nunca espera: se a fila de uma conexão lenta
+encher, a mensagem é descartada para ela e a conexão recebe um `resync` para recarregar pelo REST.
+O dado de cada mensagem é serializado uma vez só, na publicação, e compartilhado entre os assinantes.
+
+Contagens de reações passam por `publish_debounced`: dentro de `STREAM_DEBOUNCE_SECONDS` só o último
+valor de cada post é enviado, então um post viral gera uma atualização por janela e não uma por curtida.
+
+Com vários workers o backend repassa as publicações para os outros processos. `LocalBackend` não repassa
+nada (um worker só); `RedisBackend` usa o pub/sub do Redis quando o pacote `redis` está instalado.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import cached_property
+from uuid import uuid4
+
+from social_network.core.metrics import Counter, Gauge, registry
+from social_network.settings import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - dependência opcional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_SUBSCRIBERS = registry.register(Gauge("stream_subscribers", "Conexões abertas no /stream"))
+STREAM_MESSAGES = registry.register(Counter("stream_messages_total", "Mensagens publicadas no broker", ("event",)))
+STREAM_DROPPED = registry.register(Counter("stream_dropped_total", "Mensagens descartadas por fila de conexão cheia"))
+
+# Acima disso a entrega é feita em blocos, devolvendo o event loop entre um bloco e outro
+FANOUT_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class Message:
+    topic: str
+    event: str
+    data: str
+
+    @cached_property
+    def sse(self) -> bytes:
+        return f"event: {self.event}\ndata: {self.data}\n\n".encode()
+
+    @cached_property
+    def text(self) -> str:
+        return f'{{"event": {json.dumps(self.event)}, "topic": {json.dumps(self.topic)}, "data": {self.data}}}'
+
+
+RESYNC = Message("", "resync", "{}")
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", topics: set[str], queue_size: int):
+        self.broker = broker
+        self.topics = topics
+        self.queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+    def put(self, message: Message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            STREAM_DROPPED.inc()
+            self.lagged = True
+
+    async def get(self) -> Message:
+        # Depois de perder mensagens o cliente recebe um resync assim que a fila esvazia
+        if self.lagged and self.queue.empty():
+            self.lagged = False
+            return RESYNC
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalBackend:
+    """Sem repasse: todas as conexões estão neste processo"""
+
+    async def start(self, deliver: Callable[[dict], None]):
+        pass
+
+    async def publish(self, payload: dict):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RedisBackend:
+    def __init__(self, url: str, channel: str = "social_network:stream"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for BROKER_BACKEND=redis")
+        self.url = url
+        self.channel = channel
+        self.client = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self, deliver: Callable[[dict], None]):
+        self.client = redis.from_url(self.url)
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _listen(self, pubsub, deliver: Callable[[dict], None]):
+        async for item in pubsub.listen():
+            try:
+                deliver(json.loads(item["data"]))
+            except Exception:
+                logger.exception("Mensagem inválida recebida do Redis")
+
+    async def publish(self, payload: dict):
+        await self.client.publish(self.channel, json.dumps(payload))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+
+
+class Broker:
+    def __init__(self, queue_size: int = 256, debounce: float = 1.0):
+        self.queue_size = queue_size
+        self.debounce = debounce
+        self.id = str(uuid4())
+        self.topics: dict[str, set[Subscription]] = defaultdict(set)
+        self.subscribers = 0
+        self.backend = LocalBackend()
+        self._debounced: dict[tuple[str, str], Message] = {}
+        self._background: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, topics: set[str]) -> Subscription:
+        subscription = Subscription(self, topics, self.queue_size)
+        for topic in topics:
+            self.topics[topic].add(subscription)
+        self.subscribers += 1
+        STREAM_SUBSCRIBERS.set(self.subscribers)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.topics[topic]
+        self.subscribers -= 1
+        STREAM_SUBSCRIBERS.set(self.subscribers)
+
+    def publish(self, topic: str, event: str, data: dict | str):
+        message = Message(topic, event, data if isinstance(data, str) else json.dumps(data, default=str))
+        self._deliver(message)
+        self._forward(message)
+
+    def publish_debounced(self, topic: str, event: str, data: dict):
+        """Guarda só o último valor do evento no tópico; o loop do broker publica a cada `debounce` segundos"""
+        self._debounced[(topic, event)] = Message(topic, event, json.dumps(data, default=str))
+        if self._task is None:
+            self._flush_debounced()
+
+    def _deliver(self, message: Message):
+        STREAM_MESSAGES.labels(message.event).inc()
+        subscribers = self.topics.get(message.topic, ())
+        if len(subscribers) <= FANOUT_CHUNK:
+            for subscription in subscribers:
+                subscription.put(message)
+            return
+        self._in_background(self._fan_out(message, list(subscribers)))
+
+    async def _fan_out(self, message: Message, subscribers: list[Subscription]):
+        for start in range(0, len(subscribers), FANOUT_CHUNK):
+            for subscription in subscribers[start : start + FANOUT_CHUNK]:
+                subscription.put(message)
+            await asyncio.sleep(0)
+
+    def _forward(self, message: Message):
+        if isinstance(self.backend, LocalBackend):
+            return
+        payload = {"origin": self.id, "topic": message.topic, "event": message.event, "data": message.data}
+        self._in_background(self._backend_call(self.backend.publish(payload)))
+
+    def _in_background(self, call: Awaitable):
+        task = asyncio.create_task(call)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _receive(self, payload: dict):
+        if payload.get("origin") != self.id:
+            self._deliver(Message(payload["topic"], payload["event"], payload["data"]))
+
+    def _flush_debounced(self):
+        pending, self._debounced = self._debounced, {}
+        for message in pending.values():
+            self._deliver(message)
+            self._forward(message)
+
+    async def start(self, backend=None):
+        if self._task is not None:
+            return
+        self.backend = backend or LocalBackend()
+        await self.backend.start(self._receive)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._flush_debounced()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await self.backend.stop()
+        self.backend = LocalBackend()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.debounce)
+            self._flush_debounced()
+
+    async def _backend_call(self, call: Awaitable):
+        try:
+            await call
+        except Exception:
+            logger.exception("Falha ao repassar mensagem para os outros workers")
+
+
+def create_backend():
+    if settings.BROKER_BACKEND == "redis":
+        return RedisBackend(settings.BROKER_REDIS_URL)
+    return LocalBackend()
+
+
+broker = Broker(queue_size=settings.STREAM_QUEUE_SIZE, debounce=settings.STREAM_DEBOUNCE_SECONDS)
+
+
+async def wait_message(subscription: Subscription, timeout: float) -> Message | None:
+    """Próxima mensagem da conexão, ou None depois de `timeout` segundos sem nada (hora do heartbeat)"""
+    with contextlib.suppress(TimeoutError):
+        return await asyncio.wait_for(subscription.get(), timeout)
+    return None
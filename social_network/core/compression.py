@@ -0,0 +1,157 @@
+"""
+Compressão das respostas negociada pelo `Accept-Encoding`.
+
+gzip está sempre disponível; zstd e brotli entram quando os pacotes `zstandard` e `brotli` estão
+instalados. Entre as codificações aceitas pelo cliente vale a ordem de `COMPRESSION_ENCODINGS`.
+
+Respostas com o corpo inteiro numa mensagem só são comprimidas a partir de `COMPRESSION_MINIMUM_SIZE`
+bytes (abaixo disso o custo de CPU não compensa) e, a partir de `COMPRESSION_THREAD_SIZE`, a compressão
+roda numa thread para não segurar o event loop. Respostas em streaming são comprimidas pedaço a pedaço,
+com um flush ao fim de cada pedaço, então o cliente recebe cada parte assim que ela é gerada.
+"""
+
+import asyncio
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+# Eventos precisam chegar sem buffer nenhum no caminho
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class GzipEncoder:
+    def __init__(self):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self.compressor.process(data) + (self.compressor.finish() if final else self.compressor.flush())
+
+
+ENCODERS = {"gzip": GzipEncoder}
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header: str, preference: list[str]) -> str | None:
+    accepted = accepted_encodings(header)
+    for encoding in preference:
+        if encoding in ENCODERS and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def is_compressible(headers: list[tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for name, value in headers:
+        if name.lower() == b"content-encoding":
+            return False
+        if name.lower() == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, thread_size: int = 256 * 1024, encodings: list[str] | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+        self.encodings = encodings or ["zstd", "br", "gzip"]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        header = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), "")
+        encoding = choose_encoding(header, self.encodings)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+
+        async def compress(data: bytes, final: bool) -> bytes:
+            if len(data) >= self.thread_size:
+                return await asyncio.to_thread(encoder.compress, data, final)
+            return encoder.compress(data, final)
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder
+
+            if message["type"] == "http.response.start":
+                if not is_compressible(message.get("headers", [])):
+                    return await send(message)
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = [(name, value) for name, value in start_message.get("headers", []) if name.lower() != b"content-length"]
+                headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body and len(body) < self.minimum_size:
+                    await send({**start_message, "headers": [*headers, (b"content-length", str(len(body)).encode())]})
+                    start_message = None
+                    return await send(message)
+
+                encoder = ENCODERS[encoding]()
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    body = await compress(body, final=True)
+                    await send({**start_message, "headers": [*headers, (b"content-length", str(len(body)).encode())]})
+                    return await send({"type": "http.response.body", "body": body})
+
+                # Em streaming o tamanho final não é conhecido, então a resposta segue sem content-length
+                await send({**start_message, "headers": headers})
+
+            await send({"type": "http.response.body", "body": await compress(body, final=not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
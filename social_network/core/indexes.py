@@ -0,0 +1,136 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+
+from pyneo4j_ogm import Pyneo4jClient
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_NAME = "social_network"
+
+
+class IndexKind(str, Enum):
+    UNIQUE = "UNIQUE"
+    RANGE = "RANGE"
+    TEXT = "TEXT"
+    FULLTEXT = "FULLTEXT"
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    """Declaração de um índice/constraint aplicado no boot da aplicação"""
+
+    name: str
+    kind: IndexKind
+    label: str
+    properties: tuple[str, ...]
+
+    @property
+    def signature(self) -> tuple[str, str, tuple[str, ...]]:
+        # Constraints de unicidade são mantidas por um índice RANGE no Neo4j 5
+        index_type = IndexKind.RANGE.value if self.kind == IndexKind.UNIQUE else self.kind.value
+        return index_type, self.label, self.properties
+
+    def cypher(self) -> str:
+        props = ", ".join(f"n.{prop}" for prop in self.properties)
+
+        if self.kind == IndexKind.UNIQUE:
+            return f"CREATE CONSTRAINT {self.name} IF NOT EXISTS FOR (n:{self.label}) REQUIRE ({props}) IS UNIQUE"
+        if self.kind == IndexKind.RANGE:
+            return f"CREATE RANGE INDEX {self.name} IF NOT EXISTS FOR (n:{self.label}) ON ({props})"
+        if self.kind == IndexKind.TEXT:
+            return f"CREATE TEXT INDEX {self.name} IF NOT EXISTS FOR (n:{self.label}) ON ({props})"
+        return f"CREATE FULLTEXT INDEX {self.name} IF NOT EXISTS FOR (n:{self.label}) ON EACH [{props}]"
+
+
+@dataclass
+class IndexReport:
+    missing: list[IndexDefinition] = field(default_factory=list)
+    unused: list[str] = field(default_factory=list)
+
+
+INDEXES: tuple[IndexDefinition, ...] = (
+    IndexDefinition("user_uid_unique", IndexKind.UNIQUE, "User", ("uid",)),
+    IndexDefinition("user_username_unique", IndexKind.UNIQUE, "User", ("username",)),
+    IndexDefinition("user_email_unique", IndexKind.UNIQUE, "User", ("email",)),
+    IndexDefinition("user_full_name_text", IndexKind.TEXT, "User", ("full_name",)),
+    IndexDefinition("user_influence_range", IndexKind.RANGE, "User", ("influence",)),
+    IndexDefinition("user_community_range", IndexKind.RANGE, "User", ("community",)),
+    IndexDefinition("post_uid_unique", IndexKind.UNIQUE, "Post", ("uid",)),
+    IndexDefinition("post_created_at_range", IndexKind.RANGE, "Post", ("created_at",)),
+    IndexDefinition("post_updated_at_range", IndexKind.RANGE, "Post", ("updated_at",)),
+    IndexDefinition("post_reacted_at_range", IndexKind.RANGE, "Post", ("reacted_at",)),
+    IndexDefinition("post_content_fulltext", IndexKind.FULLTEXT, "Post", ("content",)),
+    IndexDefinition("notification_uid_unique", IndexKind.UNIQUE, "Notification", ("uid",)),
+    IndexDefinition("notification_open_key_unique", IndexKind.UNIQUE, "Notification", ("open_key",)),
+    IndexDefinition("job_id_unique", IndexKind.UNIQUE, "Job", ("id",)),
+    IndexDefinition("lease_name_unique", IndexKind.UNIQUE, "Lease", ("name",)),
+    IndexDefinition("tombstone_uid_unique", IndexKind.UNIQUE, "Tombstone", ("uid",)),
+    IndexDefinition("tombstone_deleted_at_range", IndexKind.RANGE, "Tombstone", ("deleted_at",)),
+)
+
+
+async def apply_indexes(client: Pyneo4jClient, indexes: tuple[IndexDefinition, ...] = INDEXES):
+    """Cria os índices declarados. Todos os comandos usam IF NOT EXISTS, então rodar de novo não altera nada."""
+    for index in indexes:
+        await client.cypher(index.cypher())
+
+
+async def report_indexes(client: Pyneo4jClient, indexes: tuple[IndexDefinition, ...] = INDEXES) -> IndexReport:
+    """Compara o registro com o `SHOW INDEXES` do banco, apontando índices faltando e índices sem leitura"""
+    results, _ = await client.cypher("SHOW INDEXES YIELD name, type, labelsOrTypes, properties, readCount WHERE type <> 'LOOKUP' RETURN name, type, labelsOrTypes, properties, readCount")
+
+    existing = {}
+    report = IndexReport()
+
+    for name, index_type, labels, properties, read_count in results:
+        for label in labels or []:
+            existing[(index_type, label, tuple(properties or []))] = name
+
+        if not read_count:
+            report.unused.append(name)
+
+    report.missing = [index for index in indexes if index.signature not in existing]
+    return report
+
+
+async def bootstrap_indexes(client: Pyneo4jClient):
+    await apply_indexes(client)
+    report = await report_indexes(client)
+
+    for index in report.missing:
+        logger.warning("Índice %s (%s em :%s%s) não encontrado no banco", index.name, index.kind.value, index.label, index.properties)
+
+    if report.unused:
+        logger.info("Índices sem leituras registradas: %s", ", ".join(report.unused))
+
+    return report
+
+
+def schema_version(models: list, indexes: tuple[IndexDefinition, ...] = INDEXES) -> str:
+    """Impressão digital dos índices declarados e dos campos dos modelos registrados"""
+    parts = [index.cypher() for index in indexes]
+    parts += [f"{model.__name__}({','.join(sorted(getattr(model, 'model_fields', {})))})" for model in models]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+async def bootstrap_schema(client: Pyneo4jClient, models: list, force: bool = False) -> bool:
+    """
+    Aplica os índices só quando o marcador gravado no banco difere da versão atual do schema, assim os
+    workers não repetem dezenas de comandos de schema a cada boot. Retorna se o schema foi aplicado.
+    """
+    version = schema_version(models)
+    results, _ = await client.cypher("MATCH (m:SchemaVersion {name: $name}) RETURN m.version", parameters={"name": SCHEMA_NAME})
+
+    if results and results[0][0] == version and not force:
+        logger.info("Schema %s já aplicado, pulando a criação de índices", version)
+        return False
+
+    await bootstrap_indexes(client)
+    await client.cypher(
+        "MERGE (m:SchemaVersion {name: $name}) SET m.version = $version, m.applied_at = datetime()",
+        parameters={"name": SCHEMA_NAME, "version": version},
+    )
+    logger.info("Schema %s aplicado", version)
+    return True
@@ -0,0 +1,126 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from social_network.core.metrics import NEO4J_QUERIES, NEO4J_QUERY_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def query_shape(query: str) -> str:
+    """Normaliza uma consulta para agrupar execuções que só diferem em literais e espaços"""
+    return _SPACES.sub(" ", _LITERALS.sub("?", query)).strip()
+
+
+@dataclass
+class QueryStats:
+    route: str | None = None
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, query: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.shapes[query_shape(query)] += 1
+
+    def merge(self, other: "QueryStats"):
+        self.count += other.count
+        self.duration += other.duration
+        self.shapes.update(other.shapes)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_captures: list[list[QueryStats]] = []
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def bind_query_stats(stats: QueryStats | None):
+    _query_stats.set(stats)
+
+
+def record_query(query: str, duration: float):
+    NEO4J_QUERIES.inc()
+    NEO4J_QUERY_LATENCY.observe(duration)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(query, duration)
+
+
+@contextmanager
+def capture_queries():
+    """Coleta as estatísticas de cada requisição finalizada enquanto o bloco estiver ativo (usado nos testes)"""
+    captured: list[QueryStats] = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+def instrument_client(client):
+    """Mede cada chamada `cypher` do cliente do OGM, por onde passam todas as consultas dos modelos"""
+    if getattr(client.cypher, "instrumented", False):
+        return
+
+    cypher = client.cypher
+
+    async def timed_cypher(query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await cypher(query, *args, **kwargs)
+        finally:
+            record_query(query, time.perf_counter() - start)
+
+    timed_cypher.instrumented = True
+    client.cypher = timed_cypher
+
+
+class QueryInstrumentationMiddleware:
+    """Conta as consultas Cypher de cada requisição, emite `Server-Timing` e avisa sobre padrões N+1"""
+
+    def __init__(self, app, threshold: int = 10):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - start) * 1000
+                server_timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={total:.1f}'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _query_stats.reset(token)
+            route = scope.get("route")
+            stats.route = getattr(route, "path", scope["path"])
+
+            for shape, count in stats.repeated(self.threshold):
+                logger.warning("Possível N+1 em %s %s: consulta executada %d vezes: %s", scope["method"], stats.route, count, shape[:200])
+
+            for captured in _captures:
+                captured.append(stats)
@@ -0,0 +1,268 @@
+"""
+Fila de jobs em processo para efeitos colaterais que não precisam segurar a resposta.
+
+Os handlers enfileiram `job_runner.enqueue(tipo, payload)` depois que a escrita principal foi
+confirmada e respondem na hora; `workers` tarefas do event loop executam os jobs com concorrência
+limitada. Uma falha é retentada com backoff exponencial com jitter até `max_attempts`, e cada tipo de
+job tem contadores e histograma de duração no /metrics.
+
+Com o outbox ligado cada job também é gravado como um nó `:Job` no Neo4j antes de entrar na fila e
+apagado quando termina, assim um job enfileirado antes de um restart é retomado pelo próximo processo
+(a varredura pega jobs pendentes com o lease vencido). A entrega é pelo menos uma vez: handlers
+precisam ser idempotentes.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from social_network.core.metrics import Counter, Gauge, Histogram, registry
+from social_network.core.repository import GraphRepository
+from social_network.settings import settings
+
+logger = logging.getLogger(__name__)
+
+JOBS = registry.register(Counter("jobs_total", "Jobs em segundo plano finalizados", ("type", "outcome")))
+JOB_DURATION = registry.register(Histogram("job_duration_seconds", "Duração de cada execução de job", ("type",)))
+JOBS_PENDING = registry.register(Gauge("jobs_pending", "Jobs na fila ou aguardando nova tentativa"))
+
+OUTBOX_INSERT = """
+CREATE (j:Job {id: $id, type: $type, payload: $payload, status: 'pending', attempts: 0, created_at: datetime(), lease_until: $lease_until})
+"""
+
+OUTBOX_RETRY = "MATCH (j:Job {id: $id}) SET j.attempts = $attempts, j.lease_until = $lease_until, j.error = $error"
+
+OUTBOX_DONE = "MATCH (j:Job {id: $id}) DETACH DELETE j"
+
+OUTBOX_FAILED = "MATCH (j:Job {id: $id}) SET j.status = 'failed', j.attempts = $attempts, j.error = $error, j.failed_at = datetime()"
+
+# O SET em `_lock` pega o lock de escrita do nó antes de reler o lease, então dois processos
+# varrendo ao mesmo tempo nunca pegam o mesmo job
+OUTBOX_CLAIM = """
+MATCH (j:Job {status: 'pending'})
+WHERE j.lease_until < $now
+WITH j ORDER BY j.created_at LIMIT $limit
+SET j._lock = true
+WITH j WHERE j.lease_until < $now
+SET j.lease_until = $lease_until
+REMOVE j._lock
+RETURN j.id AS id, j.type AS type, j.payload AS payload, j.attempts AS attempts
+"""
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class Job:
+    type: str
+    payload: dict
+    id: str = field(default_factory=lambda: str(uuid4()))
+    attempts: int = 0
+
+
+class Outbox:
+    """Persistência dos jobs no Neo4j, com lease para que só um processo execute cada job"""
+
+    def __init__(self, repository: GraphRepository, lease: float = 300.0):
+        self.repository = repository
+        self.lease = lease
+
+    def lease_until(self, delay: float = 0.0) -> datetime:
+        return datetime.now().astimezone() + timedelta(seconds=delay + self.lease)
+
+    async def add(self, job: Job):
+        await self.repository.write(OUTBOX_INSERT, id=job.id, type=job.type, payload=json.dumps(job.payload), lease_until=self.lease_until())
+
+    async def retry(self, job: Job, delay: float, error: str):
+        await self.repository.write(OUTBOX_RETRY, id=job.id, attempts=job.attempts, lease_until=self.lease_until(delay), error=error)
+
+    async def done(self, job: Job):
+        await self.repository.write(OUTBOX_DONE, id=job.id)
+
+    async def failed(self, job: Job, error: str):
+        await self.repository.write(OUTBOX_FAILED, id=job.id, attempts=job.attempts, error=error)
+
+    async def claim(self, limit: int) -> list[Job]:
+        records = await self.repository.write(OUTBOX_CLAIM, now=datetime.now().astimezone(), lease_until=self.lease_until(), limit=limit)
+        return [Job(record["type"], json.loads(record["payload"]), record["id"], record["attempts"]) for record in records]
+
+
+class JobRunner:
+    def __init__(
+        self,
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 60.0,
+        queue_size: int = 10_000,
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.queue_size = queue_size
+        self.handlers: dict[str, JobHandler] = {}
+        self.outbox: Outbox | None = None
+        self.queue: asyncio.Queue[Job] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.TimerHandle] = set()
+        self._running = 0
+
+    def handler(self, job_type: str):
+        def register(function: JobHandler) -> JobHandler:
+            self.handlers[job_type] = function
+            return function
+
+        return register
+
+    @property
+    def pending(self) -> int:
+        return (self.queue.qsize() if self.queue else 0) + len(self._retries) + self._running
+
+    def _update_pending(self):
+        JOBS_PENDING.set(self.pending)
+
+    async def enqueue(self, job_type: str, payload: dict) -> Job:
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type {job_type}")
+        if self.queue is None:
+            raise RuntimeError("Job runner is not running")
+
+        job = Job(job_type, payload)
+        if self.outbox is not None:
+            await self.outbox.add(job)
+        # Fila cheia: segura quem enfileira em vez de descartar o job
+        await self.queue.put(job)
+        self._update_pending()
+        return job
+
+    def every(self, job_type: str, interval: float, delay: float | None = None, payload: dict | None = None):
+        """Enfileira `job_type` a cada `interval` segundos (o primeiro depois de `delay`) até o runner parar"""
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type {job_type}")
+        if self.queue is None:
+            raise RuntimeError("Job runner is not running")
+        self._tasks.append(asyncio.create_task(self._every(job_type, interval, interval if delay is None else delay, payload or {})))
+
+    def start(self, outbox: Outbox | None = None, sweep_interval: float = 60.0):
+        if self._tasks:
+            return
+        self.outbox = outbox
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if outbox is not None:
+            self._tasks.append(asyncio.create_task(self._sweep(sweep_interval)))
+
+    async def stop(self, timeout: float = 10.0):
+        """Espera a fila esvaziar até `timeout` e cancela os workers; o que sobrar continua no outbox"""
+        if not self._tasks:
+            return
+
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self.queue.join(), timeout)
+
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.queue = None
+        self._update_pending()
+
+    async def _sweep(self, interval: float):
+        while True:
+            try:
+                for job in await self.outbox.claim(limit=self.queue_size // 2):
+                    if job.type in self.handlers:
+                        await self.queue.put(job)
+                    else:
+                        logger.warning("Job %s de tipo desconhecido %s ignorado", job.id, job.type)
+                self._update_pending()
+            except Exception:
+                logger.exception("Falha ao varrer o outbox de jobs")
+            await asyncio.sleep(interval)
+
+    async def _every(self, job_type: str, interval: float, delay: float, payload: dict):
+        await asyncio.sleep(delay)
+        while True:
+            try:
+                await self.enqueue(job_type, payload)
+            except Exception:
+                logger.exception("Falha ao agendar o job %s", job_type)
+            await asyncio.sleep(interval)
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            self._running += 1
+            try:
+                await self._run(job)
+            finally:
+                self._running -= 1
+                self.queue.task_done()
+                self._update_pending()
+
+    async def _run(self, job: Job):
+        job.attempts += 1
+        start = time.perf_counter()
+        try:
+            await self.handlers[job.type](job.payload)
+        except Exception as error:
+            JOB_DURATION.labels(job.type).observe(time.perf_counter() - start)
+            await self._fail(job, error)
+            return
+
+        JOB_DURATION.labels(job.type).observe(time.perf_counter() - start)
+        JOBS.labels(job.type, "done").inc()
+        if self.outbox is not None:
+            await self._outbox_call(self.outbox.done(job))
+
+    async def _fail(self, job: Job, error: Exception):
+        message = f"{error.__class__.__name__}: {error}"
+
+        if job.attempts >= self.max_attempts:
+            JOBS.labels(job.type, "failed").inc()
+            logger.error("Job %s (%s) falhou após %d tentativas: %s", job.id, job.type, job.attempts, message)
+            if self.outbox is not None:
+                await self._outbox_call(self.outbox.failed(job, message))
+            return
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_initial * 2 ** (job.attempts - 1)))
+        JOBS.labels(job.type, "retried").inc()
+        logger.warning("Job %s (%s) falhou (%s), nova tentativa em %.2fs", job.id, job.type, message, delay)
+        if self.outbox is not None:
+            await self._outbox_call(self.outbox.retry(job, delay, message))
+
+        self._schedule(job, delay)
+
+    def _schedule(self, job: Job, delay: float):
+        def requeue():
+            self._retries.discard(handle)
+            try:
+                self.queue.put_nowait(job)
+            except asyncio.QueueFull:
+                # Sem espaço agora: tenta de novo em seguida em vez de perder o job
+                self._schedule(job, self.backoff_initial)
+            self._update_pending()
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(handle)
+
+    async def _outbox_call(self, call: Awaitable):
+        try:
+            await call
+        except Exception:
+            # O job continua no outbox e volta na próxima varredura depois que o lease vencer
+            logger.exception("Falha ao atualizar o outbox de jobs")
+
+
+job_runner = JobRunner(workers=settings.JOBS_WORKERS, max_attempts=settings.JOBS_MAX_ATTEMPTS, queue_size=settings.JOBS_QUEUE_SIZE)
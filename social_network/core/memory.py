@@ -0,0 +1,368 @@
+"""
+Grafo em memória que implementa a parte da API dos modelos do OGM usada pelos routers.
+
+Selecionado com `GRAPH_BACKEND=memory`: o lifespan não conecta no Neo4j e passa a atender
+`find_one`/`find_many`/`count` (com o dialeto de filtros de `filter_user`/`filter_post` e os
+`$patterns` de `recomendations`), `create`/`update`/`delete`/`refresh`, `find_connected_nodes`
+e `connect`/`disconnect` das relações a partir deste grafo. Cada operação conta como uma consulta
+na instrumentação e pode simular a latência de rede com `MEMORY_QUERY_LATENCY_MS`.
+"""
+
+import asyncio
+import itertools
+import re
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from pyneo4j_ogm import NodeModel, RelationshipProperty
+
+from social_network.core.instrumentation import record_query
+
+INCOMING = "INCOMING"
+OUTGOING = "OUTGOING"
+BOTH = "BOTH"
+
+# Propriedades com índice de igualdade, como as constraints únicas do Neo4j
+INDEXED_PROPERTIES = ("uid", "username", "open_key")
+
+
+def relationship_type(model_name: str) -> str:
+    """Mesmo nome padrão que o OGM dá às relações: `LinkedTo` vira `LINKED_TO`"""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", model_name).upper()
+
+
+def _direction(direction) -> str:
+    return str(getattr(direction, "value", direction) or BOTH).upper()
+
+
+def _comparable(value):
+    return str(value) if isinstance(value, UUID) else value
+
+
+def _compare(operator, value, argument) -> bool:
+    if value is None:
+        return False
+    return operator(_comparable(value), _comparable(argument))
+
+
+OPERATORS = {
+    "$eq": lambda value, argument: _comparable(value) == _comparable(argument),
+    "$neq": lambda value, argument: _comparable(value) != _comparable(argument),
+    "$gt": lambda value, argument: _compare(lambda a, b: a > b, value, argument),
+    "$gte": lambda value, argument: _compare(lambda a, b: a >= b, value, argument),
+    "$lt": lambda value, argument: _compare(lambda a, b: a < b, value, argument),
+    "$lte": lambda value, argument: _compare(lambda a, b: a <= b, value, argument),
+    "$in": lambda value, argument: _comparable(value) in [_comparable(item) for item in argument],
+    "$nin": lambda value, argument: _comparable(value) not in [_comparable(item) for item in argument],
+    "$contains": lambda value, argument: value is not None and argument in value,
+    "$icontains": lambda value, argument: value is not None and str(argument).lower() in str(value).lower(),
+    "$startsWith": lambda value, argument: value is not None and str(value).startswith(argument),
+    "$endsWith": lambda value, argument: value is not None and str(value).endswith(argument),
+    "$exists": lambda value, argument: (value is not None) == argument,
+    "$regex": lambda value, argument: value is not None and re.fullmatch(argument, str(value)) is not None,
+}
+
+
+@dataclass
+class MemoryNode:
+    id: int
+    label: str
+    props: dict = field(default_factory=dict)
+
+
+class MemoryGraph:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.nodes: dict[int, MemoryNode] = {}
+        # nó -> tipo da relação -> vizinho -> quantidade de relações
+        self.outgoing: dict[int, dict[str, dict[int, int]]] = defaultdict(lambda: defaultdict(dict))
+        self.incoming: dict[int, dict[str, dict[int, int]]] = defaultdict(lambda: defaultdict(dict))
+        # (label, propriedade) -> valor -> nós
+        self.lookup: dict[tuple[str, str], dict] = defaultdict(lambda: defaultdict(set))
+        self._ids = itertools.count()
+
+    async def round_trip(self, shape: str):
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        record_query(shape, time.perf_counter() - start)
+
+    # Nós
+
+    def add_node(self, label: str, props: dict) -> int:
+        node_id = next(self._ids)
+        self.nodes[node_id] = MemoryNode(node_id, label, dict(props))
+        self._index(node_id)
+        return node_id
+
+    def update_node(self, node_id: int, props: dict):
+        self._unindex(node_id)
+        self.nodes[node_id].props.update(props)
+        self._index(node_id)
+
+    def _index(self, node_id: int):
+        node = self.nodes[node_id]
+        for name in INDEXED_PROPERTIES:
+            if node.props.get(name) is not None:
+                self.lookup[(node.label, name)][_comparable(node.props[name])].add(node_id)
+
+    def _unindex(self, node_id: int):
+        node = self.nodes[node_id]
+        for name in INDEXED_PROPERTIES:
+            if node.props.get(name) is not None:
+                self.lookup[(node.label, name)][_comparable(node.props[name])].discard(node_id)
+
+    def delete_node(self, node_id: int):
+        for adjacency, reverse in ((self.outgoing, self.incoming), (self.incoming, self.outgoing)):
+            for rel_type, neighbors in adjacency.pop(node_id, {}).items():
+                for neighbor in neighbors:
+                    reverse[neighbor][rel_type].pop(node_id, None)
+        if node_id in self.nodes:
+            self._unindex(node_id)
+            del self.nodes[node_id]
+
+    def project(self, node_id: int, fields: tuple[str, ...]) -> dict:
+        props = self.nodes[node_id].props
+        return {name: str(props[name]) if isinstance(props.get(name), UUID) else props.get(name) for name in fields}
+
+    # Relações
+
+    def connect(self, start: int, rel_type: str, end: int, allow_multiple: bool = False):
+        count = self.outgoing[start][rel_type].get(end, 0)
+        if count and not allow_multiple:
+            return
+        self.outgoing[start][rel_type][end] = count + 1
+        self.incoming[end][rel_type][start] = count + 1
+
+    def disconnect(self, start: int, rel_type: str, end: int):
+        self.outgoing[start][rel_type].pop(end, None)
+        self.incoming[end][rel_type].pop(start, None)
+
+    def neighbors(self, node_id: int, rel_type: str | None = None, direction: str = BOTH):
+        adjacencies = {OUTGOING: (self.outgoing,), INCOMING: (self.incoming,)}.get(direction, (self.outgoing, self.incoming))
+        for adjacency in adjacencies:
+            by_type = adjacency.get(node_id, {})
+            for current_type, neighbors in by_type.items():
+                if rel_type is None or current_type == rel_type:
+                    yield from list(neighbors)
+
+    def degree(self, node_id: int, rel_type: str, direction: str) -> int:
+        adjacency = self.incoming if direction == INCOMING else self.outgoing
+        return sum(adjacency.get(node_id, {}).get(rel_type, {}).values())
+
+    def walk(self, node_id: int, rel_type: str, direction: str):
+        """Percorre a árvore a partir do nó, retornando pares (pai, filho)"""
+        queue = deque([node_id])
+        seen = {node_id}
+        while queue:
+            parent = queue.popleft()
+            for child in self.neighbors(parent, rel_type, direction):
+                if child not in seen:
+                    seen.add(child)
+                    queue.append(child)
+                    yield parent, child
+
+    def traverse(self, node_id: int, rel_types: list[str] | None, direction: str, min_hops: int = 1, max_hops: int | None = None) -> list[int]:
+        found = []
+        seen = {node_id}
+        frontier = [node_id]
+        depth = 0
+        while frontier and (max_hops is None or depth < max_hops):
+            depth += 1
+            next_frontier = []
+            for current in frontier:
+                for rel_type in rel_types or [None]:
+                    for neighbor in self.neighbors(current, rel_type, direction):
+                        if neighbor not in seen:
+                            seen.add(neighbor)
+                            next_frontier.append(neighbor)
+                            if depth >= min_hops:
+                                found.append(neighbor)
+            frontier = next_frontier
+        return found
+
+    # Filtros
+
+    def find(self, label: str | None, filters: dict | None = None) -> list[int]:
+        filters = filters or {}
+        indexed = next((name for name in INDEXED_PROPERTIES if name in filters and not isinstance(filters[name], dict)), None)
+        if label is not None and indexed:
+            candidates = sorted(self.lookup[(label, indexed)].get(_comparable(filters[indexed]), ()))
+            return [node_id for node_id in candidates if self.match(node_id, filters)]
+        return [node.id for node in list(self.nodes.values()) if (label is None or node.label == label) and self.match(node.id, filters)]
+
+    def match(self, node_id: int, filters: dict) -> bool:
+        node = self.nodes[node_id]
+        for key, condition in filters.items():
+            if key == "$labels":
+                if any(label != node.label for label in condition):
+                    return False
+            elif key == "$id":
+                if node_id != condition:
+                    return False
+            elif key == "$elementId":
+                if f"memory:{node_id}" != condition:
+                    return False
+            elif key == "$patterns":
+                if not all(self.match_pattern(node_id, pattern) for pattern in condition):
+                    return False
+            elif key == "$and":
+                if not all(self.match(node_id, item) for item in condition):
+                    return False
+            elif key == "$or":
+                if not any(self.match(node_id, item) for item in condition):
+                    return False
+            elif key == "$not":
+                if self.match(node_id, condition):
+                    return False
+            elif key.startswith("$"):
+                continue
+            elif isinstance(condition, dict):
+                value = node.props.get(key)
+                if not all(OPERATORS[operator](value, argument) for operator, argument in condition.items()):
+                    return False
+            elif _comparable(node.props.get(key)) != _comparable(condition):
+                return False
+        return True
+
+    def match_pattern(self, node_id: int, pattern: dict) -> bool:
+        rel_type = pattern.get("$relationship", {}).get("$type")
+        node_filters = pattern.get("$node", {})
+        found = any(self.match(neighbor, node_filters) for neighbor in self.neighbors(node_id, rel_type, _direction(pattern.get("$direction"))))
+        return found == pattern.get("$exists", True)
+
+
+def _apply_options(node_ids: list[int], graph: MemoryGraph, options: dict | None) -> list[int]:
+    if not options:
+        return node_ids
+
+    sort = options.get("$sort")
+    if sort:
+        fields = [sort] if isinstance(sort, str) else list(sort)
+        node_ids = sorted(node_ids, key=lambda node_id: tuple(_comparable(graph.nodes[node_id].props.get(name)) for name in fields), reverse=options.get("$order") == "DESC")
+
+    skip = options.get("$skip") or 0
+    limit = options.get("$limit")
+    return node_ids[skip : skip + limit if limit is not None else None]
+
+
+class MemoryBackend:
+    """Substitui os métodos de acesso ao banco do OGM por operações no MemoryGraph"""
+
+    def __init__(self, graph: MemoryGraph, models: list[type[NodeModel]]):
+        self.graph = graph
+        self.models = {model.__name__: model for model in models}
+        self._originals = {}
+
+    def node_properties(self, instance: NodeModel) -> dict:
+        props = {}
+        for name in type(instance).model_fields:
+            value = getattr(instance, name, None)
+            if not isinstance(value, RelationshipProperty):
+                props[name] = value
+        return props
+
+    def inflate(self, node_id: int) -> NodeModel:
+        node = self.graph.nodes[node_id]
+        instance = self.models[node.label](**node.props)
+        instance._id = node_id
+        instance._element_id = f"memory:{node_id}"
+        return instance
+
+    def install(self):
+        backend = self
+        graph = self.graph
+
+        async def create(self):
+            await graph.round_trip(f"memory:create:{type(self).__name__}")
+            node_id = graph.add_node(type(self).__name__, backend.node_properties(self))
+            self._id = node_id
+            self._element_id = f"memory:{node_id}"
+            return self
+
+        async def update(self):
+            await graph.round_trip(f"memory:update:{type(self).__name__}")
+            graph.update_node(self._id, backend.node_properties(self))
+
+        async def delete(self):
+            await graph.round_trip(f"memory:delete:{type(self).__name__}")
+            graph.delete_node(self._id)
+            self._destroyed = True
+
+        async def refresh(self):
+            await graph.round_trip(f"memory:refresh:{type(self).__name__}")
+            for name, value in graph.nodes[self._id].props.items():
+                setattr(self, name, value)
+
+        async def find_one(cls, filters, *args, **kwargs):
+            await graph.round_trip(f"memory:find_one:{cls.__name__}")
+            node_ids = graph.find(cls.__name__, filters)
+            return backend.inflate(node_ids[0]) if node_ids else None
+
+        async def find_many(cls, filters=None, projections=None, options=None, *args, **kwargs):
+            await graph.round_trip(f"memory:find_many:{cls.__name__}")
+            return [backend.inflate(node_id) for node_id in _apply_options(graph.find(cls.__name__, filters), graph, options)]
+
+        async def count(cls, filters=None):
+            await graph.round_trip(f"memory:count:{cls.__name__}")
+            return len(graph.find(cls.__name__, filters))
+
+        async def find_connected_nodes(self, filters, projections=None, options=None, *args, **kwargs):
+            await graph.round_trip(f"memory:find_connected_nodes:{type(self).__name__}")
+            rel_types = [relationship.get("$type") for relationship in filters.get("$relationships", [])]
+            node_ids = graph.traverse(
+                self._id,
+                [rel_type for rel_type in rel_types if rel_type] or None,
+                _direction(filters.get("$direction")),
+                filters.get("$minHops", 1),
+                filters.get("$maxHops"),
+            )
+            node_ids = [node_id for node_id in node_ids if graph.match(node_id, filters.get("$node", {}))]
+            return [backend.inflate(node_id) for node_id in _apply_options(node_ids, graph, options)]
+
+        def endpoints(prop: RelationshipProperty, node: NodeModel):
+            source = prop._source_node
+            if _direction(prop._direction) == INCOMING:
+                return node._id, relationship_type(prop._relationship_model_name), source._id
+            return source._id, relationship_type(prop._relationship_model_name), node._id
+
+        async def connect(self, node, properties=None):
+            await graph.round_trip(f"memory:connect:{self._relationship_model_name}")
+            graph.connect(*endpoints(self, node), allow_multiple=getattr(self, "_allow_multiple", False))
+
+        async def disconnect(self, node):
+            await graph.round_trip(f"memory:disconnect:{self._relationship_model_name}")
+            graph.disconnect(*endpoints(self, node))
+
+        async def relationship_find_connected_nodes(self, filters=None, projections=None, options=None, *args, **kwargs):
+            await graph.round_trip(f"memory:find_connected_nodes:{self._relationship_model_name}")
+            node_ids = [
+                node_id
+                for node_id in graph.neighbors(self._source_node._id, relationship_type(self._relationship_model_name), _direction(self._direction))
+                if graph.nodes[node_id].label == self._target_model_name and graph.match(node_id, filters or {})
+            ]
+            return [backend.inflate(node_id) for node_id in _apply_options(node_ids, graph, options)]
+
+        patches = {
+            (NodeModel, "create"): create,
+            (NodeModel, "update"): update,
+            (NodeModel, "delete"): delete,
+            (NodeModel, "refresh"): refresh,
+            (NodeModel, "find_one"): classmethod(find_one),
+            (NodeModel, "find_many"): classmethod(find_many),
+            (NodeModel, "count"): classmethod(count),
+            (NodeModel, "find_connected_nodes"): find_connected_nodes,
+            (RelationshipProperty, "connect"): connect,
+            (RelationshipProperty, "disconnect"): disconnect,
+            (RelationshipProperty, "find_connected_nodes"): relationship_find_connected_nodes,
+        }
+        for (owner, name), function in patches.items():
+            self._originals[(owner, name)] = owner.__dict__[name]
+            setattr(owner, name, function)
+
+    def uninstall(self):
+        for (owner, name), function in self._originals.items():
+            setattr(owner, name, function)
+        self._originals.clear()
@@ -0,0 +1,361 @@
+"""
+Métricas no formato de exposição do Prometheus.
+
+Implementação própria e enxuta: toda atualização acontece na thread do event loop, então os
+contadores são simples somas em atributos, sem locks. As séries são criadas uma única vez
+(`labels` guarda os filhos num dicionário), e as rotas são pré-registradas no boot para que
+o caminho quente seja só um lookup e uma soma.
+
+Com vários workers (servidor de produção) cada processo tem o seu registro, e o /metrics cairia num
+worker qualquer a cada scrape. Com `METRICS_DIR` cada worker grava o seu estado em `<pid>.json` nesse
+diretório (a cada `METRICS_FLUSH_SECONDS` e no shutdown) e o /metrics soma contadores e histogramas
+de todos os arquivos, inclusive de workers que já saíram, para os contadores não voltarem. Gauges não
+somam: saem por worker, com o label `worker`, e só dos processos vivos. O diretório é limpo pelo
+servidor ao subir.
+"""
+
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+
+from social_network.settings import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def state(self):
+        return self.value
+
+    def merge(self, state):
+        self.value += state
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def state(self):
+        return [self.counts, self.sum, self.count]
+
+    def merge(self, state):
+        counts, total, count = state
+        self.counts = [mine + other for mine, other in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children = {}
+        if not labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def series(self) -> list[tuple[tuple[str, ...], object, str]]:
+        """(valores dos labels, filho, label extra) de cada série deste processo"""
+        return [(values, child, "") for values, child in list(self._children.items())]
+
+    def render(self, series: list | None = None) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child, extra in self.series() if series is None else series:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values, extra)} {child.value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def render(self, series: list | None = None) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child, extra in self.series() if series is None else series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts):
+                cumulative += count
+                le = ",".join(filter(None, (extra, f'le="{bound}"')))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values, extra)} {child.sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values, extra)} {child.count}")
+        return lines
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # PermissionError também significa que o processo existe
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+        # Diretório compartilhado pelos workers; None quando o processo responde só pelas próprias métricas
+        self.directory: str | None = None
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def collect(self):
+        for collect in self.collectors:
+            collect()
+
+    def dump(self):
+        """Grava o estado deste processo no diretório compartilhado"""
+        if self.directory is None:
+            return
+        self.collect()
+        state = {metric.name: [[list(values), child.state()] for values, child, _ in metric.series()] for metric in self.metrics}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(state, file)
+        os.replace(f"{path}.tmp", path)
+
+    def render(self) -> str:
+        if self.directory is not None:
+            self.dump()
+            return self.render_shared()
+        self.collect()
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+    def render_shared(self) -> str:
+        workers = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            with contextlib.suppress(OSError, ValueError), open(path) as file:
+                workers[int(os.path.basename(path).removesuffix(".json"))] = json.load(file)
+
+        lines = []
+        for metric in self.metrics:
+            if metric.kind == "gauge":
+                series = []
+                for pid, worker in sorted(workers.items()):
+                    if not process_alive(pid):
+                        continue
+                    for values, state in worker.get(metric.name, []):
+                        child = metric._new_child()
+                        child.set(state)
+                        series.append((tuple(values), child, f'worker="{pid}"'))
+                lines += metric.render(series)
+                continue
+
+            merged = {}
+            for worker in workers.values():
+                for values, state in worker.get(metric.name, []):
+                    child = merged.get(tuple(values))
+                    if child is None:
+                        child = merged[tuple(values)] = metric._new_child()
+                    child.merge(state)
+            lines += metric.render([(values, child, "") for values, child in merged.items()])
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram("http_request_duration_seconds", "Latência das requisições HTTP", ("method", "route")))
+REQUESTS = registry.register(Counter("http_requests_total", "Requisições HTTP finalizadas", ("method", "route", "status")))
+REQUESTS_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "Requisições HTTP em andamento", ("method",)))
+NEO4J_QUERIES = registry.register(Counter("neo4j_queries_total", "Consultas Cypher executadas"))
+NEO4J_QUERY_LATENCY = registry.register(Histogram("neo4j_query_duration_seconds", "Latência das consultas Cypher"))
+CACHE_REQUESTS = registry.register(Counter("cache_requests_total", "Consultas a caches em memória", ("cache", "result")))
+EVENT_LOOP_LAG = registry.register(Gauge("event_loop_lag_seconds", "Atraso do event loop na última medição"))
+NEO4J_POOL = registry.register(Gauge("neo4j_pool_connections", "Conexões do pool do Neo4j", ("state",)))
+NEO4J_POOL_WAIT = registry.register(Gauge("neo4j_pool_acquisition_wait_seconds", "Tempo de espera por uma conexão do pool", ("stat",)))
+
+UNMATCHED_ROUTE = "unmatched"
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def preregister_routes(routes):
+    """Cria de antemão as séries de cada rota para não alocar nada no caminho quente"""
+    for route in routes:
+        for method in getattr(route, "methods", None) or ():
+            REQUEST_LATENCY.labels(method, route.path)
+            REQUESTS_IN_FLIGHT.labels(method)
+            for status_class in STATUS_CLASSES:
+                REQUESTS.labels(method, route.path, status_class)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(method, route, STATUS_CLASSES[status_code // 100 - 1]).inc()
+
+
+class LoopLagMonitor:
+    """Mede o atraso do event loop comparando o tempo real de um `sleep` com o esperado"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            EVENT_LOOP_LAG.set(self.lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
+
+
+class MetricsFlusher:
+    """Grava as métricas do worker no diretório compartilhado a cada `interval`, para o /metrics de outro worker"""
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            registry.dump()
+
+    def start(self, directory: str | None):
+        if directory and self._task is None:
+            registry.share(directory)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            # O último estado fica no arquivo: os contadores deste worker continuam somando depois que ele sai
+            registry.dump()
+
+
+metrics_flusher = MetricsFlusher(settings.METRICS_FLUSH_SECONDS)
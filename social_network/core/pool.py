@@ -0,0 +1,101 @@
+import itertools
+import statistics
+import time
+from collections import deque
+
+from neo4j import AsyncDriver
+
+from social_network.core.metrics import NEO4J_POOL, NEO4J_POOL_WAIT, registry
+
+
+class PoolMonitor:
+    """Coleta uso do pool de conexões do driver e o tempo de espera para adquirir uma conexão"""
+
+    def __init__(self, window: int = 1024):
+        self.waits: deque[float] = deque(maxlen=window)
+        # (fim, espera) das aquisições recentes e início das que ainda estão esperando, para o controle de admissão
+        self.recent: deque[tuple[float, float]] = deque(maxlen=window)
+        self.pending: dict[int, float] = {}
+        self._ids = itertools.count()
+        self.acquisitions = 0
+        self.failures = 0
+        self._pool = None
+
+    def instrument(self, driver: AsyncDriver):
+        # O driver não expõe métricas do pool, então envolvemos o `acquire` do pool interno
+        pool = getattr(driver, "_pool", None)
+        if pool is None or pool is self._pool:
+            return
+
+        acquire = pool.acquire
+
+        async def timed_acquire(*args, **kwargs):
+            start = time.perf_counter()
+            acquisition = next(self._ids)
+            self.pending[acquisition] = start
+            try:
+                return await acquire(*args, **kwargs)
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                del self.pending[acquisition]
+                end = time.perf_counter()
+                self.acquisitions += 1
+                self.waits.append(end - start)
+                self.recent.append((end, end - start))
+
+        pool.acquire = timed_acquire
+        self._pool = pool
+
+    @property
+    def last_wait(self) -> float:
+        return self.waits[-1] if self.waits else 0.0
+
+    def current_wait(self, window: float = 1.0) -> float:
+        """Maior espera entre as aquisições dos últimos `window` segundos e as que ainda não terminaram"""
+        now = time.perf_counter()
+        recent = itertools.takewhile(lambda item: now - item[0] <= window, reversed(self.recent))
+        finished = max((wait for _, wait in recent), default=0.0)
+        waiting = now - min(self.pending.values()) if self.pending else 0.0
+        return max(finished, waiting)
+
+    def snapshot(self) -> dict:
+        in_use = idle = 0
+        max_size = None
+
+        if self._pool is not None:
+            max_size = getattr(getattr(self._pool, "pool_config", None), "max_connection_pool_size", None)
+            for connections in list(getattr(self._pool, "connections", {}).values()):
+                for connection in list(connections):
+                    if getattr(connection, "in_use", False):
+                        in_use += 1
+                    else:
+                        idle += 1
+
+        waits = sorted(self.waits)
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "max_size": max_size,
+            "acquisitions": self.acquisitions,
+            "failures": self.failures,
+            "wait_ms_avg": statistics.fmean(waits) * 1000 if waits else 0.0,
+            "wait_ms_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+            "wait_ms_max": waits[-1] * 1000 if waits else 0.0,
+        }
+
+
+pool_monitor = PoolMonitor()
+
+
+def collect_pool_metrics():
+    snapshot = pool_monitor.snapshot()
+    NEO4J_POOL.labels("in_use").set(snapshot["in_use"])
+    NEO4J_POOL.labels("idle").set(snapshot["idle"])
+    NEO4J_POOL_WAIT.labels("avg").set(snapshot["wait_ms_avg"] / 1000)
+    NEO4J_POOL_WAIT.labels("p95").set(snapshot["wait_ms_p95"] / 1000)
+    NEO4J_POOL_WAIT.labels("max").set(snapshot["wait_ms_max"] / 1000)
+
+
+registry.collectors.append(collect_pool_metrics)
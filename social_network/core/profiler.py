@@ -0,0 +1,228 @@
+"""
+Profiler por amostragem para requisições lentas.
+
+Uma thread acorda a cada `interval` e, para cada requisição em andamento, registra a pilha em que ela
+está: se a tarefa da requisição é a que está rodando no event loop, a pilha real da thread (código
+síncrono como validação do Pydantic entra aqui); se está suspensa, a cadeia de `await` até o ponto
+em que parou (consulta no driver do Neo4j, `to_thread` do argon2...). Cada amostra vale `interval` de
+tempo de parede da requisição.
+
+Para o custo ficar desprezível quando nada é capturado, a amostragem de uma requisição só começa
+depois de `start_after` segundos (requisições rápidas nunca são amostradas, só registradas num dict)
+e a thread dorme quando não há requisição candidata. Uma fração `sample_rate` das requisições é
+amostrada desde o início e guardada sempre; as outras são guardadas quando passam de `threshold`.
+Os últimos `size` perfis ficam num buffer circular, exportáveis como pilhas colapsadas
+(flamegraph.pl, speedscope) ou no JSON do speedscope.
+"""
+
+import asyncio
+import itertools
+import os
+import random
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from social_network.settings import settings
+
+# Rotas de longa duração não têm "latência" para comparar com o limite
+EXCLUDED_PATHS = ("/stream", "/metrics")
+
+# Prefixos removidos dos nomes de arquivo nas pilhas
+PREFIXES = (
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep,
+    sysconfig.get_paths()["stdlib"] + os.sep,
+)
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    started_at: datetime
+    task: asyncio.Task
+    root: object
+    thread_id: int
+    sampled: bool
+    start: float = field(default_factory=time.perf_counter)
+    duration: float = 0.0
+    status_code: int | None = None
+    samples: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common())
+
+    def speedscope(self, interval: float) -> dict:
+        frames: dict[str, int] = {}
+        samples = []
+        for stack, count in self.samples.items():
+            indexes = [frames.setdefault(name, len(frames)) for name in stack]
+            samples.extend([indexes] * count)
+        weight = round(interval * 1000, 3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.path}",
+            "exporter": "social_network",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": f"{self.method} {self.path} ({self.duration * 1000:.0f} ms)",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(len(samples) * weight, 3),
+                    "samples": samples,
+                    "weights": [weight] * len(samples),
+                }
+            ],
+        }
+
+
+def frame_of(awaitable):
+    for name in ("cr_frame", "gi_frame", "ag_frame"):
+        frame = getattr(awaitable, name, None)
+        if frame is not None:
+            return frame
+    return None
+
+
+def awaited_by(awaitable):
+    for name in ("cr_await", "gi_yieldfrom", "ag_await"):
+        if hasattr(awaitable, name):
+            return getattr(awaitable, name)
+    return None
+
+
+class SamplingProfiler:
+    def __init__(self, threshold: float = 1.0, sample_rate: float = 0.0, interval: float = 0.005, start_after: float = 0.05, size: int = 50):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.start_after = start_after
+        self.profiles: deque[RequestProfile] = deque(maxlen=size)
+        self.active: dict[int, RequestProfile] = {}
+        self._ids = itertools.count(1)
+        self._labels: dict[object, str] = {}
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # Requisições
+
+    def begin(self, method: str, path: str, root) -> RequestProfile:
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        profile = RequestProfile(next(self._ids), method, path, datetime.now(), asyncio.current_task(), root, threading.get_ident(), sampled)
+        self.active[profile.id] = profile
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+        return profile
+
+    def end(self, profile: RequestProfile, status_code: int | None):
+        del self.active[profile.id]
+        profile.duration = time.perf_counter() - profile.start
+        profile.status_code = status_code
+        profile.task = profile.root = None
+        if profile.samples and (profile.sampled or profile.duration >= self.threshold):
+            self.profiles.append(profile)
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+    # Amostragem
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            candidates = [profile for profile in list(self.active.values()) if profile.sampled or now - profile.start >= self.start_after]
+            if not candidates:
+                if not self.active:
+                    self._wake.clear()
+                continue
+
+            threads = sys._current_frames()
+            for profile in candidates:
+                stack = self._stack(profile, threads.get(profile.thread_id))
+                if stack:
+                    profile.samples[stack] += 1
+
+    def _stack(self, profile: RequestProfile, thread_frame) -> tuple[str, ...]:
+        root = profile.root
+        if root is None:
+            return ()
+
+        # Rodando agora: pilha real da thread do event loop, da raiz da requisição para baixo
+        frames = []
+        frame = thread_frame
+        while frame is not None and frame is not root:
+            frames.append(frame)
+            frame = frame.f_back
+        if frame is root:
+            frames.append(root)
+            return tuple(self._label(frame) for frame in reversed(frames))
+
+        # Suspensa: cadeia de awaits a partir da raiz
+        task = profile.task
+        if task is None or task.done():
+            return ()
+        stack = []
+        awaitable = task.get_coro()
+        while awaitable is not None:
+            frame = frame_of(awaitable)
+            if frame is None:
+                stack.append(f"<{type(awaitable).__name__}>")
+                break
+            if stack or frame is root:
+                stack.append(self._label(frame))
+            awaitable = awaited_by(awaitable)
+        return tuple(stack)
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            _, packages, filename = code.co_filename.rpartition("site-packages" + os.sep)
+            if not packages:
+                filename = next((filename.removeprefix(prefix) for prefix in PREFIXES if filename.startswith(prefix)), filename)
+            label = self._labels[code] = f"{code.co_qualname} ({filename})"
+        return label
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PATHS):
+            return await self.app(scope, receive, send)
+
+        status_code = None
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile = self.profiler.begin(scope["method"], scope["path"], sys._getframe())
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.end(profile, status_code)
+
+
+profiler = SamplingProfiler(
+    threshold=settings.PROFILER_THRESHOLD_MS / 1000,
+    sample_rate=settings.PROFILER_SAMPLE_RATE,
+    interval=settings.PROFILER_INTERVAL_MS / 1000,
+    start_after=settings.PROFILER_START_AFTER_MS / 1000,
+    size=settings.PROFILER_RING_SIZE,
+)
@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+import neo4j
+from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction
+
+from social_network.core.instrumentation import record_query
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class SessionContext:
+    access_mode: str
+    bookmark_manager: Any = None
+    # Quando (time.monotonic) o usuário fez a última requisição de escrita, para as leituras compartilhadas
+    wrote_at: float | None = None
+
+
+_session_context: ContextVar[SessionContext | None] = ContextVar("session_context", default=None)
+
+
+class BookmarkStore:
+    """Guarda um bookmark manager por usuário para leituras causalmente consistentes com as escritas dele"""
+
+    def __init__(self, max_sessions: int = 10_000):
+        self.max_sessions = max_sessions
+        self._managers: OrderedDict[str, Any] = OrderedDict()
+        self._written: dict[str, float] = {}
+
+    def get(self, key: str):
+        manager = self._managers.get(key)
+        if manager is None:
+            manager = AsyncGraphDatabase.bookmark_manager()
+            self._managers[key] = manager
+            if len(self._managers) > self.max_sessions:
+                evicted, _ = self._managers.popitem(last=False)
+                self._written.pop(evicted, None)
+        else:
+            self._managers.move_to_end(key)
+        return manager
+
+    def mark_write(self, key: str):
+        self._written[key] = time.monotonic()
+
+    def written_at(self, key: str) -> float | None:
+        return self._written.get(key)
+
+
+bookmark_store = BookmarkStore()
+
+
+def bind_session_context(key: str | None, method: str) -> SessionContext:
+    """Define o modo de acesso e os bookmarks das sessões abertas durante a requisição atual"""
+    context = SessionContext(
+        access_mode=neo4j.READ_ACCESS if method in READ_METHODS else neo4j.WRITE_ACCESS,
+        bookmark_manager=bookmark_store.get(key) if key else None,
+    )
+    if key:
+        if context.access_mode == neo4j.WRITE_ACCESS:
+            bookmark_store.mark_write(key)
+        context.wrote_at = bookmark_store.written_at(key)
+    _session_context.set(context)
+    return context
+
+
+def current_session_context() -> SessionContext | None:
+    return _session_context.get()
+
+
+def bind_shared_session_context():
+    """Leituras sem os bookmarks de nenhum usuário, para buscas compartilhadas entre requisições"""
+    _session_context.set(SessionContext(access_mode=neo4j.READ_ACCESS))
+
+
+def route_sessions(driver: AsyncDriver):
+    """Faz as sessões abertas pelo OGM herdarem o modo de acesso e os bookmarks da requisição"""
+    if getattr(driver.session, "routed", False):
+        return
+
+    session = driver.session
+
+    def routed_session(**config):
+        context = _session_context.get()
+        if context is not None:
+            config.setdefault("default_access_mode", context.access_mode)
+            if context.bookmark_manager is not None:
+                config.setdefault("bookmark_manager", context.bookmark_manager)
+        return session(**config)
+
+    routed_session.routed = True
+    driver.session = routed_session
+
+
+def where_clause(conditions: dict[str, str], filters: dict) -> str:
+    """WHERE só com as condições dos filtros informados; `$x IS NULL OR ...` impede o planner de usar índice"""
+    clauses = [condition for name, condition in conditions.items() if filters.get(name) is not None]
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+async def _fetch(tx: AsyncManagedTransaction, query: str, parameters: dict):
+    start = time.perf_counter()
+    try:
+        result = await tx.run(query, parameters)
+        return [record async for record in result]
+    finally:
+        record_query(query, time.perf_counter() - start)
+
+
+class GraphRepository:
+    """
+    Executa Cypher em transações gerenciadas: leituras via `execute_read` e escritas via `execute_write`.
+
+    O driver já repete a transação em erros transitórios por até `NEO_MAX_TRANSACTION_RETRY_SECONDS`; não há
+    outra camada de tentativas aqui, porque depois de um commit sem confirmação ela repetiria escritas que não
+    são idempotentes (um post criado duas vezes) e multiplicaria o tempo de uma requisição que vai falhar.
+    """
+
+    def __init__(self, driver: AsyncDriver):
+        self.driver = driver
+
+    async def read(self, query: str, **parameters):
+        return await self._execute(neo4j.READ_ACCESS, query, parameters)
+
+    async def write(self, query: str, **parameters):
+        return await self._execute(neo4j.WRITE_ACCESS, query, parameters)
+
+    async def _execute(self, access_mode: str, query: str, parameters: dict):
+        context = _session_context.get()
+        config = {"default_access_mode": access_mode}
+        if context is not None and context.bookmark_manager is not None:
+            config["bookmark_manager"] = context.bookmark_manager
+
+        async with self.driver.session(**config) as session:
+            if access_mode == neo4j.READ_ACCESS:
+                return await session.execute_read(_fetch, query, parameters)
+            return await session.execute_write(_fetch, query, parameters)
@@ -0,0 +1,90 @@
+"""
+Caminho rápido de serialização das respostas.
+
+Por padrão o FastAPI revalida o retorno contra o `response_model`, converte o modelo num dicionário
+JSON-compatível (`dump_python(mode="json")`) e só então o `JSONResponse` passa esse dicionário pelo
+`json.dumps`. Com `FAST_JSON_RESPONSES` ligado, quando a rota devolve uma instância do próprio
+`response_model` o modelo é serializado direto para bytes pelo serializador em Rust do Pydantic
+(um `TypeAdapter` por modelo, criado uma vez), sem a árvore intermediária e sem a segunda validação.
+
+Qualquer outro retorno (dicionários, `Response`, tipos diferentes do modelo) segue o caminho normal.
+"""
+
+import inspect
+from functools import cache, wraps
+from typing import Any, get_args, get_origin
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute, request_response
+from pydantic import BaseModel, TypeAdapter
+
+from social_network.settings import settings
+
+# Opções do response_model que o caminho rápido não reproduz
+RESPONSE_MODEL_OPTIONS = (
+    "response_model_include",
+    "response_model_exclude",
+    "response_model_exclude_unset",
+    "response_model_exclude_defaults",
+    "response_model_exclude_none",
+)
+
+
+@cache
+def type_adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSONResponse que serializa modelos Pydantic (ou listas deles) direto para bytes"""
+
+    def __init__(self, content: Any, annotation: Any = None, **kwargs):
+        self.annotation = annotation if annotation is not None else type(content)
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return type_adapter(self.annotation).dump_json(content)
+
+
+def model_instance_check(annotation: Any):
+    """Função que diz se um valor já é do tipo anotado (um modelo ou uma lista de modelos), ou None"""
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return lambda value: isinstance(value, annotation)
+
+    if get_origin(annotation) is list:
+        (item,) = get_args(annotation) or (None,)
+        if inspect.isclass(item) and issubclass(item, BaseModel):
+            return lambda value: isinstance(value, list) and all(isinstance(entry, item) for entry in value)
+
+    return None
+
+
+class FastJSONRoute(APIRoute):
+    """APIRoute que devolve PydanticJSONResponse quando o endpoint retorna o próprio response_model"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+
+        is_instance = model_instance_check(self.response_model)
+        uses_options = any(getattr(self, option, None) for option in RESPONSE_MODEL_OPTIONS)
+        if is_instance is None or uses_options or not inspect.iscoroutinefunction(endpoint) or self.dependant.response_param_name:
+            return
+
+        annotation = self.response_model
+        status_code = self.status_code
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        if response_class is not JSONResponse:
+            return
+
+        @wraps(endpoint)
+        async def fast_endpoint(*args, **kwargs):
+            content = await endpoint(*args, **kwargs)
+            if not settings.FAST_JSON_RESPONSES or isinstance(content, Response) or not is_instance(content):
+                return content
+            return PydanticJSONResponse(content, annotation, status_code=status_code or 200)
+
+        self.dependant.call = fast_endpoint
+        self.app = request_response(self.get_route_handler())
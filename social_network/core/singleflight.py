@@ -0,0 +1,101 @@
+"""
+Single-flight: leituras idênticas e simultâneas compartilham uma única busca no banco.
+
+O primeiro pedido de uma chave inicia a busca numa tarefa própria; quem chega com a mesma chave
+enquanto ela está em andamento só espera o mesmo resultado (ou a mesma exceção). Nada fica guardado
+depois que a busca termina, então isso não é um cache: o próximo pedido busca de novo.
+
+Cada espera tem seu próprio `timeout` e pode ser cancelada (cliente desconectou) sem afetar as outras;
+a busca só é cancelada quando não sobra ninguém esperando por ela. O resultado é o mesmo objeto para
+todos, então quem recebe não deve alterá-lo.
+
+A busca roda sem os bookmarks de quem a iniciou e conta as próprias consultas; ao receber o resultado,
+cada espera soma essas consultas às da sua requisição (o Server-Timing mostra tudo de que ela dependeu,
+embora o banco só tenha visto uma vez). Quem fez uma requisição de escrita há menos de `after_write`
+segundos não pega carona: uma busca iniciada antes do commit não veria a escrita, então ele busca sozinho
+com os próprios bookmarks.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from social_network.core.instrumentation import QueryStats, bind_query_stats, current_query_stats
+from social_network.core.metrics import Counter, Histogram, record_cache, registry
+from social_network.core.repository import bind_shared_session_context, current_session_context
+
+SINGLEFLIGHT_COALESCED = registry.register(Counter("singleflight_coalesced_total", "Esperas atendidas por uma busca já em andamento", ("name",)))
+SINGLEFLIGHT_TIMEOUTS = registry.register(Counter("singleflight_timeouts_total", "Esperas que passaram do timeout", ("name",)))
+SINGLEFLIGHT_BYPASSED = registry.register(Counter("singleflight_bypassed_total", "Leituras feitas sozinhas porque o usuário acabou de escrever", ("name",)))
+SINGLEFLIGHT_WAITERS = registry.register(Histogram("singleflight_waiters", "Esperas atendidas por cada busca", ("name",), buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)))
+
+
+@dataclass
+class Flight:
+    task: asyncio.Task
+    stats: QueryStats
+    waiters: int = 0
+    total: int = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: float = 10.0, after_write: float = 10.0):
+        self.name = name
+        self.timeout = timeout
+        self.after_write = after_write
+        self.flights: dict[Hashable, Flight] = {}
+
+    def wrote_recently(self) -> bool:
+        session = current_session_context()
+        return session is not None and session.wrote_at is not None and time.monotonic() - session.wrote_at < self.after_write
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self.wrote_recently():
+            SINGLEFLIGHT_BYPASSED.labels(self.name).inc()
+            return await load()
+
+        flight = self.flights.get(key)
+        record_cache(self.name, flight is not None)
+        if flight is None:
+            # Tarefa própria: cancelar o primeiro pedido não derruba a busca dos outros. O contexto dela não é
+            # o de quem chegou primeiro: sem os bookmarks dele e com as consultas contadas à parte
+            stats = QueryStats()
+            context = contextvars.copy_context()
+            context.run(bind_shared_session_context)
+            context.run(bind_query_stats, stats)
+            flight = Flight(asyncio.create_task(load(), context=context), stats)
+            self.flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+        else:
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+
+        flight.waiters += 1
+        flight.total += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight.task), self.timeout)
+        except TimeoutError:
+            SINGLEFLIGHT_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Sai do mapa já, para um pedido novo não pegar carona numa busca sendo cancelada
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                flight.task.cancel()
+
+        stats = current_query_stats()
+        if stats is not None:
+            stats.merge(flight.stats)
+        return result
+
+    def _finish(self, key: Hashable, flight: Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        SINGLEFLIGHT_WAITERS.labels(self.name).observe(flight.total)
+        # A exceção já foi repassada para quem esperava; isso evita o aviso de exceção não lida
+        if not flight.task.cancelled():
+            flight.task.exception()
@@ -1,7 +1,9 @@
 import asyncio
 from contextlib import asynccontextmanager
+import itertools
 import logging
-from fastapi import Depends, FastAPI, HTTPException, status
+import random
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from jwt import InvalidTokenError
 import neo4j
 import neo4j.exceptions
@@ -10,6 +12,18 @@ from pyneo4j_ogm import Pyneo4jClient
 
 from social_network.auth.auth_bearer import JWTBearer
 from social_network.auth.auth_handler import decode_jwt
+from social_network.core.broker import broker, create_backend
+from social_network.core.indexes import bootstrap_schema
+from social_network.core.instrumentation import instrument_client
+from social_network.core.jobs import Outbox, job_runner
+from social_network.core.memory import MemoryBackend, MemoryGraph
+from social_network.core.metrics import loop_lag_monitor, metrics_flusher
+from social_network.core.pool import pool_monitor
+from social_network.graph.communities import community_detector
+from social_network.graph.influence import influence_ranker
+from social_network.graph.snapshot import follow_snapshot
+from social_network.notifications.aggregator import notification_aggregator
+from social_network.core.repository import GraphRepository, bind_session_context, route_sessions
 from social_network.posts.models import Comments, LinkedTo, Owns, Post
 from social_network.settings import settings
 from social_network.users.models import Disliked, Following, Liked, User
@@ -18,7 +32,15 @@ from social_network.users.models import Disliked, Following, Liked, User
 logger = logging.getLogger(__name__)
 
 
-async def get_current_user(token: str = Depends(JWTBearer())) -> User:
+def get_repository_for(client: Pyneo4jClient) -> GraphRepository:
+    return GraphRepository(client._driver)
+
+
+def get_repository(request: Request) -> GraphRepository:
+    return get_repository_for(request.app.state.neo4j_client)
+
+
+async def get_current_user(request: Request, token: str = Depends(JWTBearer())) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,31 +57,138 @@ async def get_current_user(token: str = Depends(JWTBearer())) -> User:
     if not username:
         raise credentials_exception
 
-    user = await User.find_one({"username": username}, auto_fetch_nodes=True)
+    bind_session_context(username, request.method)
+
+    user = await User.find_one({"username": username})
     if not user:
         raise credentials_exception
     return user
 
+
+async def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    if user.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+
+MODELS = [User, Post, Owns, Comments, Following, LinkedTo, Liked, Disliked]
+
+
+def backoff_delays(initial: float, maximum: float):
+    """Esperas com backoff exponencial e jitter completo, para os workers não retentarem todos juntos"""
+    delay = initial
+    while True:
+        yield random.uniform(0, delay)
+        delay = min(delay * 2, maximum)
+
+
 async def try_to_connect_neo4j(client: Pyneo4jClient):
-    error_ocurred = False
-    while not client.is_connected or error_ocurred:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.NEO_CONNECT_TIMEOUT
+    delays = backoff_delays(settings.NEO_CONNECT_BACKOFF_INITIAL, settings.NEO_CONNECT_BACKOFF_MAX)
+
+    for attempt in itertools.count(1):
         try:
-            client = await client.connect(uri=settings.neo4j_url, auth=("neo4j", settings.NEO_PASSWORD))
-            await client.register_models([User, Post, Owns, Comments, Following, LinkedTo, Liked, Disliked])
-            print(f"✅ Servidor Neo4j {settings.neo4j_url} conectado com sucesso")
-            error_ocurred = False
-        except neo4j.exceptions.ServiceUnavailable:
-            print("❌ Servidor Neo4j momentaneamente indisponível, retentando conexão...")
-            error_ocurred = True
-            await asyncio.sleep(1)
-            continue
+            # Constraints e índices ficam com o bootstrap_schema, que pula tudo quando o schema não mudou
+            await client.connect(
+                uri=settings.neo4j_url,
+                auth=("neo4j", settings.NEO_PASSWORD),
+                skip_constraints=True,
+                skip_indexes=True,
+                **settings.neo4j_driver_options,
+            )
+            break
+        except (neo4j.exceptions.ServiceUnavailable, OSError) as error:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise RuntimeError(f"Neo4j at {settings.neo4j_url} unavailable after {attempt} attempts") from error
+            delay = min(next(delays), remaining)
+            print(f"❌ Servidor Neo4j momentaneamente indisponível, nova tentativa em {delay:.2f}s...")
+            await asyncio.sleep(delay)
+
+    pool_monitor.instrument(client._driver)
+    route_sessions(client._driver)
+    instrument_client(client)
+    await client.register_models(MODELS)
+    await bootstrap_schema(client, MODELS, force=settings.NEO_FORCE_SCHEMA_BOOTSTRAP)
+    print(f"✅ Servidor Neo4j {settings.neo4j_url} conectado com sucesso")
+
+
+def start_notifications(app: FastAPI):
+    # Importado aqui porque o repositório de notificações depende deste módulo
+    from social_network.notifications.repository import get_notification_repository_for
+
+    notification_aggregator.start(get_notification_repository_for(app))
+
+
+def start_tombstone_pruning(app: FastAPI):
+    # Importado aqui pelo mesmo motivo: o repositório do /sync depende deste módulo
+    from social_network.sync.repository import get_sync_repository_for, tombstone_pruner
+
+    tombstone_pruner.start(get_sync_repository_for(app))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.GRAPH_BACKEND == "memory":
+        async with memory_lifespan(app):
+            yield
+        return
+
     client = Pyneo4jClient()
+    app.state.neo4j_client = client
     await try_to_connect_neo4j(client)
-    yield
-    await client.close()
+    loop_lag_monitor.start()
+    metrics_flusher.start(settings.METRICS_DIR)
+    outbox = Outbox(get_repository_for(client), lease=settings.JOBS_LEASE_SECONDS) if settings.JOBS_OUTBOX else None
+    job_runner.start(outbox, sweep_interval=settings.JOBS_SWEEP_INTERVAL_SECONDS)
+    start_notifications(app)
+    start_tombstone_pruning(app)
+    influence_ranker.start(app)
+    community_detector.start(app)
+    await broker.start(create_backend())
+    follow_snapshot.start(app)
+    try:
+        yield
+    finally:
+        # O uvicorn só chega aqui depois de drenar as requisições em andamento
+        await follow_snapshot.stop()
+        await broker.stop()
+        await notification_aggregator.stop()
+        await job_runner.stop(settings.JOBS_SHUTDOWN_TIMEOUT_SECONDS)
+        await loop_lag_monitor.stop()
+        await metrics_flusher.stop()
+        await client.close()
+        print("👋 Conexão com o Neo4j encerrada")
+
+
+@asynccontextmanager
+async def memory_lifespan(app: FastAPI):
+    graph = MemoryGraph(latency=settings.MEMORY_QUERY_LATENCY_MS / 1000)
+    backend = MemoryBackend(graph, [User, Post])
+    backend.install()
+    app.state.neo4j_client = None
+    app.state.memory_graph = graph
+    print("🧪 Usando o grafo em memória (GRAPH_BACKEND=memory)")
+    loop_lag_monitor.start()
+    metrics_flusher.start(settings.METRICS_DIR)
+    job_runner.start()
+    start_notifications(app)
+    start_tombstone_pruning(app)
+    influence_ranker.start(app)
+    community_detector.start(app)
+    await broker.start()
+    follow_snapshot.start(app)
+    try:
+        yield
+    finally:
+        await follow_snapshot.stop()
+        await broker.stop()
+        await notification_aggregator.stop()
+        await job_runner.stop(settings.JOBS_SHUTDOWN_TIMEOUT_SECONDS)
+        await loop_lag_monitor.stop()
+        await metrics_flusher.stop()
+        backend.uninstall()
 
 
    
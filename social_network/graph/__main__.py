@@ -0,0 +1,56 @@
+"""
+Jobs de grafo sob demanda, fora do agendamento da API (cron, primeira carga):
+
+    python -m social_network.graph influence
+    python -m social_network.graph communities [--full]
+    python -m social_network.graph snapshot
+"""
+
+import argparse
+import asyncio
+import logging
+
+from pyneo4j_ogm import Pyneo4jClient
+
+from social_network.core.repository import GraphRepository
+from social_network.dependencies import try_to_connect_neo4j
+from social_network.graph.communities import community_detector
+from social_network.graph.influence import influence_ranker
+from social_network.graph.repository import FollowGraphRepository
+from social_network.graph.snapshot import follow_snapshot
+from social_network.settings import settings
+
+
+async def run(args) -> int | None:
+    client = Pyneo4jClient()
+    await try_to_connect_neo4j(client)
+    try:
+        repository = GraphRepository(client._driver)
+        graph_repository = FollowGraphRepository(repository, settings.GRAPH_PAGE_SIZE, settings.GRAPH_WRITE_BATCH_SIZE)
+        if args.command == "influence":
+            return await influence_ranker.refresh(graph_repository, force=True)
+        if args.command == "communities":
+            return await community_detector.refresh(graph_repository, force=True, full=args.full)
+        if args.command == "snapshot":
+            return await follow_snapshot.build(graph_repository, force=True)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m social_network.graph")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("influence", help="recalcula o PageRank dos follows e grava em User.influence")
+    communities = commands.add_parser("communities", help="atualiza as comunidades dos usuários em User.community")
+    communities.add_argument("--full", action="store_true", help="recalcula o grafo inteiro em vez de só o que mudou")
+    commands.add_parser("snapshot", help="grava o snapshot dos follows em GRAPH_SNAPSHOT_PATH")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    users = asyncio.run(run(args))
+    print(f"{users} usuários atualizados")
+
+
+if __name__ == "__main__":
+    main()
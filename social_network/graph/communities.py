@@ -0,0 +1,174 @@
+"""
+Comunidades dos usuários ("seu círculo"): propagação de rótulos periódica sobre o grafo de follows.
+
+A cada `COMMUNITY_REFRESH_SECONDS` o job `graph.communities` lê os follows para o CSR e compara com o grafo
+da execução anterior, guardado junto com os rótulos em `COMMUNITY_STATE_PATH`. Só os usuários novos e os
+que ganharam ou perderam follows são reavaliados, a mudança só se espalha para os vizinhos de quem trocou
+de comunidade, e só quem trocou é gravado em `User.community`.
+
+O lease é do cluster, mas o estado fica no disco de quem rodou. Cada rodada grava um id novo no nó `Lease`
+antes de escrever os rótulos e o mesmo id no arquivo; se eles não batem (outra máquina rodou desde então,
+ou a rodada daqui falhou no meio), o arquivo não descreve mais o que está no banco e o grafo inteiro é
+recalculado, como na primeira execução ou com mudanças demais (`COMMUNITY_FULL_FRACTION`).
+
+    python -m social_network.graph communities [--full]
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from fastapi import FastAPI
+
+from social_network.core.jobs import job_runner
+from social_network.graph.csr import FollowGraph
+from social_network.graph.influence import GRAPH_JOB_LAST_RUN, GRAPH_JOB_USERS
+from social_network.graph.labelprop import changed_users, label_propagation, match_users
+from social_network.graph.snapshot import UID_DTYPE
+from social_network.settings import settings
+
+if TYPE_CHECKING:
+    from social_network.graph.repository import FollowGraphRepository
+
+logger = logging.getLogger(__name__)
+
+COMMUNITY_JOB = "graph.communities"
+
+
+@dataclass
+class Communities:
+    labels: np.ndarray
+    # Usuários cujo rótulo precisa ser gravado
+    changed: np.ndarray
+    incremental: bool
+
+
+def load_state(path: str, version: str | None) -> tuple[FollowGraph, np.ndarray] | None:
+    """Grafo e rótulos da última rodada desta máquina, se ela também foi a última a gravar no banco"""
+    try:
+        with np.load(path) as state:
+            if version is None or "version" not in state.files or state["version"].item() != version:
+                logger.info("Estado das comunidades em %s é de outra rodada; recalculando tudo", path)
+                return None
+            uids = [uid.decode() for uid in state["uids"].tolist()]
+            return FollowGraph(uids, state["offsets"], state["targets"]), state["labels"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError):
+        logger.exception("Estado das comunidades ilegível em %s; recalculando tudo", path)
+        return None
+
+
+def save_state(path: str, graph: FollowGraph, labels: np.ndarray, version: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        np.savez(file, uids=np.array(graph.uids, dtype=UID_DTYPE), offsets=graph.offsets, targets=graph.targets, labels=labels, version=np.array(version))
+    os.replace(temporary, path)
+
+
+def detect(graph: FollowGraph, previous: tuple[FollowGraph, np.ndarray] | None, max_iterations: int = 20, full_fraction: float = 0.25) -> Communities:
+    if previous is not None:
+        previous_graph, previous_labels = previous
+        mapping = match_users(previous_graph, graph)
+        active = changed_users(previous_graph, graph, mapping)
+        if active.sum() <= full_fraction * graph.size:
+            labels = np.full(graph.size, -1, dtype=np.int64)
+            labels[mapping[mapping >= 0]] = previous_labels[mapping >= 0]
+            # Usuários novos e quem ficou sem follows começam numa comunidade só sua, com id ainda não usado
+            isolated = active & (graph.out_degree == 0) & (np.bincount(graph.targets, minlength=graph.size) == 0)
+            fresh = (labels < 0) | isolated
+            labels[fresh] = previous_labels.max(initial=-1) + 1 + np.arange(fresh.sum())
+            before = labels.copy()
+            labels = label_propagation(graph, labels, active, max_iterations)
+            return Communities(labels, (labels != before) | fresh, incremental=True)
+
+    labels = label_propagation(graph, max_iterations=max_iterations)
+    return Communities(labels, np.ones(graph.size, dtype=bool), incremental=False)
+
+
+def count_distinct(labels: np.ndarray) -> int:
+    # sort + comparação com o vizinho; np.unique é bem mais lento nestes tamanhos
+    labels = np.sort(labels)
+    return int(len(labels) and np.count_nonzero(labels[1:] != labels[:-1]) + 1)
+
+
+class CommunityDetector:
+    def __init__(self, state_path: str, interval: float = 86400.0, max_iterations: int = 20, full_fraction: float = 0.25):
+        self.state_path = state_path
+        self.interval = interval
+        self.max_iterations = max_iterations
+        self.full_fraction = full_fraction
+        self.app: FastAPI | None = None
+        self._running = False
+
+    def start(self, app: FastAPI):
+        self.app = app
+        if self.interval > 0:
+            job_runner.every(COMMUNITY_JOB, self.interval, delay=min(self.interval, 30.0))
+
+    async def refresh(self, repository: "FollowGraphRepository | None" = None, force: bool = False, full: bool = False) -> int | None:
+        """Atualiza as comunidades; retorna quantos usuários foram gravados, ou None se a rodada é de outro processo"""
+        # Importado aqui porque o repositório do grafo depende do módulo de dependências, que importa este
+        from social_network.graph.repository import get_follow_graph_repository_for
+
+        if self._running:
+            return None
+        self._running = True
+        try:
+            repository = repository or get_follow_graph_repository_for(self.app)
+            if not force and not await repository.claim(COMMUNITY_JOB, self.interval * 0.9):
+                return None
+
+            try:
+                start = time.perf_counter()
+                graph = await repository.load()
+                previous = None if full else await asyncio.to_thread(load_state, self.state_path, await repository.version(COMMUNITY_JOB))
+                loaded = time.perf_counter()
+                communities = await asyncio.to_thread(detect, graph, previous, self.max_iterations, self.full_fraction)
+                detected = time.perf_counter()
+                changed = np.flatnonzero(communities.changed)
+                # A versão muda antes da escrita: se ela falhar no meio, nenhum arquivo bate e a próxima rodada é completa
+                version = uuid.uuid4().hex
+                await repository.set_version(COMMUNITY_JOB, version)
+                await repository.write("community", [graph.uids[index] for index in changed], communities.labels[changed].tolist())
+                await asyncio.to_thread(save_state, self.state_path, graph, communities.labels, version)
+            except Exception:
+                # Devolve o lease para a nova tentativa do JobRunner não esperar ele vencer
+                if not force:
+                    await repository.release(COMMUNITY_JOB)
+                raise
+        finally:
+            self._running = False
+
+        logger.info(
+            "Comunidades (%s): %d usuários, %d comunidades, %d gravados; leitura %.1fs, cálculo %.1fs, escrita %.1fs",
+            "incremental" if communities.incremental else "completo",
+            graph.size,
+            count_distinct(communities.labels),
+            len(changed),
+            loaded - start,
+            detected - loaded,
+            time.perf_counter() - detected,
+        )
+        GRAPH_JOB_LAST_RUN.labels(COMMUNITY_JOB).set(time.time())
+        GRAPH_JOB_USERS.labels(COMMUNITY_JOB).set(len(changed))
+        return len(changed)
+
+
+community_detector = CommunityDetector(
+    settings.COMMUNITY_STATE_PATH,
+    interval=settings.COMMUNITY_REFRESH_SECONDS,
+    max_iterations=settings.COMMUNITY_MAX_ITERATIONS,
+    full_fraction=settings.COMMUNITY_FULL_FRACTION,
+)
+
+
+@job_runner.handler(COMMUNITY_JOB)
+async def refresh_communities(payload: dict):
+    await community_detector.refresh()
@@ -0,0 +1,61 @@
+"""
+Grafo de follows em CSR (compressed sparse row) sobre arrays do NumPy.
+
+Cada usuário ganha um índice denso 0..n-1 e `targets[offsets[i]:offsets[i + 1]]` são os índices de
+quem o usuário i segue, em ordem crescente. Custa 8 bytes por usuário e 4 por follow, sem nenhum
+objeto Python por aresta, e a vizinhança de um usuário é uma fatia do array.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class FollowGraph:
+    uids: list[str]
+    offsets: np.ndarray
+    targets: np.ndarray
+    _index: dict[str, int] | None = field(default=None, repr=False)
+
+    @classmethod
+    def from_edges(cls, uids: list[str], sources: np.ndarray, targets: np.ndarray) -> "FollowGraph":
+        """Monta o CSR a partir de pares (seguidor, seguido) em índices densos, em qualquer ordem"""
+        size = len(uids)
+        # Ordena por (seguidor, seguido) e descarta follows repetidos e de si mesmo; sort + comparação
+        # com o vizinho em vez de np.unique, que em arrays grandes chega a ser dezenas de vezes mais lento
+        keys = np.sort(sources.astype(np.int64) * size + targets)
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = keys[1:] != keys[:-1]
+        sources, targets = np.divmod(keys[keep], size)
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+        return cls(uids, offsets, targets.astype(np.int32))
+
+    @property
+    def size(self) -> int:
+        return len(self.uids)
+
+    @property
+    def edges(self) -> int:
+        return len(self.targets)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def reversed(self) -> "FollowGraph":
+        """O mesmo grafo com as arestas invertidas: a faixa de cada usuário passa a ser a dos seguidores"""
+        sources = np.repeat(np.arange(self.size, dtype=np.int32), self.out_degree)
+        return FollowGraph.from_edges(self.uids, self.targets, sources)
+
+    def index(self, uid: str) -> int | None:
+        if self._index is None:
+            self._index = {uid: index for index, uid in enumerate(self.uids)}
+        return self._index.get(uid)
+
+    def following(self, index: int) -> np.ndarray:
+        return self.targets[self.offsets[index] : self.offsets[index + 1]]
@@ -0,0 +1,100 @@
+"""
+Influência dos usuários: PageRank periódico sobre o grafo de follows.
+
+A cada `INFLUENCE_REFRESH_SECONDS` o job `graph.influence` exporta os follows para o CSR, roda o PageRank
+numa thread (o event loop segue atendendo) e grava o resultado em `User.influence` em lotes. Com vários
+workers ou réplicas só quem pega o lease no Neo4j roda naquele período; os outros pulam.
+
+    python -m social_network.graph influence
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from fastapi import FastAPI
+
+from social_network.core.jobs import job_runner
+from social_network.core.metrics import Gauge, registry
+from social_network.graph.pagerank import pagerank
+from social_network.settings import settings
+
+if TYPE_CHECKING:
+    from social_network.graph.repository import FollowGraphRepository
+
+logger = logging.getLogger(__name__)
+
+INFLUENCE_JOB = "graph.influence"
+
+GRAPH_JOB_LAST_RUN = registry.register(Gauge("graph_job_last_run_timestamp_seconds", "Fim da última execução de cada job de grafo", ("job",)))
+GRAPH_JOB_USERS = registry.register(Gauge("graph_job_users", "Usuários processados na última execução de cada job de grafo", ("job",)))
+
+
+class InfluenceRanker:
+    def __init__(self, interval: float = 3600.0, damping: float = 0.85, tolerance: float = 1e-5, max_iterations: int = 100):
+        self.interval = interval
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.app: FastAPI | None = None
+        self._running = False
+
+    def start(self, app: FastAPI):
+        self.app = app
+        if self.interval > 0:
+            # Primeira rodada logo depois do boot; o lease evita que um restart repita uma rodada recente
+            job_runner.every(INFLUENCE_JOB, self.interval, delay=min(self.interval, 30.0))
+
+    async def refresh(self, repository: "FollowGraphRepository | None" = None, force: bool = False) -> int | None:
+        """Recalcula e grava a influência de todos os usuários; retorna quantos, ou None se a rodada é de outro processo"""
+        # Importado aqui porque o repositório do grafo depende do módulo de dependências, que importa este
+        from social_network.graph.repository import get_follow_graph_repository_for
+
+        if self._running:
+            return None
+        self._running = True
+        try:
+            repository = repository or get_follow_graph_repository_for(self.app)
+            if not force and not await repository.claim(INFLUENCE_JOB, self.interval * 0.9):
+                return None
+
+            try:
+                start = time.perf_counter()
+                graph = await repository.load()
+                loaded = time.perf_counter()
+                scores = await asyncio.to_thread(pagerank, graph, self.damping, self.tolerance, self.max_iterations)
+                ranked = time.perf_counter()
+                await repository.write("influence", graph.uids, scores.round(6).tolist())
+            except Exception:
+                # Com o lease preso até vencer, as novas tentativas do JobRunner sairiam sem fazer nada
+                if not force:
+                    await repository.release(INFLUENCE_JOB)
+                raise
+        finally:
+            self._running = False
+
+        logger.info(
+            "Influência: %d usuários, %d follows; leitura %.1fs, PageRank %.1fs, escrita %.1fs",
+            graph.size,
+            graph.edges,
+            loaded - start,
+            ranked - loaded,
+            time.perf_counter() - ranked,
+        )
+        GRAPH_JOB_LAST_RUN.labels(INFLUENCE_JOB).set(time.time())
+        GRAPH_JOB_USERS.labels(INFLUENCE_JOB).set(graph.size)
+        return graph.size
+
+
+influence_ranker = InfluenceRanker(
+    interval=settings.INFLUENCE_REFRESH_SECONDS,
+    damping=settings.INFLUENCE_DAMPING,
+    tolerance=settings.INFLUENCE_TOLERANCE,
+    max_iterations=settings.INFLUENCE_MAX_ITERATIONS,
+)
+
+
+@job_runner.handler(INFLUENCE_JOB)
+async def refresh_influence(payload: dict):
+    await influence_ranker.refresh()
@@ -0,0 +1,112 @@
+"""
+Comunidades por propagação de rótulos sobre o CSR dos follows, tratado como não direcionado.
+
+Cada usuário começa com um rótulo e, a cada rodada, adota o rótulo mais comum entre os vizinhos (quem
+ele segue e quem o segue; um follow mútuo conta dois). A rodada é vetorizada: os pares (usuário, rótulo
+do vizinho) viram uma chave int64, são ordenados uma vez e contados por vizinhança, sem laço Python por
+usuário. Só metade dos usuários, sorteada, muda de rótulo por rodada: com a atualização síncrona pura
+os rótulos oscilam sem convergir em grafos bipartidos.
+
+Depois da primeira rodada só são reavaliados os vizinhos de quem mudou de rótulo. Na execução incremental
+a propagação parte dos usuários cujas vizinhanças mudaram; os demais mantêm o rótulo da execução
+anterior até que uma mudança chegue até eles.
+"""
+
+import numpy as np
+
+from social_network.graph.csr import FollowGraph
+
+
+def undirected_edges(graph: FollowGraph) -> tuple[np.ndarray, np.ndarray]:
+    sources = np.repeat(np.arange(graph.size, dtype=np.int32), graph.out_degree)
+    return np.concatenate((sources, graph.targets)), np.concatenate((graph.targets, sources))
+
+
+def label_propagation(
+    graph: FollowGraph,
+    labels: np.ndarray | None = None,
+    active: np.ndarray | None = None,
+    max_iterations: int = 20,
+    tolerance: float = 0.001,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Retorna o rótulo de cada usuário. Sem `labels` cada usuário começa com o próprio índice; com `active`
+    a propagação parte só dos usuários marcados. Para quando menos de `tolerance` deles ainda mudariam.
+    """
+    labels = np.arange(graph.size, dtype=np.int64) if labels is None else labels.astype(np.int64)
+    frontier = np.ones(graph.size, dtype=bool) if active is None else active.copy()
+    all_sources, all_targets = undirected_edges(graph)
+    if not len(all_sources):
+        return labels
+
+    rng = np.random.default_rng(seed)
+    span = int(labels.max()) + 1
+    threshold = tolerance * frontier.sum()
+    for _ in range(max_iterations):
+        keep = frontier[all_sources]
+        sources, targets = all_sources[keep], all_targets[keep]
+        if not len(sources):
+            break
+
+        keys = np.sort(sources.astype(np.int64) * span + labels[targets])
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        nodes, candidates = np.divmod(keys[starts], span)
+        # Quantos vizinhos têm cada rótulo; o rótulo atual ganha o desempate, para não trocar à toa
+        scores = np.diff(np.r_[starts, len(keys)]) * 2 + (candidates == labels[nodes])
+
+        groups = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+        best = np.repeat(np.maximum.reduceat(scores, groups), np.diff(np.r_[groups, len(scores)]))
+        winners = np.flatnonzero(scores == best)
+        # Entre empatados fica o menor rótulo, o primeiro de cada usuário já que as chaves estão ordenadas
+        winners = winners[np.r_[True, nodes[winners][1:] != nodes[winners][:-1]]]
+        nodes, candidates = nodes[winners], candidates[winners]
+
+        pending = candidates != labels[nodes]
+        if pending.sum() <= threshold:
+            break
+        update = pending & (rng.random(len(nodes)) < 0.5)
+        labels[nodes[update]] = candidates[update]
+
+        # Na próxima rodada só quem ainda queria mudar e os vizinhos de quem mudou
+        updated = np.zeros(graph.size, dtype=bool)
+        updated[nodes[update]] = True
+        frontier = np.zeros(graph.size, dtype=bool)
+        frontier[nodes[pending & ~update]] = True
+        frontier[all_targets[updated[all_sources]]] = True
+
+    return labels
+
+
+def match_users(previous: FollowGraph, graph: FollowGraph) -> np.ndarray:
+    """Índice de cada usuário de `previous` em `graph`, ou -1 para quem não existe mais"""
+    if not graph.size:
+        return np.full(previous.size, -1, dtype=np.int64)
+
+    uids = np.array(graph.uids)
+    order = np.argsort(uids, kind="stable")
+    previous_uids = np.array(previous.uids)
+    positions = np.searchsorted(uids[order], previous_uids).clip(max=graph.size - 1)
+    return np.where(uids[order][positions] == previous_uids, order[positions], -1)
+
+
+def changed_users(previous: FollowGraph, graph: FollowGraph, mapping: np.ndarray) -> np.ndarray:
+    """Máscara dos usuários de `graph` que são novos ou ganharam ou perderam algum follow, em qualquer sentido"""
+    changed = np.ones(graph.size, dtype=bool)
+    if not graph.size:
+        return changed
+    changed[mapping[mapping >= 0]] = False
+
+    sources = mapping[np.repeat(np.arange(previous.size), previous.out_degree)]
+    targets = mapping[previous.targets]
+    # Follows com um dos lados removido: o lado que continua existindo mudou
+    gone = (sources < 0) | (targets < 0)
+    changed[sources[gone & (sources >= 0)]] = True
+    changed[targets[gone & (targets >= 0)]] = True
+
+    previous_keys = np.sort(sources[~gone].astype(np.int64) * graph.size + targets[~gone])
+    keys = np.repeat(np.arange(graph.size, dtype=np.int64), graph.out_degree) * graph.size + graph.targets
+    difference = np.setxor1d(previous_keys, keys, assume_unique=True)
+    changed[difference // graph.size] = True
+    changed[difference % graph.size] = True
+    return changed
@@ -0,0 +1,39 @@
+"""
+PageRank por iteração de potência sobre o CSR dos follows.
+
+Cada iteração é vetorizada: a parcela de cada usuário (rank / follows feitos) é repetida para as arestas
+dele com `np.repeat` e somada por destino com `np.bincount`, então o custo é O(arestas) em C, sem laço
+Python por usuário. Usuários que não seguem ninguém distribuem o rank igualmente entre todos.
+"""
+
+import numpy as np
+
+from social_network.graph.csr import FollowGraph
+
+
+def pagerank(graph: FollowGraph, damping: float = 0.85, tolerance: float = 1e-5, max_iterations: int = 100) -> np.ndarray:
+    """
+    Retorna o rank de cada usuário multiplicado por n, ou seja, a média é 1.0 e um usuário com 3.0
+    tem três vezes a influência média. Para quando a variação média por usuário fica abaixo de `tolerance`.
+    """
+    size = graph.size
+    if size == 0:
+        return np.zeros(0)
+
+    out_degree = graph.out_degree
+    dangling = out_degree == 0
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(size), where=~dangling)
+
+    rank = np.full(size, 1.0 / size)
+    for _ in range(max_iterations):
+        shares = np.repeat(rank * inverse_degree, out_degree)
+        updated = np.bincount(graph.targets, weights=shares, minlength=size)
+        updated *= damping
+        updated += (1.0 - damping + damping * rank[dangling].sum()) / size
+
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < tolerance:
+            break
+
+    return rank * size
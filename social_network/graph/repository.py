@@ -0,0 +1,188 @@
+"""
+Exportação dos follows do Neo4j para o CSR e escrita em lote dos resultados nos usuários.
+
+Usuários e relações `FOLLOWING` são lidos por faixas de id interno, como na exportação em massa
+(`bulk/exporter.py`), mas cada página volta como duas listas numa única linha em vez de uma linha por
+aresta, o que corta o custo de decodificação do Bolt. Os ids internos viram índices densos com
+`np.searchsorted` sobre os ids dos usuários, já em ordem crescente.
+"""
+
+import logging
+import os
+
+import numpy as np
+from fastapi import FastAPI
+
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository
+from social_network.dependencies import get_repository_for
+from social_network.graph.csr import FollowGraph
+from social_network.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_USER_ID_QUERY = "MATCH (u:User) RETURN max(id(u)) AS max_id"
+
+USERS_PAGE_QUERY = """
+UNWIND range($start, $end - 1) AS item_id
+MATCH (u:User) WHERE id(u) = item_id
+RETURN collect(id(u)) AS ids, collect(u.uid) AS uids
+"""
+
+MAX_FOLLOW_ID_QUERY = "MATCH ()-[r:FOLLOWING]->() RETURN max(id(r)) AS max_id"
+
+FOLLOWS_PAGE_QUERY = """
+UNWIND range($start, $end - 1) AS item_id
+MATCH (source:User)-[r:FOLLOWING]->(target:User) WHERE id(r) = item_id
+RETURN collect(id(source)) AS sources, collect(id(target)) AS targets
+"""
+
+# Propriedades calculadas pelos jobs de grafo; o nome entra no Cypher, então só as desta lista
+USER_PROPERTIES = ("influence", "community")
+
+SET_PROPERTY_QUERY = """
+UNWIND $rows AS row
+MATCH (u:User {{uid: row.uid}})
+SET u.{name} = row.value
+"""
+
+# Só um processo roda cada job por período: o SET em `_lock` serializa quem chega junto, como no outbox
+CLAIM_LEASE_QUERY = """
+MERGE (l:Lease {name: $name})
+ON CREATE SET l.until = datetime({epochMillis: 0})
+SET l._lock = true
+WITH l WHERE l.until < datetime()
+SET l.until = datetime() + duration({seconds: $seconds}), l.holder = $holder
+REMOVE l._lock
+RETURN l.name AS name
+"""
+
+# Só quem segura o lease o devolve; se ele já venceu e outro processo pegou, nada muda
+RELEASE_LEASE_QUERY = """
+MATCH (l:Lease {name: $name, holder: $holder})
+SET l.until = datetime()
+"""
+
+LEASE_VERSION_QUERY = "MATCH (l:Lease {name: $name}) RETURN l.version AS version"
+
+SET_LEASE_VERSION_QUERY = """
+MERGE (l:Lease {name: $name})
+ON CREATE SET l.until = datetime({epochMillis: 0})
+SET l.version = $version
+"""
+
+
+def lease_holder() -> str:
+    return f"{os.uname().nodename}:{os.getpid()}"
+
+
+class FollowGraphRepository:
+    def __init__(self, repository: GraphRepository, page_size: int = 100_000, batch_size: int = 10_000):
+        self.repository = repository
+        self.page_size = page_size
+        self.batch_size = batch_size
+
+    async def load(self) -> FollowGraph:
+        node_ids, uids = [], []
+        for start in await self.pages(MAX_USER_ID_QUERY):
+            record = (await self.repository.read(USERS_PAGE_QUERY, start=start, end=start + self.page_size))[0]
+            node_ids.append(np.array(record["ids"], dtype=np.int64))
+            uids.extend(str(uid) for uid in record["uids"])
+        node_ids = np.concatenate(node_ids) if node_ids else np.zeros(0, dtype=np.int64)
+
+        sources, targets = [], []
+        for start in await self.pages(MAX_FOLLOW_ID_QUERY):
+            record = (await self.repository.read(FOLLOWS_PAGE_QUERY, start=start, end=start + self.page_size))[0]
+            sources.append(np.array(record["sources"], dtype=np.int64))
+            targets.append(np.array(record["targets"], dtype=np.int64))
+
+        return to_follow_graph(uids, node_ids, sources, targets)
+
+    async def pages(self, max_id_query: str) -> range:
+        records = await self.repository.read(max_id_query)
+        max_id = records[0]["max_id"] if records else None
+        return range(0, (max_id if max_id is not None else -1) + 1, self.page_size)
+
+    async def write(self, name: str, uids: list[str], values: list):
+        """Grava `name` em cada usuário, `batch_size` usuários por transação"""
+        if name not in USER_PROPERTIES:
+            raise ValueError(f"Unknown user property {name}")
+
+        query = SET_PROPERTY_QUERY.format(name=name)
+        for start in range(0, len(uids), self.batch_size):
+            rows = [{"uid": uid, "value": value} for uid, value in zip(uids[start : start + self.batch_size], values[start : start + self.batch_size])]
+            await self.repository.write(query, rows=rows)
+
+    async def claim(self, name: str, seconds: float) -> bool:
+        records = await self.repository.write(CLAIM_LEASE_QUERY, name=name, seconds=seconds, holder=lease_holder())
+        return bool(records)
+
+    async def release(self, name: str):
+        """Devolve o lease antes do prazo, para a próxima tentativa não esperar a rodada que falhou vencer"""
+        await self.repository.write(RELEASE_LEASE_QUERY, name=name, holder=lease_holder())
+
+    async def version(self, name: str) -> str | None:
+        """Versão da última rodada de `name` que gravou no banco, em qualquer máquina"""
+        records = await self.repository.read(LEASE_VERSION_QUERY, name=name)
+        return records[0]["version"] if records else None
+
+    async def set_version(self, name: str, version: str):
+        await self.repository.write(SET_LEASE_VERSION_QUERY, name=name, version=version)
+
+
+class MemoryFollowGraphRepository(FollowGraphRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    async def load(self) -> FollowGraph:
+        await self.graph.round_trip("memory:follow_graph")
+        users = [node_id for node_id, node in self.graph.nodes.items() if node.label == "User"]
+        pairs = [(source, target) for source in users for target in self.graph.outgoing.get(source, {}).get("FOLLOWING", {})]
+        sources = np.array([source for source, _ in pairs], dtype=np.int64)
+        targets = np.array([target for _, target in pairs], dtype=np.int64)
+        uids = [str(self.graph.nodes[node_id].props["uid"]) for node_id in users]
+        return to_follow_graph(uids, np.array(users, dtype=np.int64), [sources], [targets])
+
+    async def write(self, name: str, uids: list[str], values: list):
+        await self.graph.round_trip(f"memory:set_user_{name}")
+        for uid, value in zip(uids, values):
+            for node_id in self.graph.find("User", {"uid": uid}):
+                self.graph.update_node(node_id, {name: value})
+
+    async def claim(self, name: str, seconds: float) -> bool:
+        return True
+
+    async def release(self, name: str):
+        pass
+
+    async def version(self, name: str) -> str | None:
+        node_ids = self.graph.find("Lease", {"name": name})
+        return self.graph.nodes[node_ids[0]].props.get("version") if node_ids else None
+
+    async def set_version(self, name: str, version: str):
+        node_ids = self.graph.find("Lease", {"name": name})
+        if node_ids:
+            self.graph.update_node(node_ids[0], {"version": version})
+        else:
+            self.graph.add_node("Lease", {"name": name, "version": version})
+
+
+def to_follow_graph(uids: list[str], node_ids: np.ndarray, sources: list[np.ndarray], targets: list[np.ndarray]) -> FollowGraph:
+    """Troca ids internos por índices densos; arestas de usuários criados durante a leitura são descartadas"""
+    sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+    targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+    if not len(node_ids):
+        return FollowGraph.from_edges(uids, sources[:0], targets[:0])
+
+    source_index = np.searchsorted(node_ids, sources).clip(max=len(node_ids) - 1)
+    target_index = np.searchsorted(node_ids, targets).clip(max=len(node_ids) - 1)
+    known = (node_ids[source_index] == sources) & (node_ids[target_index] == targets)
+    if not known.all():
+        logger.info("Grafo de follows: %d arestas de usuários fora da leitura descartadas", (~known).sum())
+    return FollowGraph.from_edges(uids, source_index[known], target_index[known])
+
+
+def get_follow_graph_repository_for(app: FastAPI) -> FollowGraphRepository:
+    if settings.GRAPH_BACKEND == "memory":
+        return MemoryFollowGraphRepository(app.state.memory_graph)
+    return FollowGraphRepository(get_repository_for(app.state.neo4j_client), settings.GRAPH_PAGE_SIZE, settings.GRAPH_WRITE_BATCH_SIZE)
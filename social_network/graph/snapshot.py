@@ -0,0 +1,329 @@
+"""
+Snapshot do grafo de follows num arquivo mapeado em memória, compartilhado pelos workers.
+
+O job `graph.snapshot` lê os follows do Neo4j (como o da influência) e grava num arquivo só os arrays do
+CSR nos dois sentidos (quem cada usuário segue e quem o segue) e os uids, também ordenados para busca
+binária. Cada worker abre o arquivo com `mmap`: os arrays são vistas sobre as páginas do arquivo, sem
+cópia, e o page cache é um só para todos os processos da máquina. Uma consulta de adjacência vira uma
+fatia de array em vez de uma ida ao Neo4j.
+
+A troca é atômica: o arquivo novo é escrito ao lado e entra no lugar com `os.replace`. Os workers notam a
+troca pelo inode (no máximo a cada `check_interval`) e passam a usar o novo; quem ainda lê o antigo segue
+com o mapeamento válido até soltá-lo. Follows e unfollows feitos depois do início da leitura ficam num
+log em memória (`FollowDelta`) aplicado por cima do snapshot, e o broker repassa esses eventos entre os
+workers (com `BROKER_BACKEND=local`, só dentro do processo).
+
+O delta só tem o que aconteceu desde que o processo subiu, então um arquivo criado antes disso (de um
+deploy anterior, possivelmente de dias atrás) não é usado: as leituras vão ao banco até sair um snapshot
+novo, e nesse caso a primeira construção é agendada para logo após o boot.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+from fastapi import FastAPI
+
+from social_network.core.broker import RESYNC, Subscription, broker
+from social_network.core.jobs import job_runner
+from social_network.graph.csr import FollowGraph
+from social_network.graph.influence import GRAPH_JOB_LAST_RUN, GRAPH_JOB_USERS
+from social_network.settings import settings
+
+if TYPE_CHECKING:
+    from social_network.graph.repository import FollowGraphRepository
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_JOB = "graph.snapshot"
+FOLLOWS_TOPIC = "graph:follows"
+
+MAGIC = b"SNFOLLOW"
+VERSION = 1
+ALIGNMENT = 64
+UID_DTYPE = "S36"
+
+
+def align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(path: str, graph: FollowGraph, created_at: float):
+    """Grava o snapshot num arquivo temporário e troca pelo atual de uma vez"""
+    followers = graph.reversed()
+    uids = np.array(graph.uids, dtype=UID_DTYPE)
+    order = np.argsort(uids, kind="stable").astype(np.int32)
+    arrays = {
+        "following_offsets": graph.offsets,
+        "following": graph.targets,
+        "followers_offsets": followers.offsets,
+        "followers": followers.targets,
+        "uids": uids,
+        "sorted_uids": uids[order],
+        "sorted_index": order,
+    }
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": position, "dtype": array.dtype.str, "count": len(array)}
+        position = align(position + array.nbytes)
+    header = json.dumps({"version": VERSION, "created_at": created_at, "users": graph.size, "edges": graph.edges, "arrays": layout}).encode()
+    data_start = align(len(MAGIC) + 4 + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name]["offset"])
+            np.ascontiguousarray(array).tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class FollowSnapshot:
+    """Arrays do snapshot como vistas somente leitura sobre o arquivo mapeado"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.inode = os.fstat(file.fileno()).st_ino
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a follow graph snapshot")
+        (length,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        header = json.loads(self._mmap[len(MAGIC) + 4 : len(MAGIC) + 4 + length])
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported snapshot version {header['version']}")
+
+        self.created_at: float = header["created_at"]
+        self.size: int = header["users"]
+        self.edges: int = header["edges"]
+        data_start = align(len(MAGIC) + 4 + length)
+        arrays = {name: np.frombuffer(self._mmap, dtype=spec["dtype"], count=spec["count"], offset=data_start + spec["offset"]) for name, spec in header["arrays"].items()}
+        self.following_offsets = arrays["following_offsets"]
+        self.following_targets = arrays["following"]
+        self.followers_offsets = arrays["followers_offsets"]
+        self.followers_sources = arrays["followers"]
+        self.uids = arrays["uids"]
+        self.sorted_uids = arrays["sorted_uids"]
+        self.sorted_index = arrays["sorted_index"]
+
+    def index(self, uid: str) -> int | None:
+        key = uid.encode()
+        position = int(np.searchsorted(self.sorted_uids, key))
+        if position < self.size and self.sorted_uids[position] == key:
+            return int(self.sorted_index[position])
+        return None
+
+    def decode(self, indexes: np.ndarray) -> list[str]:
+        return [uid.decode() for uid in self.uids[indexes].tolist()]
+
+    def following(self, index: int) -> np.ndarray:
+        return self.following_targets[self.following_offsets[index] : self.following_offsets[index + 1]]
+
+    def followers(self, index: int) -> np.ndarray:
+        return self.followers_sources[self.followers_offsets[index] : self.followers_offsets[index + 1]]
+
+    def is_following(self, source: int, target: int) -> bool:
+        row = self.following(source)
+        position = int(np.searchsorted(row, target))
+        return position < len(row) and row[position] == target
+
+
+@dataclass
+class FollowDelta:
+    """Follows e unfollows posteriores ao snapshot; o último evento de cada par vale"""
+
+    entries: list[tuple[float, str, str, bool]] = field(default_factory=list)
+    following: dict[str, dict[str, bool]] = field(default_factory=dict)
+    followers: dict[str, dict[str, bool]] = field(default_factory=dict)
+
+    def record(self, source_uid: str, target_uid: str, followed: bool, at: float):
+        self.entries.append((at, source_uid, target_uid, followed))
+        self.following.setdefault(source_uid, {})[target_uid] = followed
+        self.followers.setdefault(target_uid, {})[source_uid] = followed
+
+    def trim(self, before: float):
+        """Descarta o que o snapshot criado em `before` já contém"""
+        entries = sorted(entry for entry in self.entries if entry[0] >= before)
+        self.entries, self.following, self.followers = [], {}, {}
+        for entry in entries:
+            self.record(entry[1], entry[2], entry[3], entry[0])
+
+
+class SnapshotService:
+    def __init__(self, path: str, interval: float = 600.0, check_interval: float = 5.0):
+        self.path = path
+        self.interval = interval
+        self.check_interval = check_interval
+        self.snapshot: FollowSnapshot | None = None
+        self.delta = FollowDelta()
+        self.app: FastAPI | None = None
+        self._checked = 0.0
+        self._building = False
+        self._task: asyncio.Task | None = None
+        # Snapshots criados antes disso não têm os follows correspondentes no delta
+        self.started = 0.0
+
+    def start(self, app: FastAPI):
+        self.app = app
+        self.started = time.time()
+        self.reload()
+        self._task = asyncio.create_task(self._listen(broker.subscribe({FOLLOWS_TOPIC})))
+        if self.interval > 0:
+            # Sem arquivo desta execução, a primeira construção sai logo; com arquivo novo, só no próximo período
+            job_runner.every(SNAPSHOT_JOB, self.interval, delay=self.interval if self.current() else 0)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def reload(self) -> bool:
+        """Abre o arquivo se ele foi trocado desde a última abertura"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if self.snapshot is not None and self.snapshot.inode == inode:
+            return False
+
+        try:
+            snapshot = FollowSnapshot(self.path)
+        except (OSError, ValueError):
+            logger.exception("Falha ao abrir o snapshot do grafo de follows %s", self.path)
+            return False
+        self.snapshot = snapshot
+        self.delta.trim(snapshot.created_at)
+        return True
+
+    def current(self) -> FollowSnapshot | None:
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self.reload()
+        if self.snapshot is None or self.snapshot.created_at < self.started:
+            return None
+        return self.snapshot
+
+    # Escritas
+
+    def record(self, source_uid: str, target_uid: str, followed: bool):
+        """Chamado depois que o follow/unfollow foi gravado no banco"""
+        at = time.time()
+        self.delta.record(source_uid, target_uid, followed, at)
+        broker.publish(FOLLOWS_TOPIC, "follow" if followed else "unfollow", {"source": source_uid, "target": target_uid, "at": at, "origin": broker.id})
+
+    async def _listen(self, subscription: Subscription):
+        with subscription:
+            while True:
+                message = await subscription.get()
+                if message is RESYNC:
+                    logger.warning("Eventos de follow perdidos; o delta fica incompleto até o próximo snapshot")
+                    continue
+                data = json.loads(message.data)
+                # Os eventos deste processo também chegam aqui, mas já foram aplicados em `record`
+                if data["origin"] != broker.id:
+                    self.delta.record(data["source"], data["target"], message.event == "follow", data["at"])
+
+    # Leituras: None quando não há snapshot aberto, para quem chama cair na consulta ao banco
+
+    def following(self, uid: str) -> list[str] | None:
+        return self._adjacent(uid, FollowSnapshot.following, self.delta.following)
+
+    def followers(self, uid: str) -> list[str] | None:
+        return self._adjacent(uid, FollowSnapshot.followers, self.delta.followers)
+
+    def _adjacent(self, uid: str, neighbors, changes: dict[str, dict[str, bool]]) -> list[str] | None:
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+
+        index = snapshot.index(uid)
+        adjacent = dict.fromkeys(snapshot.decode(neighbors(snapshot, index))) if index is not None else {}
+        for other, followed in changes.get(uid, {}).items():
+            if followed:
+                adjacent[other] = None
+            else:
+                adjacent.pop(other, None)
+        return list(adjacent)
+
+    def is_following(self, source_uid: str, target_uid: str) -> bool | None:
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+
+        changed = self.delta.following.get(source_uid, {}).get(target_uid)
+        if changed is not None:
+            return changed
+        source, target = snapshot.index(source_uid), snapshot.index(target_uid)
+        return source is not None and target is not None and snapshot.is_following(source, target)
+
+    def mutuals(self, uid: str) -> list[str] | None:
+        """Quem o usuário segue e também o segue"""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+
+        index = snapshot.index(uid)
+        mutuals = snapshot.decode(np.intersect1d(snapshot.following(index), snapshot.followers(index), assume_unique=True)) if index is not None else []
+        changed = self.delta.following.get(uid, {}).keys() | self.delta.followers.get(uid, {}).keys()
+        return [other for other in mutuals if other not in changed] + [other for other in changed if self.is_following(uid, other) and self.is_following(other, uid)]
+
+    # Construção
+
+    async def build(self, repository: "FollowGraphRepository | None" = None, force: bool = False) -> int | None:
+        """Lê os follows e troca o arquivo; retorna quantos usuários, ou None se a rodada é de outro processo"""
+        # Importado aqui porque o repositório do grafo depende do módulo de dependências, que importa este
+        from social_network.graph.repository import get_follow_graph_repository_for
+
+        if self._building:
+            return None
+        self._building = True
+        try:
+            repository = repository or get_follow_graph_repository_for(self.app)
+            # O arquivo é local, então o lease é por máquina: um worker de cada máquina constrói
+            lease = f"{SNAPSHOT_JOB}:{socket.gethostname()}"
+            if not force and not await repository.claim(lease, self.interval * 0.9):
+                return None
+
+            try:
+                start = time.perf_counter()
+                created_at = time.time()
+                graph = await repository.load()
+                await asyncio.to_thread(write_snapshot, self.path, graph, created_at)
+            except Exception:
+                # Devolve o lease para a nova tentativa do JobRunner não esperar ele vencer
+                if not force:
+                    await repository.release(lease)
+                raise
+        finally:
+            self._building = False
+
+        with contextlib.suppress(FileNotFoundError):
+            logger.info("Snapshot dos follows: %d usuários, %d follows, %.1f MB em %.1fs", graph.size, graph.edges, os.path.getsize(self.path) / 2**20, time.perf_counter() - start)
+        self.reload()
+        GRAPH_JOB_LAST_RUN.labels(SNAPSHOT_JOB).set(time.time())
+        GRAPH_JOB_USERS.labels(SNAPSHOT_JOB).set(graph.size)
+        return graph.size
+
+
+follow_snapshot = SnapshotService(settings.GRAPH_SNAPSHOT_PATH, interval=settings.GRAPH_SNAPSHOT_REFRESH_SECONDS, check_interval=settings.GRAPH_SNAPSHOT_CHECK_SECONDS)
+
+
+@job_runner.handler(SNAPSHOT_JOB)
+async def build_follow_snapshot(payload: dict):
+    await follow_snapshot.build()
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from social_network.core.metrics import registry
+from social_network.core.pool import pool_monitor
+from social_network.health.schemas import PoolStatus, ReadinessStatus
+from social_network.settings import settings
+
+health_router = APIRouter(prefix="/health", tags=["health"])
+metrics_router = APIRouter(tags=["health"])
+
+
+@health_router.get(
+    "/ready",
+    response_model=ReadinessStatus,
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Neo4j is not connected"},
+    },
+)
+async def ready(request: Request):
+    client = getattr(request.app.state, "neo4j_client", None)
+    readiness = ReadinessStatus(
+        ready=settings.GRAPH_BACKEND == "memory" or bool(client and client.is_connected),
+        neo4j_url=settings.neo4j_url,
+        pool=PoolStatus(**pool_monitor.snapshot()),
+    )
+
+    if not readiness.ready:
+        return JSONResponse(readiness.model_dump(), status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return readiness
+
+
+# No servidor de produção (vários workers) a resposta soma as métricas de todos eles, via METRICS_DIR
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
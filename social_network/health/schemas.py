@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    """Modelo usado para expor o estado do pool de conexões do Neo4j"""
+
+    in_use: int
+    idle: int
+    max_size: int | None
+    acquisitions: int
+    failures: int
+    wait_ms_avg: float
+    wait_ms_p95: float
+    wait_ms_max: float
+
+
+class ReadinessStatus(BaseModel):
+    """Modelo usado no retorno do health check de prontidão"""
+
+    ready: bool
+    neo4j_url: str
+    pool: PoolStatus
@@ -2,9 +2,20 @@ from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
+from social_network.admin.router import admin_router
 from social_network.auth.router import auth_router
+from social_network.core.admission import AdmissionLimits, AdmissionMiddleware
+from social_network.core.compression import CompressionMiddleware
+from social_network.core.instrumentation import QueryInstrumentationMiddleware
+from social_network.core.metrics import MetricsMiddleware, preregister_routes
+from social_network.core.profiler import ProfilerMiddleware, profiler
 from social_network.dependencies import lifespan
+from social_network.health.router import health_router, metrics_router
+from social_network.notifications.router import notification_router
 from social_network.posts.router import post_router
+from social_network.settings import settings
+from social_network.stream.router import stream_router
+from social_network.sync.router import sync_router
 from social_network.users.router import user_router
 
 app = FastAPI(
@@ -13,6 +24,20 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Por dentro do CORS, para o 503 também levar os headers de CORS e o navegador ler o Retry-After
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        limits=AdmissionLimits(
+            max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+            lag_soft=settings.ADMISSION_LAG_SOFT_MS / 1000,
+            lag_hard=settings.ADMISSION_LAG_HARD_MS / 1000,
+            pool_wait_soft=settings.ADMISSION_POOL_WAIT_SOFT_MS / 1000,
+            pool_wait_hard=settings.ADMISSION_POOL_WAIT_HARD_MS / 1000,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        ),
+    )
+
 origins = [
     "*",
 ]
@@ -24,13 +49,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    thread_size=settings.COMPRESSION_THREAD_SIZE,
+    encodings=settings.COMPRESSION_ENCODINGS,
+)
+app.add_middleware(QueryInstrumentationMiddleware, threshold=settings.N_PLUS_ONE_THRESHOLD)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(post_router)
+app.include_router(notification_router)
+app.include_router(stream_router)
+app.include_router(sync_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 
 @app.get("/", include_in_schema=False)
 def root():
     return RedirectResponse(url="/docs")
+
+
+preregister_routes(app.routes)
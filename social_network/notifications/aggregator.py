@@ -0,0 +1,136 @@
+"""
+Agrupamento das notificações em memória antes de chegarem ao banco.
+
+Curtidas, respostas e novos seguidores chamam `notification_aggregator.record(...)`, que só atualiza um
+dicionário: eventos com o mesmo tipo e o mesmo alvo (o post curtido/respondido ou o usuário seguido)
+viram uma única entrada com os atores distintos da janela. A cada `NOTIFICATIONS_FLUSH_INTERVAL_SECONDS`
+(ou antes, quando a janela junta `NOTIFICATIONS_FLUSH_SIZE` entradas) tudo vira um job
+`notifications.flush`, escrito no inbox com uma consulta só. Assim "12 pessoas curtiram seu post"
+custa uma escrita, não doze, e a requisição que gerou o evento não espera nada.
+"""
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Literal
+from uuid import uuid4
+
+from social_network.core.jobs import job_runner
+from social_network.core.metrics import Counter, registry
+from social_network.settings import settings
+
+if TYPE_CHECKING:
+    from social_network.notifications.repository import NotificationRepository
+
+logger = logging.getLogger(__name__)
+
+NotificationKind = Literal["like", "reply", "follow"]
+
+NOTIFICATION_EVENTS = registry.register(Counter("notification_events_total", "Eventos que geram notificação", ("kind",)))
+NOTIFICATIONS_FLUSHED = registry.register(Counter("notifications_flushed_total", "Notificações agrupadas enviadas ao inbox"))
+
+FLUSH_JOB = "notifications.flush"
+
+
+@dataclass
+class PendingNotification:
+    kind: str
+    recipient_uid: str | None
+    post_uid: str | None
+    # Atores distintos da janela, do mais antigo para o mais recente
+    actors: dict[str, None] = field(default_factory=dict)
+    updated_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.recipient_uid or ''}:{self.post_uid or ''}"
+
+    def row(self) -> dict:
+        return {
+            "key": self.key,
+            "uid": str(uuid4()),
+            "kind": self.kind,
+            "recipient_uid": self.recipient_uid,
+            "post_uid": self.post_uid,
+            "actors": list(reversed(self.actors)),
+            "count": len(self.actors),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class NotificationAggregator:
+    def __init__(self, interval: float = 2.0, batch_size: int = 500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending: dict[str, PendingNotification] = {}
+        self.repository: NotificationRepository | None = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+
+    def record(self, kind: NotificationKind, actor_uid: str, recipient_uid: str | None = None, post_uid: str | None = None):
+        """
+        Registra um evento sem tocar no banco. Sem `recipient_uid` o destinatário é o dono de `post_uid`,
+        resolvido na escrita do lote; eventos do próprio dono são descartados lá.
+        """
+        if actor_uid == recipient_uid:
+            return
+
+        NOTIFICATION_EVENTS.labels(kind).inc()
+        notification = PendingNotification(kind, recipient_uid, post_uid)
+        notification = self.pending.setdefault(notification.key, notification)
+        notification.actors.pop(actor_uid, None)
+        notification.actors[actor_uid] = None
+        notification.updated_at = datetime.now()
+
+        if len(self.pending) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    def drain(self) -> list[dict]:
+        pending, self.pending = self.pending, {}
+        return [notification.row() for notification in pending.values()]
+
+    async def flush(self):
+        rows = self.drain()
+        if rows:
+            await job_runner.enqueue(FLUSH_JOB, {"rows": rows})
+
+    def start(self, repository: "NotificationRepository"):
+        if self._task is not None:
+            return
+        self.repository = repository
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Para o loop e manda o que sobrou da janela; precisa rodar antes do job_runner.stop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wake = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Falha ao enviar as últimas notificações")
+
+    async def _loop(self):
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Falha ao enviar notificações para o inbox")
+
+
+notification_aggregator = NotificationAggregator(interval=settings.NOTIFICATIONS_FLUSH_INTERVAL_SECONDS, batch_size=settings.NOTIFICATIONS_FLUSH_SIZE)
+
+
+@job_runner.handler(FLUSH_JOB)
+async def deliver_notifications(payload: dict):
+    await notification_aggregator.repository.deliver(payload["rows"])
+    NOTIFICATIONS_FLUSHED.inc(len(payload["rows"]))
@@ -0,0 +1,186 @@
+from datetime import datetime
+
+from fastapi import FastAPI, Request
+
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository
+from social_network.dependencies import get_repository_for
+from social_network.posts.repository import USER_MINIMAL_FIELDS, USER_MINIMAL_PROJECTION, to_native
+from social_network.settings import settings
+
+# O destinatário é o usuário informado (follow) ou o dono do post (curtida e resposta). A notificação
+# aberta da chave acumula atores até ser lida; o contador do usuário só sobe quando uma nova é criada.
+DELIVER_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (recipient:User {uid: row.recipient_uid})
+OPTIONAL MATCH (owner:User)-[:OWNS]->(:Post {uid: row.post_uid})
+WITH row, coalesce(recipient, owner) AS u
+WHERE u IS NOT NULL
+WITH row, u, [actor IN row.actors WHERE actor <> u.uid] AS actors
+WITH row, u, actors, row.count - size(row.actors) + size(actors) AS count
+WHERE count > 0
+MERGE (n:Notification {open_key: row.key})
+ON CREATE SET n.uid = row.uid, n.kind = row.kind, n.post_uid = row.post_uid, n.read = false,
+    n.created_at = localdatetime(row.updated_at), n.actor_count = 0, n.actors = [], n._new = true
+SET n.actor_count = n.actor_count + count,
+    n.actors = (actors + [actor IN n.actors WHERE NOT actor IN actors])[..3],
+    n.updated_at = localdatetime(row.updated_at)
+WITH u, n, coalesce(n._new, false) AS created
+REMOVE n._new
+MERGE (u)-[:NOTIFIED]->(n)
+WITH u, sum(CASE WHEN created THEN 1 ELSE 0 END) AS created
+SET u.unread_notifications = coalesce(u.unread_notifications, 0) + created
+"""
+
+INBOX_QUERY = f"""
+MATCH (u:User {{uid: $user_uid}})
+CALL {{
+    WITH u
+    MATCH (u)-[:NOTIFIED]->(n:Notification)
+    WHERE $before IS NULL OR n.updated_at < $before
+    WITH n ORDER BY n.updated_at DESC LIMIT $limit
+    RETURN collect(n {{.uid, .kind, .post_uid, .actor_count, .read, .created_at, .updated_at,
+        actors: COLLECT {{ UNWIND n.actors AS actor_uid MATCH (a:User {{uid: actor_uid}}) RETURN a {USER_MINIMAL_PROJECTION} }}
+    }}) AS notifications
+}}
+RETURN notifications, coalesce(u.unread_notifications, 0) AS unread
+"""
+
+UNREAD_QUERY = "MATCH (u:User {uid: $user_uid}) RETURN coalesce(u.unread_notifications, 0) AS unread"
+
+# Notificação lida perde a open_key, então o próximo evento do mesmo alvo abre uma nova
+MARK_READ_QUERY = """
+MATCH (u:User {uid: $user_uid})
+OPTIONAL MATCH (u)-[:NOTIFIED]->(n:Notification {read: false})
+WHERE $uids IS NULL OR n.uid IN $uids
+WITH u, collect(n) AS marked
+FOREACH (n IN marked | SET n.read = true REMOVE n.open_key)
+WITH u, coalesce(u.unread_notifications, 0) - size(marked) AS unread
+SET u.unread_notifications = CASE WHEN unread < 0 THEN 0 ELSE unread END
+RETURN u.unread_notifications AS unread
+"""
+
+
+class NotificationRepository:
+    """Inbox de notificações por usuário, com o total de não lidas guardado num contador no próprio usuário"""
+
+    def __init__(self, repository: GraphRepository):
+        self.repository = repository
+
+    async def deliver(self, rows: list[dict]):
+        await self.repository.write(DELIVER_QUERY, rows=rows)
+
+    async def inbox(self, user_uid: str, limit: int, before: datetime | None = None) -> tuple[list[dict], int]:
+        records = await self.repository.read(INBOX_QUERY, user_uid=user_uid, limit=limit, before=before)
+        if not records:
+            return [], 0
+        return [to_native(dict(notification)) for notification in records[0]["notifications"]], records[0]["unread"]
+
+    async def unread(self, user_uid: str) -> int:
+        records = await self.repository.read(UNREAD_QUERY, user_uid=user_uid)
+        return records[0]["unread"] if records else 0
+
+    async def mark_read(self, user_uid: str, uids: list[str] | None = None) -> int:
+        records = await self.repository.write(MARK_READ_QUERY, user_uid=user_uid, uids=uids)
+        return records[0]["unread"] if records else 0
+
+
+class MemoryNotificationRepository(NotificationRepository):
+    """Mesmo inbox sobre o grafo em memória: nós Notification ligados ao usuário por NOTIFIED"""
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    def user(self, uid: str | None) -> int | None:
+        node_ids = self.graph.find("User", {"uid": uid}) if uid else []
+        return node_ids[0] if node_ids else None
+
+    def recipient(self, row: dict) -> int | None:
+        if row["recipient_uid"]:
+            return self.user(row["recipient_uid"])
+        for post in self.graph.find("Post", {"uid": row["post_uid"]}):
+            for owner in self.graph.neighbors(post, "OWNS", "INCOMING"):
+                return owner
+        return None
+
+    async def deliver(self, rows: list[dict]):
+        await self.graph.round_trip("memory:deliver_notifications")
+        for row in rows:
+            user = self.recipient(row)
+            if user is None:
+                continue
+            user_uid = str(self.graph.nodes[user].props["uid"])
+            actors = [actor for actor in row["actors"] if actor != user_uid]
+            count = row["count"] - len(row["actors"]) + len(actors)
+            if count <= 0:
+                continue
+
+            updated_at = datetime.fromisoformat(row["updated_at"])
+            node_ids = self.graph.find("Notification", {"open_key": row["key"]})
+            if node_ids:
+                node_id = node_ids[0]
+            else:
+                props = {"open_key": row["key"], "uid": row["uid"], "kind": row["kind"], "post_uid": row["post_uid"], "read": False, "created_at": updated_at, "actor_count": 0, "actors": []}
+                node_id = self.graph.add_node("Notification", props)
+                self.graph.connect(user, "NOTIFIED", node_id)
+                unread = self.graph.nodes[user].props.get("unread_notifications") or 0
+                self.graph.update_node(user, {"unread_notifications": unread + 1})
+
+            props = self.graph.nodes[node_id].props
+            self.graph.update_node(
+                node_id,
+                {
+                    "actor_count": props["actor_count"] + count,
+                    "actors": (actors + [actor for actor in props["actors"] if actor not in actors])[:3],
+                    "updated_at": updated_at,
+                },
+            )
+
+    async def inbox(self, user_uid: str, limit: int, before: datetime | None = None) -> tuple[list[dict], int]:
+        await self.graph.round_trip("memory:notifications")
+        user = self.user(user_uid)
+        if user is None:
+            return [], 0
+
+        nodes = [self.graph.nodes[node_id].props for node_id in self.graph.neighbors(user, "NOTIFIED", "OUTGOING")]
+        nodes = sorted((props for props in nodes if before is None or props["updated_at"] < before), key=lambda props: props["updated_at"], reverse=True)
+        notifications = [
+            {
+                **{name: props[name] for name in ("uid", "kind", "post_uid", "actor_count", "read", "created_at", "updated_at")},
+                "actors": [self.graph.project(actor, USER_MINIMAL_FIELDS) for uid in props["actors"] if (actor := self.user(uid)) is not None],
+            }
+            for props in nodes[:limit]
+        ]
+        return notifications, self.graph.nodes[user].props.get("unread_notifications") or 0
+
+    async def unread(self, user_uid: str) -> int:
+        await self.graph.round_trip("memory:unread_notifications")
+        user = self.user(user_uid)
+        return (self.graph.nodes[user].props.get("unread_notifications") or 0) if user is not None else 0
+
+    async def mark_read(self, user_uid: str, uids: list[str] | None = None) -> int:
+        await self.graph.round_trip("memory:mark_notifications_read")
+        user = self.user(user_uid)
+        if user is None:
+            return 0
+
+        marked = 0
+        for node_id in self.graph.neighbors(user, "NOTIFIED", "OUTGOING"):
+            props = self.graph.nodes[node_id].props
+            if not props["read"] and (uids is None or props["uid"] in uids):
+                self.graph.update_node(node_id, {"read": True, "open_key": None})
+                marked += 1
+
+        unread = max(0, (self.graph.nodes[user].props.get("unread_notifications") or 0) - marked)
+        self.graph.update_node(user, {"unread_notifications": unread})
+        return unread
+
+
+def get_notification_repository_for(app: FastAPI) -> NotificationRepository:
+    if settings.GRAPH_BACKEND == "memory":
+        return MemoryNotificationRepository(app.state.memory_graph)
+    return NotificationRepository(get_repository_for(app.state.neo4j_client))
+
+
+def get_notification_repository(request: Request) -> NotificationRepository:
+    return get_notification_repository_for(request.app)
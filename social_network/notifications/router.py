@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+
+from social_network.core.responses import FastJSONRoute
+from social_network.dependencies import get_current_user
+from social_network.notifications.repository import NotificationRepository, get_notification_repository
+from social_network.notifications.schemas import NotificationList, NotificationRead, UnreadCount
+from social_network.users.models import User
+
+notification_router = APIRouter(prefix="/notifications", tags=["notifications"], route_class=FastJSONRoute)
+
+
+@notification_router.get(
+    "/",
+    response_model=NotificationList,
+)
+async def list_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    before: datetime | None = Query(None, description="Cursor: `next_before` da página anterior"),
+    current_user: User = Depends(get_current_user),
+    notifications: NotificationRepository = Depends(get_notification_repository),
+):
+    items, unread = await notifications.inbox(str(current_user.uid), limit, before)
+    next_before = items[-1]["updated_at"] if len(items) == limit else None
+    return NotificationList.model_validate({"notifications": items, "unread": unread, "next_before": next_before})
+
+
+@notification_router.get(
+    "/unread-count",
+    response_model=UnreadCount,
+)
+async def unread_count(current_user: User = Depends(get_current_user), notifications: NotificationRepository = Depends(get_notification_repository)):
+    return UnreadCount(unread=await notifications.unread(str(current_user.uid)))
+
+
+@notification_router.post(
+    "/read",
+    response_model=UnreadCount,
+)
+async def mark_read(
+    body: NotificationRead | None = None,
+    current_user: User = Depends(get_current_user),
+    notifications: NotificationRepository = Depends(get_notification_repository),
+):
+    uids = [str(uid) for uid in body.uids] if body and body.uids is not None else None
+    return UnreadCount(unread=await notifications.mark_read(str(current_user.uid), uids))
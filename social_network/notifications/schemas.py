@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, computed_field
+
+from social_network.core.schemas import OrmModel
+from social_network.posts.schemas import UserMinimal
+
+ACTIONS = {
+    "like": "liked your post",
+    "reply": "replied to your post",
+    "follow": "started following you",
+}
+
+
+class Notification(OrmModel):
+    """Modelo de uma notificação agrupada: os últimos atores e o total de pessoas"""
+
+    uid: UUID
+    kind: Literal["like", "reply", "follow"]
+    post_uid: UUID | None = None
+    actors: list[UserMinimal]
+    actor_count: int
+    read: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @computed_field
+    @property
+    def message(self) -> str:
+        names = [actor.username for actor in self.actors[:2]] or ["Someone"]
+        if self.actor_count <= 1:
+            who = names[0]
+        elif self.actor_count == 2 and len(names) == 2:
+            who = f"{names[0]} and {names[1]}"
+        else:
+            others = self.actor_count - 1
+            who = f"{names[0]} and {others} {'other' if others == 1 else 'others'}"
+        return f"{who} {ACTIONS[self.kind]}"
+
+
+class NotificationList(OrmModel):
+    """Modelo usado na listagem do inbox, com o cursor da próxima página"""
+
+    notifications: list[Notification]
+    unread: int
+    next_before: datetime | None = None
+
+
+class UnreadCount(BaseModel):
+    unread: int
+
+
+class NotificationRead(BaseModel):
+    """Notificações a marcar como lidas; sem `uids` marca todas"""
+
+    uids: list[UUID] | None = None
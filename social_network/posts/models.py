@@ -11,7 +11,7 @@ from social_network.core.models import DatedModelMixin
 
 
 class Post(NodeModel, DatedModelMixin):
-    uid: UUID = Field(unique=True, default_factory=uuid4)
+    uid: WithOptions(UUID, unique=True) = Field(default_factory=uuid4)
     content: str
     owner: RelationshipProperty[ForwardRef("User"), ForwardRef("Owns")] = RelationshipProperty(
         target_model="User",
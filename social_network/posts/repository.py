@@ -0,0 +1,229 @@
+from collections import defaultdict
+
+from fastapi import Request
+
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository, where_clause
+from social_network.core.singleflight import SingleFlight
+from social_network.dependencies import get_repository
+from social_network.posts.filters import filter_post
+from social_network.posts.schemas import PostDetails, PostFilterSchema, PostList
+from social_network.settings import settings
+
+USER_MINIMAL_FIELDS = ("uid", "avatar_link", "bio", "username", "full_name", "influence")
+USER_MINIMAL_PROJECTION = "{.uid, .avatar_link, .bio, .username, .full_name, .influence}"
+
+POST_PROJECTION = (
+    "p {.uid, .content, .created_at, .updated_at, "
+    "likes: COUNT { (p)<-[:LIKED]-(:User) }, "
+    "dislikes: COUNT { (p)<-[:DISLIKED]-(:User) }, "
+    f"owner: [(p)<-[:OWNS]-(owner:User) | owner {USER_MINIMAL_PROJECTION}][0]}}"
+)
+
+FEED_CONDITIONS = {
+    "content": "p.content = $content",
+    "content_i": "toLower(p.content) CONTAINS toLower($content_i)",
+}
+
+DETAILS_QUERY = f"""
+MATCH (p:Post {{uid: $uid}})
+RETURN {POST_PROJECTION} AS post
+"""
+
+BY_OWNER_QUERY = f"""
+MATCH (owner:User)-[:OWNS]->(p:Post)
+WHERE owner.uid IN $owner_uids
+RETURN {POST_PROJECTION} AS post
+"""
+
+COMMENTS_QUERY = f"""
+UNWIND $uids AS root_uid
+MATCH path = (:Post {{uid: root_uid}})<-[:LINKED_TO*1..]-(p:Post)
+WITH root_uid, nodes(path)[-2].uid AS parent_uid, p
+ORDER BY p.created_at
+RETURN root_uid, parent_uid, {POST_PROJECTION} AS post
+"""
+
+REACTIONS_QUERY = """
+MATCH (:User {uid: $viewer_uid})-[reaction:LIKED|DISLIKED]->(p:Post)
+WHERE p.uid IN $uids
+RETURN p.uid AS uid, type(reaction) AS type
+"""
+
+
+post_flights = SingleFlight("post_details", timeout=settings.SINGLEFLIGHT_TIMEOUT_SECONDS, after_write=settings.SINGLEFLIGHT_AFTER_WRITE_SECONDS)
+
+
+def feed_query(filters: dict) -> str:
+    return f"MATCH (p:Post)\n{where_clause(FEED_CONDITIONS, filters)}\nRETURN {POST_PROJECTION} AS post"
+
+
+def to_native(post: dict) -> dict:
+    for field in ("created_at", "updated_at"):
+        value = post.get(field)
+        if hasattr(value, "to_native"):
+            post[field] = value.to_native()
+    return post
+
+
+class PostReadRepository:
+    """Leituras de posts em Cypher escrito à mão, retornando mapas projetados prontos para os schemas de resposta"""
+
+    def __init__(self, repository: GraphRepository):
+        self.repository = repository
+
+    async def feed(self, filters: PostFilterSchema, viewer_uid: str) -> PostList:
+        posts = await self.hydrate(await self.feed_rows(filters), viewer_uid)
+        return PostList.model_validate({"posts": posts})
+
+    async def details(self, uid: str, viewer_uid: str, coalesce: bool = False) -> PostDetails | None:
+        """Com `coalesce` pedidos simultâneos do mesmo post compartilham a busca da árvore; só as reações são por usuário"""
+        tree = await post_flights.do(uid, lambda: self.details_tree(uid)) if coalesce else await self.details_tree(uid)
+        if not tree:
+            return None
+
+        posts = await self.personalize([tree], viewer_uid)
+        return PostDetails.model_validate(posts[0])
+
+    async def details_tree(self, uid: str) -> dict | None:
+        post = await self.details_row(uid)
+        if not post:
+            return None
+        return (await self.trees([post]))[0]
+
+    async def by_owner(self, owner_uid: str, viewer_uid: str) -> list[dict]:
+        return (await self.by_owners([owner_uid], viewer_uid)).get(owner_uid, [])
+
+    async def by_owners(self, owner_uids: list[str], viewer_uid: str) -> dict[str, list[dict]]:
+        """Posts de vários usuários com as mesmas três consultas, agrupados pelo uid do dono"""
+        posts = defaultdict(list)
+        for post in await self.hydrate(await self.owner_rows(owner_uids), viewer_uid):
+            if post["owner"]:
+                posts[str(post["owner"]["uid"])].append(post)
+        return posts
+
+    async def hydrate(self, posts: list[dict], viewer_uid: str) -> list[dict]:
+        """Monta as árvores de comentários e as reações do usuário com uma consulta para cada, independente do tamanho da página"""
+        return await self.personalize(await self.trees(posts), viewer_uid)
+
+    async def trees(self, posts: list[dict]) -> list[dict]:
+        """Posts com as árvores de comentários, iguais para qualquer usuário"""
+        if not posts:
+            return []
+
+        comment_rows = await self.comment_rows([post["uid"] for post in posts])
+
+        children = defaultdict(list)
+        for row in comment_rows:
+            children[(row["root_uid"], row["parent_uid"])].append(to_native(dict(row["post"])))
+
+        def attach(root_uid: str, post: dict) -> dict:
+            post["comments"] = [attach(root_uid, comment) for comment in children.get((root_uid, post["uid"]), [])]
+            return post
+
+        return [attach(post["uid"], to_native(dict(post))) for post in posts]
+
+    async def personalize(self, posts: list[dict], viewer_uid: str) -> list[dict]:
+        """Cópia das árvores com as reações do usuário, sem alterar as originais (que podem estar compartilhadas)"""
+        if not posts:
+            return []
+
+        uids = []
+
+        def collect(post: dict):
+            uids.append(post["uid"])
+            for comment in post["comments"]:
+                collect(comment)
+
+        for post in posts:
+            collect(post)
+        reactions = await self.reactions(viewer_uid, uids)
+
+        def attach(post: dict) -> dict:
+            return {
+                **post,
+                "liked_by_me": (post["uid"], "LIKED") in reactions,
+                "disliked_by_me": (post["uid"], "DISLIKED") in reactions,
+                "comments": [attach(comment) for comment in post["comments"]],
+            }
+
+        return [attach(post) for post in posts]
+
+    async def feed_rows(self, filters: PostFilterSchema) -> list[dict]:
+        values = {"content": filters.content, "content_i": filters.content_i}
+        records = await self.repository.read(feed_query(values), **values)
+        return [record["post"] for record in records]
+
+    async def details_row(self, uid: str) -> dict | None:
+        records = await self.repository.read(DETAILS_QUERY, uid=uid)
+        return records[0]["post"] if records else None
+
+    async def owner_rows(self, owner_uids: list[str]) -> list[dict]:
+        records = await self.repository.read(BY_OWNER_QUERY, owner_uids=owner_uids)
+        return [record["post"] for record in records]
+
+    async def comment_rows(self, uids: list[str]) -> list[dict]:
+        return await self.repository.read(COMMENTS_QUERY, uids=uids)
+
+    async def reactions(self, viewer_uid: str, uids: list[str]) -> set[tuple[str, str]]:
+        records = await self.repository.read(REACTIONS_QUERY, viewer_uid=viewer_uid, uids=list(set(uids)))
+        return {(record["uid"], record["type"]) for record in records}
+
+
+class MemoryPostReadRepository(PostReadRepository):
+    """Mesmas leituras do PostReadRepository sobre o grafo em memória, com uma "consulta" por operação"""
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    def project(self, node_id: int) -> dict:
+        node = self.graph.nodes[node_id]
+        owners = list(self.graph.neighbors(node_id, "OWNS", "INCOMING"))
+        return {
+            **{field: node.props.get(field) for field in ("content", "created_at", "updated_at")},
+            "uid": str(node.props["uid"]),
+            "likes": self.graph.degree(node_id, "LIKED", "INCOMING"),
+            "dislikes": self.graph.degree(node_id, "DISLIKED", "INCOMING"),
+            "owner": self.graph.project(owners[0], USER_MINIMAL_FIELDS) if owners else None,
+        }
+
+    async def feed_rows(self, filters: PostFilterSchema) -> list[dict]:
+        await self.graph.round_trip("memory:feed")
+        return [self.project(node_id) for node_id in self.graph.find("Post", filter_post(filters))]
+
+    async def details_row(self, uid: str) -> dict | None:
+        await self.graph.round_trip("memory:post_details")
+        node_ids = self.graph.find("Post", {"uid": uid})
+        return self.project(node_ids[0]) if node_ids else None
+
+    async def owner_rows(self, owner_uids: list[str]) -> list[dict]:
+        await self.graph.round_trip("memory:posts_by_owner")
+        owners = [node_id for owner_uid in owner_uids for node_id in self.graph.find("User", {"uid": owner_uid})]
+        return [self.project(node_id) for owner in owners for node_id in self.graph.neighbors(owner, "OWNS", "OUTGOING")]
+
+    async def comment_rows(self, uids: list[str]) -> list[dict]:
+        await self.graph.round_trip("memory:comments")
+        rows = []
+        for root_uid in uids:
+            for root in self.graph.find("Post", {"uid": root_uid}):
+                for parent, node_id in self.graph.walk(root, "LINKED_TO", "INCOMING"):
+                    rows.append({"root_uid": root_uid, "parent_uid": str(self.graph.nodes[parent].props["uid"]), "post": self.project(node_id)})
+        return sorted(rows, key=lambda row: row["post"]["created_at"])
+
+    async def reactions(self, viewer_uid: str, uids: list[str]) -> set[tuple[str, str]]:
+        await self.graph.round_trip("memory:reactions")
+        wanted = set(uids)
+        reactions = set()
+        for viewer in self.graph.find("User", {"uid": viewer_uid}):
+            for reaction in ("LIKED", "DISLIKED"):
+                for node_id in self.graph.neighbors(viewer, reaction, "OUTGOING"):
+                    uid = str(self.graph.nodes[node_id].props["uid"])
+                    if uid in wanted:
+                        reactions.add((uid, reaction))
+        return reactions
+
+
+def get_post_reader(request: Request) -> PostReadRepository:
+    if settings.GRAPH_BACKEND == "memory":
+        return MemoryPostReadRepository(request.app.state.memory_graph)
+    return PostReadRepository(get_repository(request))
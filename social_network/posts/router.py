@@ -5,13 +5,28 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import Response
 from pyneo4j_ogm.queries.query_builder import RelationshipMatchDirection
 
+from social_network.core.broker import broker
+from social_network.core.responses import FastJSONRoute
 from social_network.dependencies import get_current_user
-from social_network.posts.filters import filter_post
+from social_network.notifications.aggregator import notification_aggregator
 from social_network.posts.models import Post
+from social_network.posts.repository import PostReadRepository, get_post_reader
 from social_network.posts.schemas import PostBase, PostCreate, PostDetails, PostFilterSchema, PostList, PostUpdate
+from social_network.sync.repository import SyncRepository, get_sync_repository
 from social_network.users.models import User
 
-post_router = APIRouter(prefix="/posts", tags=["posts"])
+post_router = APIRouter(prefix="/posts", tags=["posts"], route_class=FastJSONRoute)
+
+
+def publish_counts(details: PostDetails) -> PostDetails:
+    broker.publish_debounced(f"post:{details.uid}", "counts", {"uid": str(details.uid), "likes": details.likes, "dislikes": details.dislikes})
+    return details
+
+
+async def reaction_changed(post: Post, current_user: User, post_reader: PostReadRepository, sync_repository: SyncRepository) -> PostDetails:
+    # Marca o post para o /sync; reagir não é edição, então updated_at fica como está
+    await sync_repository.touch_reactions(str(post.uid))
+    return publish_counts(await PostDetails.from_post(post, current_user, post_reader))
 
 
 @post_router.get(
@@ -22,24 +37,14 @@ async def get_posts(
     content: str | None = Query(None, description="Busca por conteúdo exato"),
     content_i: str | None = Query(None, description="Busca por conteúdo parecido"),
     current_user: User = Depends(get_current_user),
+    post_reader: PostReadRepository = Depends(get_post_reader),
 ):
-    filters = filter_post(
-        PostFilterSchema(
-            content=content,
-            content_i=content_i,
-        )
-    )
-
-    results = await Post.find_many(
-        filters,
-        auto_fetch_nodes=True,
+    filters = PostFilterSchema(
+        content=content,
+        content_i=content_i,
     )
 
-    for ind, post in enumerate(results):
-        results[ind] = await PostDetails.from_post(post, current_user)
-
-    all_posts = PostList.model_validate({"posts": results})
-    return all_posts
+    return await post_reader.feed(filters, str(current_user.uid))
 
 
 @post_router.post(
@@ -50,7 +55,7 @@ async def get_posts(
         status.HTTP_400_BAD_REQUEST: {"description": "Content can't be empty"},
     },
 )
-async def create_post(post: PostCreate, current_user: User = Depends(get_current_user)):
+async def create_post(post: PostCreate, current_user: User = Depends(get_current_user), post_reader: PostReadRepository = Depends(get_post_reader)):
     db_post: Post = Post(**post.model_dump())
 
     if not post.content.strip():
@@ -60,10 +65,11 @@ async def create_post(post: PostCreate, current_user: User = Depends(get_current
         )
 
     await db_post.create()
-    await db_post.refresh()
     await current_user.posts.connect(db_post)
 
-    return await PostDetails.from_post(db_post, current_user)
+    details = await PostDetails.from_post(db_post, current_user, post_reader)
+    broker.publish(f"user:{current_user.uid}:posts", "post", details.model_dump_json())
+    return details
 
 
 @post_router.get(
@@ -71,18 +77,22 @@ async def create_post(post: PostCreate, current_user: User = Depends(get_current
     response_model=PostDetails,
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "Post not found"},
+        status.HTTP_504_GATEWAY_TIMEOUT: {"description": "Timed out loading the post"},
     },
 )
-async def get_post_by_id(post_id: str, current_user: User = Depends(get_current_user)):
-    post_db = await Post.find_one({"uid": post_id}, auto_fetch_nodes=True)
+async def get_post_by_id(post_id: str, current_user: User = Depends(get_current_user), post_reader: PostReadRepository = Depends(get_post_reader)):
+    try:
+        post = await post_reader.details(post_id, str(current_user.uid), coalesce=True)
+    except TimeoutError:
+        raise HTTPException(status.HTTP_504_GATEWAY_TIMEOUT, "Timed out loading post") from None
 
-    if not post_db:
+    if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found!",
         )
 
-    return await PostDetails.from_post(post_db, current_user)
+    return post
 
 
 @post_router.put(
@@ -93,7 +103,7 @@ async def get_post_by_id(post_id: str, current_user: User = Depends(get_current_
         status.HTTP_400_BAD_REQUEST: {"description": "User doesn't owns that post"},
     },
 )
-async def update_post(post_id: str, post_update: PostUpdate, current_user: User = Depends(get_current_user)):
+async def update_post(post_id: str, post_update: PostUpdate, current_user: User = Depends(get_current_user), post_reader: PostReadRepository = Depends(get_post_reader)):
     exist_post: Post = await Post.find_one({"uid": post_id}, auto_fetch_nodes=True)
 
     if not exist_post:
@@ -115,7 +125,7 @@ async def update_post(post_id: str, post_update: PostUpdate, current_user: User
     await exist_post.update()
     await exist_post.refresh()
 
-    return await PostDetails.from_post(exist_post, current_user)
+    return await PostDetails.from_post(exist_post, current_user, post_reader)
 
 
 @post_router.delete(
@@ -125,7 +135,7 @@ async def update_post(post_id: str, post_update: PostUpdate, current_user: User
         status.HTTP_404_NOT_FOUND: {"description": "Post not found"},
     },
 )
-async def delete_post(post_id: str, current_user: User = Depends(get_current_user)):
+async def delete_post(post_id: str, current_user: User = Depends(get_current_user), sync_repository: SyncRepository = Depends(get_sync_repository)):
     exist_post = await Post.find_one({"uid": post_id})
 
     if not exist_post:
@@ -147,6 +157,7 @@ async def delete_post(post_id: str, current_user: User = Depends(get_current_use
         await post.delete()
 
     await exist_post.delete()
+    await sync_repository.record_deletions([post_id, *(str(post.uid) for post in comments)])
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -159,7 +170,7 @@ async def delete_post(post_id: str, current_user: User = Depends(get_current_use
         status.HTTP_404_NOT_FOUND: {"description": "Post not found"},
     },
 )
-async def comment_post(post_id: str, post: PostCreate, current_user: User = Depends(get_current_user)):
+async def comment_post(post_id: str, post: PostCreate, current_user: User = Depends(get_current_user), post_reader: PostReadRepository = Depends(get_post_reader)):
     to_be_commented_post = await Post.find_one({"uid": post_id}, auto_fetch_nodes=True)
 
     if not to_be_commented_post:
@@ -176,10 +187,11 @@ async def comment_post(post_id: str, post: PostCreate, current_user: User = Depe
     await db_post.create()
     await current_user.posts.connect(db_post)
     await db_post.linked_to.connect(to_be_commented_post)
-    await db_post.refresh()
-    await db_post.owner.find_connected_nodes(auto_fetch_nodes=True)
+    notification_aggregator.record("reply", str(current_user.uid), post_uid=post_id)
 
-    return await PostDetails.from_post(db_post, current_user)
+    details = await PostDetails.from_post(db_post, current_user, post_reader)
+    broker.publish(f"post:{post_id}", "comment", {"post_uid": post_id, "comment": details.model_dump(mode="json")})
+    return details
 
 
 @post_router.post(
@@ -191,7 +203,12 @@ async def comment_post(post_id: str, post: PostCreate, current_user: User = Depe
         status.HTTP_400_BAD_REQUEST: {"description": "Post already disliked!"},
     },
 )
-async def dislike_post(post_id: str, current_user: User = Depends(get_current_user)):
+async def dislike_post(
+    post_id: str,
+    current_user: User = Depends(get_current_user),
+    post_reader: PostReadRepository = Depends(get_post_reader),
+    sync_repository: SyncRepository = Depends(get_sync_repository),
+):
     post_db = await Post.find_one({"uid": post_id}, auto_fetch_nodes=True)
 
     if not post_db:
@@ -200,8 +217,7 @@ async def dislike_post(post_id: str, current_user: User = Depends(get_current_us
     already_disliked = len(await current_user.dilikes.find_connected_nodes({"uid": post_id})) > 0
     if already_disliked:
         await current_user.dilikes.disconnect(post_db)
-        await post_db.refresh()
-        return await PostDetails.from_post(post_db, current_user)
+        return await reaction_changed(post_db, current_user, post_reader, sync_repository)
 
     liked = len(await current_user.likes.find_connected_nodes({"uid": post_id}))
 
@@ -209,10 +225,8 @@ async def dislike_post(post_id: str, current_user: User = Depends(get_current_us
         await current_user.likes.disconnect(post_db)
 
     await current_user.dilikes.connect(post_db)
-    await current_user.refresh()
 
-    await post_db.refresh()
-    return await PostDetails.from_post(post_db, current_user)
+    return await reaction_changed(post_db, current_user, post_reader, sync_repository)
 
 
 @post_router.post(
@@ -224,7 +238,12 @@ async def dislike_post(post_id: str, current_user: User = Depends(get_current_us
         status.HTTP_404_NOT_FOUND: {"description": "Post not found"},
     },
 )
-async def like_post(post_id: str, current_user: User = Depends(get_current_user)):
+async def like_post(
+    post_id: str,
+    current_user: User = Depends(get_current_user),
+    post_reader: PostReadRepository = Depends(get_post_reader),
+    sync_repository: SyncRepository = Depends(get_sync_repository),
+):
     post_db = await Post.find_one({"uid": post_id}, auto_fetch_nodes=True)
 
     if not post_db:
@@ -234,8 +253,7 @@ async def like_post(post_id: str, current_user: User = Depends(get_current_user)
 
     if already_liked:
         await current_user.likes.disconnect(post_db)
-        await post_db.refresh()
-        return await PostDetails.from_post(post_db, current_user)
+        return await reaction_changed(post_db, current_user, post_reader, sync_repository)
 
     disliked = len(await current_user.dilikes.find_connected_nodes({"uid": post_id}))
 
@@ -243,7 +261,6 @@ async def like_post(post_id: str, current_user: User = Depends(get_current_user)
         await current_user.dilikes.disconnect(post_db)
 
     await current_user.likes.connect(post_db)
-    await current_user.refresh()
-    await post_db.refresh()
+    notification_aggregator.record("like", str(current_user.uid), post_uid=post_id)
 
-    return await PostDetails.from_post(post_db, current_user)
+    return await reaction_changed(post_db, current_user, post_reader, sync_repository)
@@ -1,18 +1,19 @@
 from datetime import datetime
-from typing import Self
+from typing import TYPE_CHECKING, Self
 from uuid import UUID
 
 from fastapi import Depends
 import neo4j
 import neo4j.time
 from pydantic import BaseModel, Field
-from pyneo4j_ogm.queries.query_builder import RelationshipMatchDirection
 
 from social_network.core.schemas import OrmModel
 from social_network.dependencies import get_current_user
 from social_network.posts.models import Post
 from social_network.users.models import User
-from social_network.users.schemas import UserPublic
+
+if TYPE_CHECKING:
+    from social_network.posts.repository import PostReadRepository
 
 
 class UserMinimal(OrmModel):
@@ -21,6 +22,8 @@ class UserMinimal(OrmModel):
     bio: str
     username: str
     full_name: str
+    # PageRank nos follows (média 1.0), recalculado periodicamente; None até a primeira rodada
+    influence: float | None = None
 
 
 class PostUpdate(OrmModel):
@@ -77,70 +80,9 @@ class PostDetails(OrmModel):
     comments: list["Self"] | None
 
     @classmethod
-    async def from_post(cls, post: Post, current_user: User):
-        # Carrega dados principais do post
-        owners_raw = await post.owner.find_connected_nodes()
-        owner = await UserPublic.from_user(owners_raw[0] if owners_raw else None, current_user)
-
-        async def count_reactions(node, reaction_type):
-            return await node.count(
-                {
-                    "uid": str(node.uid),
-                    "$patterns": [
-                        {
-                            "$relationship": {"$type": reaction_type},
-                            "$exists": True,
-                            "$direction": RelationshipMatchDirection.INCOMING,
-                        }
-                    ],
-                }
-            )
-
-        async def load_comments_recursive(comment_post):
-            owners_raw = await post.owner.find_connected_nodes()
-            comment_owner = await UserPublic.from_user(owners_raw[0] if owners_raw else None, current_user)
-            likes = await count_reactions(comment_post, "LIKED")
-            dislikes = await count_reactions(comment_post, "DISLIKED")
-
-            # Carrega subcomentários
-            sub_comments = await comment_post.find_connected_nodes(
-                {
-                    "$node": {"$labels": ["Post"]},
-                    "$direction": RelationshipMatchDirection.INCOMING,
-                    "$relationships": [{"$type": "LINKED_TO"}],
-                    "$maxHops": 1,
-                }
-            )
-
-            # Constrói o comentário com os campos obrigatórios
-            return cls(
-                **comment_post.model_dump(exclude=["comments", "owner"]),
-                owner=comment_owner,
-                likes=likes,
-                dislikes=dislikes,
-                liked_by_me=bool(await current_user.likes.find_connected_nodes({"uid": str(comment_post.uid)})),
-                disliked_by_me=bool(await current_user.dilikes.find_connected_nodes({"uid": str(comment_post.uid)})),
-                comments=[await load_comments_recursive(sub_comment) for sub_comment in sub_comments],
-            )
-
-        top_comments = await post.find_connected_nodes(
-            {
-                "$node": {"$labels": ["Post"]},
-                "$direction": RelationshipMatchDirection.INCOMING,
-                "$relationships": [{"$type": "LINKED_TO"}],
-                "$maxHops": 1,
-            }
-        )
-
-        return cls(
-            **post.model_dump(exclude=["comments", "owner"]),
-            comments=[await load_comments_recursive(comment) for comment in top_comments],
-            owner=owner,
-            liked_by_me=bool(await current_user.likes.find_connected_nodes({"uid": str(post.uid)})),
-            disliked_by_me=bool(await current_user.dilikes.find_connected_nodes({"uid": str(post.uid)})),
-            likes=await count_reactions(post, "LIKED"),
-            dislikes=await count_reactions(post, "DISLIKED"),
-        )
+    async def from_post(cls, post: Post, current_user: User, reader: "PostReadRepository"):
+        # Post, dono, comentários e reações vêm das consultas em lote do repositório de leitura
+        return await reader.details(str(post.uid), str(current_user.uid))
 
 
 class PostDetailsWithoutOwner(OrmModel):
@@ -155,63 +97,9 @@ class PostDetailsWithoutOwner(OrmModel):
     comments: list["Self"] | None
 
     @classmethod
-    async def from_post(cls, post: Post, user_owner: User):
-        async def count_reactions(node, reaction_type):
-            return await node.count(
-                {
-                    "uid": str(node.uid),
-                    "$patterns": [
-                        {
-                            "$relationship": {"$type": reaction_type},
-                            "$exists": True,
-                            "$direction": RelationshipMatchDirection.INCOMING,
-                        }
-                    ],
-                }
-            )
-
-        async def load_comments_recursive(comment_post):
-            comment_owner = await UserPublic.from_user(user_owner)
-            likes = await count_reactions(comment_post, "LIKED")
-            dislikes = await count_reactions(comment_post, "DISLIKED")
-
-            # Carrega subcomentários
-            sub_comments = await comment_post.find_connected_nodes(
-                {
-                    "$node": {"$labels": ["Post"]},
-                    "$direction": RelationshipMatchDirection.INCOMING,
-                    "$relationships": [{"$type": "LINKED_TO"}],
-                }
-            )
-
-            # Constrói o comentário com os campos obrigatórios
-            return cls(
-                **comment_post.model_dump(exclude=["comments", "owner"]),
-                owner=comment_owner,
-                likes=likes,
-                dislikes=dislikes,
-                liked_by_me=False,
-                disliked_by_me=False,
-                comments=[await load_comments_recursive(sub_comment) for sub_comment in sub_comments],
-            )
-
-        # Carrega dados principais do post
-        top_comments = await post.find_connected_nodes(
-            {
-                "$node": {"$labels": ["Post"]},
-                "$direction": RelationshipMatchDirection.INCOMING,
-                "$relationships": [{"$type": "LINKED_TO"}],
-            }
-        )
-
-        return cls(
-            **post.model_dump(exclude=["comments"]),
-            comments=[await load_comments_recursive(comment) for comment in top_comments],
-            liked_by_me=bool(await user_owner.likes.find_connected_nodes({"uid": str(post.uid)})),
-            disliked_by_me=bool(await user_owner.dilikes.find_connected_nodes({"uid": str(post.uid)})),
-            likes=await count_reactions(post, "LIKED"),
-            dislikes=await count_reactions(post, "DISLIKED"),
-        )
+    async def from_post(cls, post: Post, user_owner: User, reader: "PostReadRepository"):
+        details = await reader.details(str(post.uid), str(user_owner.uid))
+        return cls.model_validate(details)
 
 
 class PostFilterSchema(BaseModel):
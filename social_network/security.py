@@ -1,11 +1,17 @@
-from pwdlib import PasswordHash
+from functools import cache
 
-pwd_context = PasswordHash.recommended()
+
+@cache
+def password_hasher():
+    # O argon2 só é carregado no primeiro cadastro/login, fora do caminho de boot
+    from pwdlib import PasswordHash
+
+    return PasswordHash.recommended()
 
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return password_hasher().hash(password)
 
 
 def verify_password(unhashed_password: str, hashed_password: str):
-    return pwd_context.verify(unhashed_password, hashed_password)
+    return password_hasher().verify(unhashed_password, hashed_password)
@@ -0,0 +1,80 @@
+"""
+Servidor de produção: `python -m social_network.server`.
+
+Sobe o uvicorn com uvloop e httptools e um worker por CPU disponível para o processo (ou
+`SERVER_WORKERS`), com backlog e keep-alive vindos do Settings. O app é importado no processo
+principal antes de criar os workers, então erro de importação ou de configuração derruba o servidor
+na hora em vez de ficar reiniciando worker. O mesmo vale para vários workers com `BROKER_BACKEND=local`,
+que entregaria os eventos do /stream só para as conexões do worker que os gerou.
+
+Com vários workers as métricas vêm de um diretório compartilhado (`METRICS_DIR`, ou um temporário), limpo
+aqui antes de criar os workers: cada um grava as suas e o /metrics de qualquer worker soma todas.
+
+No SIGTERM cada worker para de aceitar conexões, espera as requisições em andamento terminarem (até
+`SERVER_GRACEFUL_TIMEOUT` segundos) e só então roda o shutdown do lifespan, que fecha o Pyneo4jClient.
+"""
+
+import glob
+import os
+import tempfile
+
+import uvicorn
+
+from social_network.settings import settings
+
+APP = "social_network.main:app"
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def server_config() -> dict:
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.PORT,
+        "workers": settings.SERVER_WORKERS or available_cpus(),
+        "loop": "uvloop",
+        "http": "httptools",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE_SECONDS,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+    }
+
+
+def check_broker(workers: int):
+    if workers > 1 and settings.BROKER_BACKEND == "local":
+        raise RuntimeError(f"BROKER_BACKEND=local cannot deliver events across {workers} workers; set BROKER_BACKEND=redis or SERVER_WORKERS=1")
+
+
+def share_metrics(workers: int) -> str | None:
+    """Prepara o diretório de métricas dos workers; os processos filhos o recebem pela variável de ambiente"""
+    if workers == 1:
+        return None
+    directory = settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), f"social_network_metrics_{settings.PORT}")
+    os.makedirs(directory, exist_ok=True)
+    # Arquivos de uma execução anterior somariam contadores de processos que não existem mais
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+    os.environ["METRICS_DIR"] = directory
+    return directory
+
+
+def main():
+    from social_network.main import app
+
+    config = server_config()
+    check_broker(config["workers"])
+    share_metrics(config["workers"])
+    print(f"🚀 Iniciando {config['workers']} workers em {config['host']}:{config['port']}")
+    # Com um worker só o app já importado é usado direto; com vários cada worker importa o seu
+    uvicorn.run(app if config["workers"] == 1 else APP, **config)
+
+
+if __name__ == "__main__":
+    main()
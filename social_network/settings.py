@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,13 +14,151 @@ class Settings(BaseSettings):
 
     PORT: int = 8000
 
+    # Servidor de produção (python -m social_network.server); SERVER_WORKERS=0 usa um worker por CPU
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    # Maior que o keep-alive do proxy na frente, para o proxy nunca reaproveitar uma conexão que o uvicorn já fechou
+    SERVER_KEEP_ALIVE_SECONDS: int = 75
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SERVER_ACCESS_LOG: bool = False
+    # Métricas somadas entre workers (ver core/metrics.py); com mais de um worker o servidor usa este
+    # diretório, ou um temporário se vazio
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 5.0
+
     NEO_PASSWORD: str
     NEO_PORT: int = 7687
     NEO_URL: str | None = None
 
+    # Pool de conexões do driver Neo4j
+    NEO_MAX_CONNECTION_POOL_SIZE: int = 100
+    NEO_CONNECTION_ACQUISITION_TIMEOUT: float = 60.0
+    NEO_MAX_CONNECTION_LIFETIME: float = 3600.0
+    NEO_FETCH_SIZE: int = 1000
+    # Tempo máximo que execute_read/execute_write repetem a transação em erros transitórios
+    NEO_MAX_TRANSACTION_RETRY_SECONDS: float = 5.0
+
+    # Conexão no boot: backoff exponencial com jitter até o prazo, depois o processo falha
+    NEO_CONNECT_TIMEOUT: float = 60.0
+    NEO_CONNECT_BACKOFF_INITIAL: float = 0.25
+    NEO_CONNECT_BACKOFF_MAX: float = 5.0
+    # Reaplica os índices mesmo com o marcador de versão do schema em dia
+    NEO_FORCE_SCHEMA_BOOTSTRAP: bool = False
+
+    # "memory" troca o Neo4j por um grafo em memória (testes e benchmarks locais)
+    GRAPH_BACKEND: Literal["neo4j", "memory"] = "neo4j"
+    MEMORY_QUERY_LATENCY_MS: float = 0.0
+
+    # Importação em massa (python -m social_network.bulk)
+    BULK_BATCH_SIZE: int = 5000
+    BULK_WORKERS: int = 4
+
+    # Jobs em segundo plano (core/jobs.py); com JOBS_OUTBOX os jobs pendentes ficam salvos no Neo4j
+    JOBS_WORKERS: int = 4
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_QUEUE_SIZE: int = 10000
+    JOBS_OUTBOX: bool = False
+    JOBS_LEASE_SECONDS: float = 300.0
+    JOBS_SWEEP_INTERVAL_SECONDS: float = 60.0
+    JOBS_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Notificações: eventos iguais são agrupados em memória e gravados no inbox em lote a cada intervalo
+    NOTIFICATIONS_FLUSH_INTERVAL_SECONDS: float = 2.0
+    NOTIFICATIONS_FLUSH_SIZE: int = 500
+
+    # Atualizações ao vivo (/stream): fila por conexão, janela das contagens e heartbeat
+    STREAM_QUEUE_SIZE: int = 256
+    STREAM_DEBOUNCE_SECONDS: float = 1.0
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_RETRY_MS: int = 3000
+    STREAM_MAX_WATCHED_POSTS: int = 50
+    # "redis" repassa as publicações entre workers (precisa do pacote redis)
+    BROKER_BACKEND: Literal["local", "redis"] = "local"
+    BROKER_REDIS_URL: str = "redis://redis:6379/0"
+
+    # Jobs de grafo (social_network/graph): páginas da leitura dos follows e usuários por escrita em lote
+    GRAPH_PAGE_SIZE: int = 100000
+    GRAPH_WRITE_BATCH_SIZE: int = 10000
+    # PageRank dos follows gravado em User.influence; 0 desliga o agendamento
+    INFLUENCE_REFRESH_SECONDS: float = 3600.0
+    INFLUENCE_DAMPING: float = 0.85
+    INFLUENCE_TOLERANCE: float = 1e-5
+    INFLUENCE_MAX_ITERATIONS: int = 100
+    # Comunidades por propagação de rótulos gravadas em User.community; 0 desliga o agendamento. Acima de
+    # COMMUNITY_FULL_FRACTION dos usuários afetados desde a última rodada o grafo inteiro é recalculado
+    COMMUNITY_REFRESH_SECONDS: float = 86400.0
+    COMMUNITY_MAX_ITERATIONS: int = 20
+    COMMUNITY_FULL_FRACTION: float = 0.25
+    COMMUNITY_STATE_PATH: str = "data/communities.npz"
+    # Snapshot dos follows mapeado em memória pelos workers; 0 desliga a reconstrução periódica
+    GRAPH_SNAPSHOT_PATH: str = "data/follows.snapshot"
+    GRAPH_SNAPSHOT_REFRESH_SECONDS: float = 600.0
+    GRAPH_SNAPSHOT_CHECK_SECONDS: float = 5.0
+
+    # Espera máxima por uma leitura compartilhada (single-flight) de /posts/{id} e /users/{username}, e por
+    # quanto tempo depois de uma escrita o usuário lê sozinho, para ver a própria escrita
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 10.0
+    SINGLEFLIGHT_AFTER_WRITE_SECONDS: float = 10.0
+
+    # /sync: itens por página, recuo do token para escritas em andamento e por quanto tempo os posts
+    # apagados ficam registrados (tokens mais antigos que isso recebem 410 e sincronizam do zero)
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_TOKEN_LAG_SECONDS: float = 5.0
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    SYNC_PRUNE_INTERVAL_SECONDS: float = 86400.0
+
+    # Exportação do grafo (python -m social_network.bulk export e /admin/exports)
+    EXPORT_DIR: str = "exports"
+    EXPORT_PAGE_SIZE: int = 10000
+
+    # Usuários com acesso às rotas /admin
+    ADMIN_USERNAMES: list[str] = []
+
+    # Serializa os response_model direto para JSON pelo Pydantic, sem o dicionário intermediário
+    FAST_JSON_RESPONSES: bool = False
+
+    # Compressão das respostas: tamanho mínimo, tamanho a partir do qual comprime numa thread e ordem de preferência
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_THREAD_SIZE: int = 262144
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+
+    # Controle de admissão (core/admission.py): limites de requisições em andamento por classe de rota e
+    # limiares de atraso do event loop / espera por conexão do pool a partir dos quais as classes são recusadas
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: dict[str, int] = {"auth": 32, "expensive": 64, "read": 512, "write": 256, "stream": 20000}
+    ADMISSION_LAG_SOFT_MS: float = 100.0
+    ADMISSION_LAG_HARD_MS: float = 500.0
+    ADMISSION_POOL_WAIT_SOFT_MS: float = 50.0
+    ADMISSION_POOL_WAIT_HARD_MS: float = 1000.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+
+    # Profiler por amostragem (core/profiler.py): guarda o perfil das requisições acima do limite e de uma
+    # fração sorteada delas; a amostragem de cada requisição só começa depois de PROFILER_START_AFTER_MS
+    PROFILER_ENABLED: bool = True
+    PROFILER_THRESHOLD_MS: float = 1000.0
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_START_AFTER_MS: float = 50.0
+    PROFILER_RING_SIZE: int = 50
+
+    # Avisa quando a mesma consulta roda mais que isso numa única requisição
+    N_PLUS_ONE_THRESHOLD: int = 10
+
     @property
     def neo4j_url(self):
         return self.NEO_URL if self.NEO_URL else f"bolt://neo4j:{self.NEO_PORT}"
 
+    @property
+    def neo4j_driver_options(self):
+        return {
+            "max_connection_pool_size": self.NEO_MAX_CONNECTION_POOL_SIZE,
+            "connection_acquisition_timeout": self.NEO_CONNECTION_ACQUISITION_TIMEOUT,
+            "max_connection_lifetime": self.NEO_MAX_CONNECTION_LIFETIME,
+            "fetch_size": self.NEO_FETCH_SIZE,
+            "max_transaction_retry_time": self.NEO_MAX_TRANSACTION_RETRY_SECONDS,
+        }
+
 
 settings = Settings()
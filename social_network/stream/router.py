@@ -0,0 +1,88 @@
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from jwt import InvalidTokenError
+
+from social_network.auth.auth_handler import decode_jwt
+from social_network.core.broker import Subscription, broker, wait_message
+from social_network.dependencies import get_current_user
+from social_network.graph.snapshot import follow_snapshot
+from social_network.settings import settings
+from social_network.users.models import User
+
+stream_router = APIRouter(prefix="/stream", tags=["stream"])
+
+WatchQuery = Query([], description="Posts acompanhados: comentários novos e contagens de reações")
+
+
+async def subscribe(user: User, watch: list[str]) -> Subscription:
+    if len(watch) > settings.STREAM_MAX_WATCHED_POSTS:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Can't watch more than {settings.STREAM_MAX_WATCHED_POSTS} posts")
+
+    # Quem o usuário segue é lido uma vez na conexão, do snapshot quando há um; novos follows entram na próxima reconexão
+    following = follow_snapshot.following(str(user.uid))
+    if following is None:
+        following = [str(followed.uid) for followed in await user.following.find_connected_nodes()]
+    topics = {f"user:{followed_uid}:posts" for followed_uid in following} | {f"post:{post_uid}" for post_uid in watch}
+    return broker.subscribe(topics)
+
+
+async def events(subscription: Subscription) -> AsyncIterator[bytes]:
+    with subscription:
+        yield f"retry: {settings.STREAM_RETRY_MS}\nevent: ready\ndata: {{}}\n\n".encode()
+        while True:
+            message = await wait_message(subscription, settings.STREAM_HEARTBEAT_SECONDS)
+            # Comentário SSE: mantém a conexão viva em proxies que derrubam conexões ociosas
+            yield message.sse if message is not None else b": ping\n\n"
+
+
+@stream_router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Too many watched posts"},
+    },
+)
+async def stream(watch: list[str] = WatchQuery, current_user: User = Depends(get_current_user)):
+    subscription = await subscribe(current_user, watch)
+    return StreamingResponse(
+        events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def websocket_user(token: str | None) -> User | None:
+    try:
+        decoded_token = decode_jwt(token) if token else None
+    except InvalidTokenError:
+        return None
+    if not decoded_token or not decoded_token.get("user_id"):
+        return None
+    return await User.find_one({"username": decoded_token["user_id"]})
+
+
+@stream_router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, token: str | None = None, watch: list[str] = WatchQuery):
+    """Mesmos eventos do /stream em WebSocket; o token vai na query string porque o navegador não manda headers"""
+    user = await websocket_user(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        subscription = await subscribe(user, watch)
+    except HTTPException as error:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+        return
+
+    await websocket.accept()
+    with subscription:
+        try:
+            while True:
+                message = await wait_message(subscription, settings.STREAM_HEARTBEAT_SECONDS)
+                await websocket.send_text(message.text if message is not None else '{"event": "ping"}')
+        except WebSocketDisconnect:
+            pass
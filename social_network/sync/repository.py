@@ -0,0 +1,211 @@
+"""
+Mudanças desde um instante, para o /sync dos clientes offline.
+
+Posts e comentários novos ou editados saem do índice de `Post.updated_at`. Contagens de reações
+mudam sem editar o post, então curtir e descurtir marcam `Post.reacted_at`. Posts apagados deixam um
+nó `Tombstone` com o uid e `deleted_at`, removido depois de `SYNC_TOMBSTONE_RETENTION_DAYS`; um token
+mais antigo que isso não pode mais ser atendido e o cliente sincroniza do zero.
+
+A posição de leitura é um par (instante, uid), em ordem crescente dos dois: vários itens podem ter o mesmo
+instante (um post apagado e os comentários dele, uma importação em massa), e só o uid garante que a
+próxima página começa depois da anterior. O `>=` no instante mantém a busca no índice de intervalo; o uid
+só desempata dentro do mesmo instante.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, Request
+
+from social_network.core.jobs import job_runner
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository
+from social_network.dependencies import get_repository_for
+from social_network.posts.repository import POST_PROJECTION, MemoryPostReadRepository, to_native
+from social_network.settings import settings
+
+logger = logging.getLogger(__name__)
+
+TOMBSTONE_PRUNE_JOB = "sync.prune_tombstones"
+
+SYNC_POST_RETURN = f"RETURN {POST_PROJECTION} AS post, [(p)-[:LINKED_TO]->(parent:Post) | parent.uid][0] AS parent_uid"
+
+# Sem token (primeira sincronização) todos os posts; com token, consultas separadas, porque um único plano
+# com `$since IS NULL OR ...` não usa o índice de intervalo para nenhum valor de $since
+ALL_POSTS_QUERY = f"""
+MATCH (p:Post)
+WITH p ORDER BY p.updated_at, p.uid LIMIT $limit
+{SYNC_POST_RETURN}
+"""
+
+CHANGED_POSTS_QUERY = f"""
+MATCH (p:Post)
+WHERE p.updated_at >= $since AND (p.updated_at > $since OR p.uid > $after_uid)
+WITH p ORDER BY p.updated_at, p.uid LIMIT $limit
+{SYNC_POST_RETURN}
+"""
+
+CHANGED_REACTIONS_QUERY = """
+MATCH (p:Post)
+WHERE p.reacted_at >= $since AND (p.reacted_at > $since OR p.uid > $after_uid)
+WITH p ORDER BY p.reacted_at, p.uid LIMIT $limit
+RETURN p.uid AS uid, COUNT { (p)<-[:LIKED]-(:User) } AS likes, COUNT { (p)<-[:DISLIKED]-(:User) } AS dislikes, p.reacted_at AS at
+"""
+
+TOMBSTONES_QUERY = """
+MATCH (t:Tombstone)
+WHERE t.deleted_at >= $since AND (t.deleted_at > $since OR t.uid > $after_uid)
+WITH t ORDER BY t.deleted_at, t.uid LIMIT $limit
+RETURN t.uid AS uid, t.deleted_at AS at
+"""
+
+RECORD_DELETIONS_QUERY = """
+UNWIND $uids AS uid
+MERGE (t:Tombstone {uid: uid})
+SET t.deleted_at = $at
+"""
+
+TOUCH_REACTIONS_QUERY = "MATCH (p:Post {uid: $uid}) SET p.reacted_at = $at"
+
+PRUNE_TOMBSTONES_QUERY = """
+MATCH (t:Tombstone)
+WHERE t.deleted_at < $before
+WITH t LIMIT $batch_size
+DELETE t
+RETURN count(t) AS deleted
+"""
+
+
+# Posição de leitura do /sync: (instante, uid) do último item entregue
+Cursor = tuple[datetime, str]
+
+
+def native(value):
+    return value.to_native() if hasattr(value, "to_native") else value
+
+
+class SyncRepository:
+    def __init__(self, repository: GraphRepository):
+        self.repository = repository
+
+    async def changed_posts(self, after: Cursor | None, limit: int) -> list[dict]:
+        """Posts e comentários criados ou editados depois de `after`, do mais antigo para o mais novo"""
+        if after is None:
+            records = await self.repository.read(ALL_POSTS_QUERY, limit=limit)
+        else:
+            records = await self.repository.read(CHANGED_POSTS_QUERY, since=after[0], after_uid=after[1], limit=limit)
+        return [{**to_native(dict(record["post"])), "parent_uid": record["parent_uid"]} for record in records]
+
+    async def changed_reactions(self, after: Cursor, limit: int) -> list[dict]:
+        records = await self.repository.read(CHANGED_REACTIONS_QUERY, since=after[0], after_uid=after[1], limit=limit)
+        return [{**dict(record), "at": native(record["at"])} for record in records]
+
+    async def tombstones(self, after: Cursor, limit: int) -> list[dict]:
+        records = await self.repository.read(TOMBSTONES_QUERY, since=after[0], after_uid=after[1], limit=limit)
+        return [{"uid": record["uid"], "at": native(record["at"])} for record in records]
+
+    async def record_deletions(self, uids: list[str]):
+        await self.repository.write(RECORD_DELETIONS_QUERY, uids=uids, at=datetime.now())
+
+    async def touch_reactions(self, uid: str):
+        await self.repository.write(TOUCH_REACTIONS_QUERY, uid=uid, at=datetime.now())
+
+    async def prune(self, before: datetime, batch_size: int = 10_000) -> int:
+        """Apaga os tombstones anteriores a `before` em lotes, para não segurar uma transação enorme"""
+        total = 0
+        while True:
+            records = await self.repository.write(PRUNE_TOMBSTONES_QUERY, before=before, batch_size=batch_size)
+            deleted = records[0]["deleted"] if records else 0
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+
+class MemorySyncRepository(SyncRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+        self.posts = MemoryPostReadRepository(graph)
+
+    def changed(self, label: str, field: str, after: Cursor | None, limit: int) -> list[int]:
+        def position(node_id: int) -> Cursor:
+            props = self.graph.nodes[node_id].props
+            return props[field], str(props["uid"])
+
+        node_ids = [node.id for node in self.graph.nodes.values() if node.label == label and node.props.get(field) is not None]
+        return sorted((node_id for node_id in node_ids if after is None or position(node_id) > after), key=position)[:limit]
+
+    async def changed_posts(self, after: Cursor | None, limit: int) -> list[dict]:
+        await self.graph.round_trip("memory:sync_posts")
+        return [
+            {**self.posts.project(node_id), "parent_uid": next((str(self.graph.nodes[parent].props["uid"]) for parent in self.graph.neighbors(node_id, "LINKED_TO", "OUTGOING")), None)}
+            for node_id in self.changed("Post", "updated_at", after, limit)
+        ]
+
+    async def changed_reactions(self, after: Cursor, limit: int) -> list[dict]:
+        await self.graph.round_trip("memory:sync_reactions")
+        rows = []
+        for node_id in self.changed("Post", "reacted_at", after, limit):
+            post = self.posts.project(node_id)
+            rows.append({"uid": post["uid"], "likes": post["likes"], "dislikes": post["dislikes"], "at": self.graph.nodes[node_id].props["reacted_at"]})
+        return rows
+
+    async def tombstones(self, after: Cursor, limit: int) -> list[dict]:
+        await self.graph.round_trip("memory:sync_tombstones")
+        return [{"uid": self.graph.nodes[node_id].props["uid"], "at": self.graph.nodes[node_id].props["deleted_at"]} for node_id in self.changed("Tombstone", "deleted_at", after, limit)]
+
+    async def record_deletions(self, uids: list[str]):
+        await self.graph.round_trip("memory:sync_record_deletions")
+        at = datetime.now()
+        for uid in uids:
+            node_ids = self.graph.find("Tombstone", {"uid": uid})
+            if node_ids:
+                self.graph.update_node(node_ids[0], {"deleted_at": at})
+            else:
+                self.graph.add_node("Tombstone", {"uid": uid, "deleted_at": at})
+
+    async def touch_reactions(self, uid: str):
+        await self.graph.round_trip("memory:sync_touch_reactions")
+        for node_id in self.graph.find("Post", {"uid": uid}):
+            self.graph.update_node(node_id, {"reacted_at": datetime.now()})
+
+    async def prune(self, before: datetime, batch_size: int = 10_000) -> int:
+        await self.graph.round_trip("memory:sync_prune")
+        node_ids = [node.id for node in list(self.graph.nodes.values()) if node.label == "Tombstone" and node.props["deleted_at"] < before]
+        for node_id in node_ids:
+            self.graph.delete_node(node_id)
+        return len(node_ids)
+
+
+class TombstonePruner:
+    def __init__(self, retention: timedelta, interval: float = 86400.0):
+        self.retention = retention
+        self.interval = interval
+        self.repository: SyncRepository | None = None
+
+    def start(self, repository: SyncRepository):
+        self.repository = repository
+        if self.interval > 0:
+            job_runner.every(TOMBSTONE_PRUNE_JOB, self.interval, delay=self.interval)
+
+    async def prune(self) -> int:
+        deleted = await self.repository.prune(datetime.now() - self.retention)
+        logger.info("Tombstones do /sync: %d removidos", deleted)
+        return deleted
+
+
+tombstone_pruner = TombstonePruner(timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS), interval=settings.SYNC_PRUNE_INTERVAL_SECONDS)
+
+
+@job_runner.handler(TOMBSTONE_PRUNE_JOB)
+async def prune_tombstones(payload: dict):
+    await tombstone_pruner.prune()
+
+
+def get_sync_repository_for(app: FastAPI) -> SyncRepository:
+    if settings.GRAPH_BACKEND == "memory":
+        return MemorySyncRepository(app.state.memory_graph)
+    return SyncRepository(get_repository_for(app.state.neo4j_client))
+
+
+def get_sync_repository(request: Request) -> SyncRepository:
+    return get_sync_repository_for(request.app)
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from social_network.core.responses import FastJSONRoute
+from social_network.dependencies import get_current_user
+from social_network.posts.repository import PostReadRepository, get_post_reader
+from social_network.settings import settings
+from social_network.sync.repository import Cursor, SyncRepository, get_sync_repository
+from social_network.sync.schemas import SyncChanges
+from social_network.users.models import User
+
+sync_router = APIRouter(prefix="/sync", tags=["sync"], route_class=FastJSONRoute)
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_micros(at: datetime) -> str:
+    # Microssegundos inteiros desde a época: sem passar por float, o instante volta exatamente igual
+    return f"{(at - EPOCH) // timedelta(microseconds=1):x}"
+
+
+def from_micros(value: str) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value, 16))
+
+
+def encode_token(at: datetime, uid: str = "", started: datetime | None = None) -> str:
+    """`started` marca a continuação de uma sincronização do zero, que ainda não chegou ao fim dos posts"""
+    token = f"{to_micros(at)}.{uid}"
+    return f"{token}.{to_micros(started)}" if started is not None else token
+
+
+def decode_token(token: str) -> tuple[Cursor, datetime | None]:
+    micros, _, rest = token.partition(".")
+    uid, _, started = rest.partition(".")
+    try:
+        return (from_micros(micros), uid), from_micros(started) if started else None
+    except (ValueError, OverflowError):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid sync token") from None
+
+
+@sync_router.get(
+    "",
+    response_model=SyncChanges,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid sync token"},
+        status.HTTP_410_GONE: {"description": "Sync token too old, sync from scratch"},
+    },
+)
+async def sync(
+    since: str | None = Query(None, description="`token` da sincronização anterior; sem ele vêm todos os posts"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    changes: SyncRepository = Depends(get_sync_repository),
+    post_reader: PostReadRepository = Depends(get_post_reader),
+):
+    # Escritas em andamento podem gravar um horário um pouco anterior ao commit; o token recua esse tanto
+    # e o que ficar na borda vem de novo no próximo /sync (o cliente aplica por uid, repetir não muda nada)
+    now = datetime.now() - timedelta(seconds=settings.SYNC_TOKEN_LAG_SECONDS)
+    after, started = decode_token(since) if since else (None, None)
+    # Sincronização do zero em andamento: o cursor anda por posts de qualquer idade e não depende dos
+    # tombstones; o que vale para o prazo é o início dela, quando o cliente ainda não tinha nada
+    full_pass = after is None or started is not None
+    if after is not None and (started or after[0]) < datetime.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+        raise HTTPException(status.HTTP_410_GONE, "Sync token expired, sync from scratch")
+
+    posts = await changes.changed_posts(after, limit)
+    deleted = await changes.tombstones(after, limit) if not full_pass else []
+    reactions = await changes.changed_reactions(after, limit) if not full_pass else []
+
+    reacted = await post_reader.reactions(str(current_user.uid), [post["uid"] for post in posts])
+    posts = [{**post, "liked_by_me": (post["uid"], "LIKED") in reacted, "disliked_by_me": (post["uid"], "DISLIKED") in reacted} for post in posts]
+
+    # Lista cortada pelo limite: o próximo token para no último (instante, uid) dela, o resto vem na próxima
+    # página. As três listas seguem a mesma ordem, então o menor desses cursores não pula nada em nenhuma
+    cursors = [(rows[-1][field], str(rows[-1]["uid"])) for rows, field in ((posts, "updated_at"), (deleted, "at"), (reactions, "at")) if len(rows) == limit]
+    if not full_pass:
+        token = encode_token(*min(cursors)) if cursors else encode_token(now)
+    elif cursors:
+        token = encode_token(*cursors[0], started=started or now)
+    else:
+        # Fim da sincronização do zero: o próximo /sync traz apagados e reações desde que ela começou
+        token = encode_token(started or now)
+    return SyncChanges.model_validate({"posts": posts, "deleted": [row["uid"] for row in deleted], "reactions": reactions, "token": token, "has_more": bool(cursors)})
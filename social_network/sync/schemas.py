@@ -0,0 +1,36 @@
+from datetime import datetime
+from uuid import UUID
+
+from social_network.core.schemas import OrmModel
+from social_network.posts.schemas import UserMinimal
+
+
+class SyncPost(OrmModel):
+    """Post ou comentário sem a árvore: `parent_uid` diz onde o comentário entra"""
+
+    uid: UUID
+    parent_uid: UUID | None = None
+    content: str
+    owner: UserMinimal | None
+    created_at: datetime
+    updated_at: datetime
+    likes: int
+    dislikes: int
+    liked_by_me: bool = False
+    disliked_by_me: bool = False
+
+
+class ReactionCounts(OrmModel):
+    uid: UUID
+    likes: int
+    dislikes: int
+
+
+class SyncChanges(OrmModel):
+    """Mudanças desde o token enviado; `token` vai no próximo /sync e, com `has_more`, deve ser usado logo"""
+
+    posts: list[SyncPost]
+    deleted: list[UUID]
+    reactions: list[ReactionCounts]
+    token: str
+    has_more: bool
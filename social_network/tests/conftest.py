@@ -1,5 +1,44 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("JWT_EXPIRE_TIME_SECONDS", "3600")
+os.environ.setdefault("NEO_PASSWORD", "test")
+os.environ["GRAPH_BACKEND"] = "memory"
+# O atraso do loop nesta máquina não é o de produção; o controle de admissão tem testes próprios
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+# Sem snapshot dos follows nem comunidades agendadas, para os testes não gravarem arquivos no repositório
+os.environ.setdefault("GRAPH_SNAPSHOT_REFRESH_SECONDS", "0")
+os.environ.setdefault("COMMUNITY_REFRESH_SECONDS", "0")
+
 HELLO_URL = "/hello"
 
-# @pytest.fixture
-# def client():
-#     return TestClient(app)
+
+@pytest.fixture
+def client():
+    from social_network.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def register(client):
+    def register(username: str, full_name: str | None = None) -> dict:
+        payload = {
+            "username": username,
+            "email": f"{username}@example.com",
+            "full_name": full_name or username.replace("_", " ").title(),
+            "password": "123321",
+            "bio": "Bio",
+            "avatar_link": "https://example.com/avatar.png",
+        }
+        response = client.post("/auth/register", json=payload)
+        assert response.status_code == 200, response.text
+
+        token = client.post("/auth/login", json={"username": username, "password": "123321"}).json()["acess_token"]
+        return {**response.json(), "headers": {"Authorization": f"Bearer {token}"}}
+
+    return register
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from social_network.core.admission import AdmissionController, AdmissionLimits, AdmissionMiddleware, route_class
+from social_network.core.metrics import loop_lag_monitor
+from social_network.core.pool import pool_monitor
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "expected"),
+    [
+        ("GET", "/health/ready", "critical"),
+        ("POST", "/auth/login", "auth"),
+        ("POST", "/users/", "auth"),
+        ("GET", "/users/", "read"),
+        ("GET", "/users/roberto", "expensive"),
+        ("POST", "/users/follow/123", "expensive"),
+        ("GET", "/posts/feed", "expensive"),
+        ("GET", "/posts/123", "read"),
+        ("POST", "/posts/123/toggle-like", "write"),
+        ("GET", "/stream", "stream"),
+    ],
+)
+def test_route_classes(method, path, expected):
+    assert route_class(method, path) == expected
+
+
+def test_pressure_sheds_expensive_routes_first(monkeypatch):
+    controller = AdmissionController(AdmissionLimits(max_in_flight={}))
+
+    monkeypatch.setattr(loop_lag_monitor, "lag", 0.2)
+    assert controller.admit("expensive") == "pressure"
+    assert controller.admit("read") is None
+
+    monkeypatch.setattr(loop_lag_monitor, "lag", 0.0)
+    monkeypatch.setitem(pool_monitor.pending, -1, time.perf_counter() - 1)
+    assert controller.admit("read") == "pressure"
+    assert controller.admit("auth") is None
+    assert controller.admit("critical") is None
+
+
+def test_rejects_with_retry_after_over_the_in_flight_limit():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/posts/{uid}", ok), Route("/auth/login", ok, methods=["POST"])])
+    app.add_middleware(AdmissionMiddleware, limits=AdmissionLimits(max_in_flight={"read": 0}, retry_after=2))
+
+    with TestClient(app) as client:
+        response = client.get("/posts/1")
+        assert response.status_code == 503
+        assert 2 <= int(response.headers["retry-after"]) <= 4
+        assert client.post("/auth/login").status_code == 200
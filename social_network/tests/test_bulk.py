@@ -0,0 +1,87 @@
+import gzip
+import json
+
+import pytest
+
+from social_network.bulk import importer as bulk_importer
+from social_network.bulk.importer import MERGE_USERS, BulkImporter, Checkpoint
+from social_network.bulk.records import read_records
+
+UID = "6f1d5c0e-8a1b-4c55-9b4e-3f0c1a2b3c4d"
+
+
+class FakeRepository:
+    """Registra os lotes gravados e falha a partir do lote `fail_at`; linhas com uid em `missing` não casam no MATCH"""
+
+    def __init__(self, fail_at=None, missing=()):
+        self.batches = []
+        self.fail_at = fail_at
+        self.missing = set(missing)
+
+    async def write(self, query, rows):
+        if self.fail_at is not None and len(self.batches) >= self.fail_at:
+            raise RuntimeError("Neo4j fora do ar")
+        self.batches.append((query, rows))
+        return [{"written": sum(1 for row in rows if not any(str(value) in self.missing for value in row.values()))}]
+
+
+def user(index, **fields):
+    return {"username": f"user_{index}", "email": f"user_{index}@example.com", "full_name": f"User {index}", "password_hash": "$argon2id$hash", **fields}
+
+
+def test_read_jsonl_and_gzipped_csv(tmp_path):
+    jsonl = tmp_path / "users.jsonl"
+    jsonl.write_text(json.dumps(user(1)) + "\n\n" + json.dumps(user(2)) + "\n")
+
+    csv_gz = tmp_path / "follows.csv.gz"
+    with gzip.open(csv_gz, "wt") as file:
+        file.write(f"source_uid,target_uid,extra\n{UID},{UID},\n")
+
+    assert [record["username"] for record in read_records(str(jsonl))] == ["user_1", "user_2"]
+    assert list(read_records(str(csv_gz))) == [{"source_uid": UID, "target_uid": UID}]
+
+
+@pytest.mark.asyncio
+async def test_users_are_written_in_batches(monkeypatch):
+    monkeypatch.setattr(bulk_importer, "get_password_hash", lambda password: f"hashed:{password}")
+    repository = FakeRepository()
+    plain = {**user(9), "password": "123"}
+    del plain["password_hash"]
+    records = [user(index) for index in range(5)] + [{"username": "sem_senha", "email": "x", "full_name": "X"}, plain]
+
+    result = await BulkImporter(repository, batch_size=2, workers=3).run("users", iter(records))
+
+    rows = [row for query, batch in repository.batches for row in batch]
+    assert all(query == MERGE_USERS for query, _ in repository.batches)
+    assert max(len(batch) for _, batch in repository.batches) <= 2
+    assert (result.written, result.rejected) == (6, 1)
+    assert {row["props"]["password"] for row in rows} == {"$argon2id$hash", "hashed:123"}
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_resumes_after_failure(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    records = [user(index) for index in range(10)]
+
+    with pytest.raises(RuntimeError):
+        await BulkImporter(FakeRepository(fail_at=2), batch_size=3, workers=1, checkpoint=Checkpoint(path)).run("users", iter(records))
+
+    assert Checkpoint(path).get("users") == 6
+
+    repository = FakeRepository()
+    result = await BulkImporter(repository, batch_size=3, workers=1, checkpoint=Checkpoint(path)).run("users", iter(records))
+
+    assert result.skipped == 6
+    assert [row["username"] for _, batch in repository.batches for row in batch] == ["user_6", "user_7", "user_8", "user_9"]
+    assert Checkpoint(path).get("users") == 10
+
+
+@pytest.mark.asyncio
+async def test_rows_without_matching_nodes_count_as_rejected():
+    other = "0b7e8c1a-2f3d-4e5f-8a9b-1c2d3e4f5a6b"
+    repository = FakeRepository(missing={other})
+    records = [{"source_uid": UID, "target_uid": other}, {"source_uid": other, "target_uid": UID}, {"source_uid": UID, "target_uid": UID}]
+
+    result = await BulkImporter(repository, batch_size=10, workers=1).run("follows", iter(records))
+
+    assert (result.written, result.rejected) == (1, 2)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from social_network.graph.communities import community_detector, detect, load_state, save_state
+from social_network.graph.csr import FollowGraph
+from social_network.graph.labelprop import label_propagation
+
+
+def two_groups(extra: list[tuple[int, int]] = ()) -> FollowGraph:
+    # 0-4 e 5-9 se seguem dentro do grupo; um único follow liga os dois
+    pairs = [(a, b) for group in (range(5), range(5, 10)) for a in group for b in group if a != b] + [(4, 5), *extra]
+    size = max(max(pair) for pair in pairs) + 1
+    return FollowGraph.from_edges([f"u{index}" for index in range(size)], np.array([a for a, _ in pairs]), np.array([b for _, b in pairs]))
+
+
+def test_label_propagation_separates_dense_groups():
+    labels = label_propagation(two_groups())
+
+    assert len(set(labels[:5].tolist())) == 1
+    assert len(set(labels[5:].tolist())) == 1
+    assert labels[0] != labels[5]
+
+
+def test_incremental_run_only_touches_changed_neighborhoods(tmp_path):
+    path = str(tmp_path / "communities.npz")
+    graph = two_groups()
+    first = detect(graph, None)
+    save_state(path, graph, first.labels, "v1")
+
+    # u10 chega seguindo e sendo seguido pelo segundo grupo
+    grown = two_groups([(10, 7), (10, 8), (8, 10), (9, 10)])
+    second = detect(grown, load_state(path, "v1"), full_fraction=1.0)
+
+    assert second.incremental
+    assert second.labels[10] == first.labels[7]
+    assert second.labels[:10].tolist() == first.labels.tolist()
+    assert np.flatnonzero(second.changed).tolist() == [10]
+
+
+def test_state_from_another_run_is_ignored(tmp_path):
+    path = str(tmp_path / "communities.npz")
+    graph = two_groups()
+    save_state(path, graph, detect(graph, None).labels, "v1")
+
+    # Outra máquina rodou depois desta (ou não há versão no banco): os rótulos do arquivo não valem mais
+    assert load_state(path, "v2") is None
+    assert load_state(path, None) is None
+    assert not detect(graph, load_state(path, "v2")).incremental
+
+
+def test_circle_suggests_unfollowed_members_of_the_same_community(client, register, tmp_path, monkeypatch):
+    monkeypatch.setattr(community_detector, "state_path", str(tmp_path / "communities.npz"))
+    users = [register(f"circulo_{index}") for index in range(4)]
+    for follower, followed in [(0, 1), (1, 0), (1, 2), (2, 1), (2, 0), (0, 3)]:
+        client.post(f"/users/follow/{users[followed]['uid']}", headers=users[follower]["headers"])
+
+    assert client.get(f"/users/{users[0]['uid']}/circle/", headers=users[0]["headers"]).json()["users"] == []
+    assert client.portal.call(community_detector.refresh) == 4
+
+    circle = client.get(f"/users/{users[0]['uid']}/circle/", headers=users[0]["headers"]).json()["users"]
+    profile = client.get("/users/me", headers=users[0]["headers"]).json()
+    assert [user["username"] for user in circle] == ["circulo_2"]
+    assert profile["community"] is not None
+    assert client.get("/users/missing/circle/", headers=users[0]["headers"]).status_code == 404
@@ -0,0 +1,75 @@
+import zlib
+
+import pytest
+
+from social_network.core.compression import CompressionMiddleware, choose_encoding
+
+
+def make_app(chunks: list[bytes], content_type: bytes = b"application/json"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+async def call(app, accept_encoding: str = "gzip") -> tuple[dict, list[dict]]:
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await CompressionMiddleware(app, minimum_size=100, thread_size=1000, encodings=["zstd", "br", "gzip"])(scope, None, send)
+    return dict(messages[0]["headers"]), messages[1:]
+
+
+def test_choose_encoding_respects_quality_and_preference():
+    assert choose_encoding("gzip, deflate", ["zstd", "br", "gzip"]) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", ["gzip"]) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_small_bodies_are_not_compressed():
+    headers, bodies = await call(make_app([b'{"ok": true}']))
+
+    assert b"content-encoding" not in headers
+    assert bodies[0]["body"] == b'{"ok": true}'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [500, 5000])
+async def test_large_bodies_are_gzipped(size):
+    body = b'{"content": "' + b"a" * size + b'"}'
+
+    headers, bodies = await call(make_app([body]))
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(bodies[0]["body"]) < len(body)
+    assert zlib.decompress(bodies[0]["body"], 16 + zlib.MAX_WBITS) == body
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_are_compressed_incrementally():
+    chunks = [b'{"posts": [', b'{"content": "primeiro"},', b'{"content": "segundo"}', b"]}"]
+
+    headers, bodies = await call(make_app(chunks))
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Cada pedaço já chega descomprimível, sem esperar o fim da resposta
+    assert [decompressor.decompress(message["body"]) for message in bodies] == chunks
+
+
+@pytest.mark.asyncio
+async def test_event_streams_and_unaccepted_encodings_pass_through():
+    body = b"data: " + b"a" * 500 + b"\n\n"
+
+    sse_headers, _ = await call(make_app([body], b"text/event-stream"))
+    identity_headers, _ = await call(make_app([body]), accept_encoding="identity")
+
+    assert b"content-encoding" not in sse_headers
+    assert b"content-encoding" not in identity_headers
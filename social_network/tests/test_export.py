@@ -0,0 +1,78 @@
+import hashlib
+import socket
+import time
+from datetime import datetime
+
+from social_network.admin.router import save_job
+from social_network.admin.schemas import ExportJob
+from social_network.bulk.records import read_records
+from social_network.settings import settings
+
+
+def wait_for_export(client, job_id, headers) -> dict:
+    for _ in range(100):
+        job = client.get(f"/admin/exports/{job_id}", headers=headers).json()
+        if job["status"] != "running":
+            return job
+        time.sleep(0.05)
+    raise AssertionError("export did not finish")
+
+
+def test_export_requires_admin(client, register):
+    user = register("joao_silva")
+
+    response = client.post("/admin/exports", json={}, headers=user["headers"])
+
+    assert response.status_code == 403
+
+
+def test_export_writes_files_and_manifest(client, register, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", ["admin"])
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EXPORT_PAGE_SIZE", 2)
+    admin = register("admin")
+    user = register("maria_souza")
+
+    client.post(f"/users/follow/{user['uid']}", headers=admin["headers"])
+    post = client.post("/posts/", json={"content": "Primeiro post"}, headers=user["headers"]).json()
+    client.post(f"/posts/{post['uid']}/comment", json={"content": "Comentário"}, headers=admin["headers"])
+    client.post(f"/posts/{post['uid']}/toggle-like", headers=admin["headers"])
+
+    response = client.post("/admin/exports", json={"include_passwords": True}, headers=admin["headers"])
+    assert response.status_code == 202
+
+    job = wait_for_export(client, response.json()["id"], admin["headers"])
+    assert job["status"] == "done", job["error"]
+
+    files = job["manifest"]["files"]
+    assert {name: entry["rows"] for name, entry in files.items()} == {
+        "users.jsonl.gz": 2,
+        "posts.jsonl.gz": 2,
+        "follows.jsonl.gz": 1,
+        "reactions.jsonl.gz": 1,
+    }
+    for name, entry in files.items():
+        assert hashlib.sha256((tmp_path / job["id"] / name).read_bytes()).hexdigest() == entry["sha256"]
+
+    users = list(read_records(str(tmp_path / job["id"] / "users.jsonl.gz")))
+    posts = list(read_records(str(tmp_path / job["id"] / "posts.jsonl.gz")))
+    assert all(record["password_hash"].startswith("$") for record in users)
+    assert {record["owner_uid"] for record in posts} == {user["uid"], admin["uid"]}
+    assert [record["parent_uid"] for record in posts if "parent_uid" in record] == [post["uid"]]
+
+
+def test_export_status_is_read_from_the_export_directory(client, register, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", ["admin"])
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    headers = register("admin")["headers"]
+    # Exportação iniciada por um worker desta máquina que já não existe (o pid 2**22 + 1 passa do pid_max do Linux)
+    (tmp_path / "20240101T000000000000").mkdir()
+    save_job(ExportJob(id="20240101T000000000000", status="running", directory=str(tmp_path / "20240101T000000000000"), started_at=datetime(2024, 1, 1), worker=f"{socket.gethostname()}:{2**22 + 1}"))
+
+    exports = client.get("/admin/exports", headers=headers).json()
+    interrupted = client.get("/admin/exports/20240101T000000000000", headers=headers).json()
+
+    assert [job["id"] for job in exports] == ["20240101T000000000000"]
+    assert interrupted["status"] == "failed"
+    assert client.get("/admin/exports/..", headers=headers).status_code == 404
+    assert client.get("/admin/exports/missing", headers=headers).status_code == 404
@@ -0,0 +1,110 @@
+import neo4j
+import neo4j.exceptions
+import neo4j.time
+import pytest
+import pytest_asyncio
+
+from social_network.core.indexes import INDEXES, IndexKind, bootstrap_schema, schema_version
+from social_network.posts.repository import BY_OWNER_QUERY, COMMENTS_QUERY, DETAILS_QUERY
+from social_network.settings import settings
+from social_network.sync.repository import CHANGED_POSTS_QUERY, CHANGED_REACTIONS_QUERY, TOMBSTONES_QUERY
+from social_network.users.repository import PROFILE_QUERY, search_query
+
+UID = "00000000-0000-0000-0000-000000000000"
+
+# Consultas executadas em praticamente todo endpoint (ver routers e get_current_user)
+HOT_QUERIES = [
+    ("MATCH (n:Post) WHERE n.uid = $uid RETURN n", {"uid": "00000000-0000-0000-0000-000000000000"}),
+    ("MATCH (n:User) WHERE n.uid = $uid RETURN n", {"uid": "00000000-0000-0000-0000-000000000000"}),
+    ("MATCH (n:User) WHERE n.username = $username RETURN n", {"username": "roberto_carlos"}),
+    ("MATCH (n:User) WHERE n.email = $email RETURN n", {"email": "roberto@carlos.com"}),
+    ("MATCH (n:Post) WHERE n.created_at >= $since RETURN n ORDER BY n.created_at DESC LIMIT 20", {"since": neo4j.time.DateTime(2024, 1, 1)}),
+    # Consultas dos repositórios de leitura, como os endpoints as enviam
+    (DETAILS_QUERY, {"uid": UID}),
+    (PROFILE_QUERY, {"username": "roberto_carlos", "uid": None}),
+    (search_query({"username": "roberto_carlos"}), {"username": "roberto_carlos", "offset": 0, "limit": 20}),
+    (COMMENTS_QUERY, {"uids": [UID]}),
+    (BY_OWNER_QUERY, {"owner_uids": [UID]}),
+    # /sync com token
+    *((query, {"since": neo4j.time.DateTime(2024, 1, 1), "after_uid": "", "limit": 100}) for query in (CHANGED_POSTS_QUERY, CHANGED_REACTIONS_QUERY, TOMBSTONES_QUERY)),
+]
+
+
+def operators(plan: dict):
+    yield plan["operatorType"]
+    for child in plan.get("children", []):
+        yield from operators(child)
+
+
+@pytest_asyncio.fixture
+async def driver():
+    driver = neo4j.AsyncGraphDatabase.driver(settings.neo4j_url, auth=("neo4j", settings.NEO_PASSWORD))
+    try:
+        await driver.verify_connectivity()
+    except (neo4j.exceptions.ServiceUnavailable, OSError, ValueError):
+        await driver.close()
+        pytest.skip("Servidor Neo4j indisponível")
+
+    async with driver.session() as session:
+        for index in INDEXES:
+            await session.run(index.cypher())
+        await session.run("CALL db.awaitIndexes(60)")
+
+    yield driver
+    await driver.close()
+
+
+def test_index_cypher_is_idempotent():
+    for index in INDEXES:
+        assert "IF NOT EXISTS" in index.cypher()
+
+
+def test_post_uid_and_created_at_are_indexed():
+    signatures = {(index.kind, index.label, index.properties) for index in INDEXES}
+
+    assert (IndexKind.UNIQUE, "Post", ("uid",)) in signatures
+    assert (IndexKind.RANGE, "Post", ("created_at",)) in signatures
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query,parameters", HOT_QUERIES)
+async def test_hot_queries_do_not_scan_labels(driver, query, parameters):
+    async with driver.session() as session:
+        result = await session.run(f"EXPLAIN {query}", parameters)
+        summary = await result.consume()
+
+    plan_operators = list(operators(summary.plan))
+    assert not [operator for operator in plan_operators if operator.startswith("NodeByLabelScan")], plan_operators
+
+
+class SchemaClient:
+    """Responde ao marcador de versão e ao SHOW INDEXES, registrando os comandos executados"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.queries = []
+
+    async def cypher(self, query, parameters=None):
+        self.queries.append(query)
+        if query.startswith("MATCH (m:SchemaVersion"):
+            return ([[self.version]] if self.version else []), None
+        if query.startswith("MERGE (m:SchemaVersion"):
+            self.version = parameters["version"]
+        return [], None
+
+
+@pytest.mark.asyncio
+async def test_schema_bootstrap_runs_only_when_version_changes():
+    from social_network.dependencies import MODELS
+
+    client = SchemaClient()
+
+    assert await bootstrap_schema(client, MODELS)
+    assert client.version == schema_version(MODELS)
+    assert sum(query.startswith("CREATE") for query in client.queries) == len(INDEXES)
+
+    client.queries.clear()
+    assert not await bootstrap_schema(client, MODELS)
+    assert len(client.queries) == 1
+
+    assert await bootstrap_schema(client, MODELS[:1])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from social_network.graph.csr import FollowGraph
+from social_network.graph.influence import InfluenceRanker, influence_ranker
+from social_network.graph.pagerank import pagerank
+
+
+def test_csr_drops_repeated_follows_and_self_follows():
+    graph = FollowGraph.from_edges(["a", "b", "c"], np.array([2, 0, 0, 1, 1]), np.array([0, 1, 1, 1, 0]))
+
+    assert graph.offsets.tolist() == [0, 1, 2, 3]
+    assert [graph.following(index).tolist() for index in range(3)] == [[1], [0], [0]]
+    assert graph.index("c") == 2
+
+
+def test_pagerank_ranks_the_most_followed_first():
+    # Todos seguem o 0; o 1 também é seguido pelo 0, e o 3 não é seguido por ninguém
+    graph = FollowGraph.from_edges(["0", "1", "2", "3"], np.array([1, 2, 3, 0, 3]), np.array([0, 0, 0, 1, 1]))
+
+    scores = pagerank(graph)
+
+    assert abs(scores.sum() - 4.0) < 1e-9
+    assert scores.argmax() == 0
+    assert scores[1] > scores[2] > 0
+    assert scores[2] == scores[3]
+
+
+def test_influence_is_written_and_sorts_search(client, register):
+    users = [register(f"usuario_{index}") for index in range(4)]
+    for follower in users[1:]:
+        client.post(f"/users/follow/{users[0]['uid']}", headers=follower["headers"])
+    client.post(f"/users/follow/{users[1]['uid']}", headers=users[2]["headers"])
+
+    assert client.portal.call(influence_ranker.refresh) == 4
+
+    me = client.get("/users/me", headers=users[0]["headers"]).json()
+    assert me["influence"] > 1
+    assert me["followed_by"][0]["influence"] is not None
+
+    ranked = client.get("/users/", params={"username_i": "usuario_", "sort": "influence"}, headers=users[0]["headers"]).json()["users"]
+    assert [user["username"] for user in ranked[:2]] == ["usuario_0", "usuario_1"]
+
+
+class FailingGraphRepository:
+    def __init__(self):
+        self.calls = []
+
+    async def claim(self, name, seconds):
+        self.calls.append(("claim", name))
+        return True
+
+    async def release(self, name):
+        self.calls.append(("release", name))
+
+    async def load(self):
+        raise ConnectionError("Neo4j fora do ar")
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_releases_the_lease_for_the_retry():
+    repository = FailingGraphRepository()
+
+    with pytest.raises(ConnectionError):
+        await InfluenceRanker(interval=3600).refresh(repository)
+
+    assert repository.calls == [("claim", "graph.influence"), ("release", "graph.influence")]
@@ -0,0 +1,37 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from social_network.core.instrumentation import QueryInstrumentationMiddleware, capture_queries, query_shape, record_query
+
+app = FastAPI()
+app.add_middleware(QueryInstrumentationMiddleware, threshold=3)
+
+
+@app.get("/posts/{post_id}")
+async def post_with_comments(post_id: str):
+    record_query("MATCH (p:Post {uid: $uid}) RETURN p", 0.002)
+    for index in range(5):
+        record_query(f"MATCH (c:Post) WHERE c.uid = '{index}' RETURN c", 0.001)
+    return {"uid": post_id}
+
+
+def test_query_shape_ignores_literals_and_spaces():
+    assert query_shape("MATCH (n)\n  WHERE n.uid = 'a' AND n.age > 10 RETURN n") == query_shape("MATCH (n) WHERE n.uid = 'b' AND n.age > 20 RETURN n")
+
+
+def test_server_timing_and_capture():
+    with TestClient(app) as client, capture_queries() as captured:
+        response = client.get("/posts/1")
+
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith('db;dur=7.0;desc="6 queries"')
+    assert [(stats.route, stats.count) for stats in captured] == [("/posts/{post_id}", 6)]
+
+
+def test_repeated_query_shape_is_reported(caplog):
+    with TestClient(app) as client, caplog.at_level(logging.WARNING):
+        client.get("/posts/1")
+
+    assert any("N+1" in record.message and "/posts/{post_id}" in record.message for record in caplog.records)
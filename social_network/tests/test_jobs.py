@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from social_network.core.jobs import JobRunner
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.calls = []
+
+    async def add(self, job):
+        self.calls.append(("add", job.type))
+
+    async def retry(self, job, delay, error):
+        self.calls.append(("retry", job.attempts))
+
+    async def done(self, job):
+        self.calls.append(("done", job.attempts))
+
+    async def failed(self, job, error):
+        self.calls.append(("failed", job.attempts))
+
+    async def claim(self, limit):
+        return []
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_until_they_succeed():
+    runner = JobRunner(workers=2, max_attempts=3, backoff_initial=0.01)
+    outbox = FakeOutbox()
+    attempts = []
+
+    @runner.handler("flaky")
+    async def flaky(payload):
+        attempts.append(payload["id"])
+        if len(attempts) < 3:
+            raise RuntimeError("falhou")
+
+    runner.start(outbox)
+    await runner.enqueue("flaky", {"id": 1})
+    for _ in range(100):
+        if runner.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    assert attempts == [1, 1, 1]
+    assert outbox.calls == [("add", "flaky"), ("retry", 1), ("retry", 2), ("done", 3)]
+
+
+@pytest.mark.asyncio
+async def test_jobs_give_up_after_max_attempts():
+    runner = JobRunner(workers=1, max_attempts=2, backoff_initial=0.01)
+    outbox = FakeOutbox()
+
+    @runner.handler("broken")
+    async def broken(payload):
+        raise ValueError("sempre falha")
+
+    runner.start(outbox)
+    await runner.enqueue("broken", {})
+    for _ in range(100):
+        if runner.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    assert outbox.calls[-1] == ("failed", 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_by_workers():
+    runner = JobRunner(workers=3)
+    running = 0
+    peak = 0
+
+    @runner.handler("slow")
+    async def slow(payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    runner.start()
+    for index in range(12):
+        await runner.enqueue("slow", {"index": index})
+    await runner.stop()
+
+    assert peak == 3
+    assert runner.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_unknown_job_types():
+    runner = JobRunner()
+    runner.start()
+
+    with pytest.raises(ValueError):
+        await runner.enqueue("desconhecido", {})
+
+    await runner.stop()
+
+
+@pytest.mark.asyncio
+async def test_periodic_jobs_run_until_the_runner_stops():
+    runner = JobRunner(workers=1)
+    runs = []
+
+    @runner.handler("tick")
+    async def tick(payload):
+        runs.append(payload)
+
+    runner.start()
+    runner.every("tick", 0.01, delay=0, payload={"n": 1})
+    await asyncio.sleep(0.05)
+    await runner.stop()
+    total = len(runs)
+    await asyncio.sleep(0.03)
+
+    assert total >= 2
+    assert len(runs) == total
+    assert runs[0] == {"n": 1}
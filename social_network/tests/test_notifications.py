@@ -0,0 +1,60 @@
+from social_network.core.jobs import job_runner
+from social_network.notifications.aggregator import NotificationAggregator, notification_aggregator
+
+
+def deliver(client):
+    client.portal.call(notification_aggregator.flush)
+    client.portal.call(job_runner.queue.join)
+
+
+def test_events_for_the_same_target_are_coalesced():
+    aggregator = NotificationAggregator()
+    for actor in ("ana", "bia", "ana", "caio"):
+        aggregator.record("like", actor, post_uid="post")
+    aggregator.record("follow", "ana", recipient_uid="bia")
+    aggregator.record("follow", "ana", recipient_uid="ana")
+
+    rows = {row["kind"]: row for row in aggregator.drain()}
+
+    assert set(rows) == {"like", "follow"}
+    assert rows["like"]["actors"] == ["caio", "ana", "bia"]
+    assert rows["like"]["count"] == 3
+    assert rows["follow"]["recipient_uid"] == "bia"
+    assert aggregator.drain() == []
+
+
+def test_likes_become_one_notification(client, register):
+    owner = register("dono_do_post")
+    fans = [register(f"fa_{index}") for index in range(4)]
+    post = client.post("/posts/", json={"content": "Olá"}, headers=owner["headers"]).json()
+
+    for fan in fans:
+        assert client.post(f"/posts/{post['uid']}/toggle-like", headers=fan["headers"]).status_code == 200
+    client.post(f"/posts/{post['uid']}/toggle-like", headers=owner["headers"])
+    client.post(f"/posts/{post['uid']}/comment", json={"content": "Oi"}, headers=fans[0]["headers"])
+    client.post(f"/users/follow/{owner['uid']}", headers=fans[1]["headers"])
+    deliver(client)
+
+    assert client.get("/notifications/unread-count", headers=owner["headers"]).json() == {"unread": 3}
+
+    inbox = client.get("/notifications/", headers=owner["headers"]).json()
+    by_kind = {notification["kind"]: notification for notification in inbox["notifications"]}
+    assert inbox["unread"] == 3
+    assert by_kind["like"]["actor_count"] == 4
+    assert by_kind["like"]["message"] == "fa_3 and 3 others liked your post"
+    assert by_kind["reply"]["message"] == "fa_0 replied to your post"
+    assert by_kind["follow"]["actors"][0]["username"] == "fa_1"
+
+    # Curtidas depois da leitura abrem uma notificação nova
+    response = client.post("/notifications/read", json={"uids": [by_kind["like"]["uid"]]}, headers=owner["headers"])
+    assert response.json() == {"unread": 2}
+    client.post(f"/posts/{post['uid']}/toggle-like", headers=fans[0]["headers"])
+    client.post(f"/posts/{post['uid']}/toggle-like", headers=fans[0]["headers"])
+    deliver(client)
+
+    page = client.get("/notifications/", params={"limit": 1}, headers=owner["headers"]).json()
+    assert page["notifications"][0]["actor_count"] == 1
+    assert page["unread"] == 3
+    assert len(client.get("/notifications/", params={"before": page["next_before"]}, headers=owner["headers"]).json()["notifications"]) == 3
+
+    assert client.post("/notifications/read", headers=owner["headers"]).json() == {"unread": 0}
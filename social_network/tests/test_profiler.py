@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from social_network.core.profiler import ProfilerMiddleware, SamplingProfiler, profiler
+from social_network.settings import settings
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def slow(request):
+    await asyncio.sleep(0.05)
+    busy(0.05)
+    return PlainTextResponse("ok")
+
+
+async def fast(request):
+    return PlainTextResponse("ok")
+
+
+def build_client(sampling: SamplingProfiler) -> TestClient:
+    app = Starlette(routes=[Route("/slow", slow), Route("/fast", fast)])
+    return TestClient(ProfilerMiddleware(app, sampling))
+
+
+def test_slow_request_keeps_running_and_suspended_stacks():
+    sampling = SamplingProfiler(threshold=0.08, interval=0.002, start_after=0)
+    client = build_client(sampling)
+
+    assert client.get("/fast").status_code == 200
+    assert client.get("/slow").status_code == 200
+
+    assert [profile.path for profile in sampling.profiles] == ["/slow"]
+    profile = sampling.profiles[0]
+    assert profile.status_code == 200
+    assert sampling.active == {}
+
+    stacks = [stack.rsplit(" ", 1)[0] for stack in profile.collapsed().splitlines()]
+    assert all(stack.startswith("ProfilerMiddleware.__call__") for stack in stacks)
+    assert any("slow (" in stack and stack.endswith("busy (social_network/tests/test_profiler.py)") for stack in stacks)
+    assert any("slow (" in stack and "sleep (asyncio/tasks.py)" in stack for stack in stacks)
+
+    speedscope = profile.speedscope(sampling.interval)
+    assert len(speedscope["profiles"][0]["samples"]) == profile.samples.total()
+
+
+def test_requests_finishing_before_start_after_are_not_sampled():
+    sampling = SamplingProfiler(threshold=0, interval=0.002, start_after=10)
+    client = build_client(sampling)
+
+    client.get("/slow")
+
+    assert list(sampling.profiles) == []
+
+
+def test_admin_exposes_profiles(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", ["admin"])
+    monkeypatch.setattr(profiler, "sample_rate", 1.0)
+    monkeypatch.setattr(profiler, "interval", 0.001)
+    admin = register("admin")
+
+    profiles = client.get("/admin/profiles", headers=admin["headers"]).json()
+    assert profiles and profiles[0]["samples"] > 0
+    assert profiles[0]["pid"] == os.getpid()
+
+    profile_id = profiles[0]["id"]
+    collapsed = client.get(f"/admin/profiles/{profile_id}", headers=admin["headers"])
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert collapsed.text.startswith("ProfilerMiddleware.__call__")
+
+    speedscope = client.get(f"/admin/profiles/{profile_id}?format=speedscope", headers=admin["headers"]).json()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+
+    assert client.get("/admin/profiles/0", headers=admin["headers"]).status_code == 404
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from social_network.core.instrumentation import capture_queries
+
+THREAD_SIZE = 50
+OWNER_POSTS = 20
+
+# Máximo de consultas e de tempo de CPU (ms) por requisição sobre o grafo da fixture `graph`.
+# As contagens não podem depender do tamanho da thread ou da quantidade de posts: um N+1 em
+# `PostDetails.from_post`, `PostDetailsWithoutOwner.from_post` ou `UserPublic.from_user` estoura o limite.
+BUDGETS = {
+    "GET /posts/{post_id}": (4, 100),
+    "GET /posts/feed": (4, 100),
+    "POST /posts/": (6, 100),
+    "PUT /posts/{post_id}": (8, 250),
+    "POST /posts/{post_id}/comment": (8, 100),
+    # Uma escrita a mais que as outras rotas: a marca de reação que o /sync usa
+    "POST /posts/{post_id}/toggle-like": (9, 100),
+    "POST /posts/{post_id}/toggle-dislike": (9, 100),
+    "GET /users/": (2, 100),
+    "GET /users/me": (5, 100),
+    "GET /users/{username}": (5, 100),
+    "GET /users/{user_id}/posts/": (5, 100),
+    "POST /users/follow/{user_to_follow_id}": (8, 100),
+    "GET /users/recommendations/": (6, 100),
+}
+
+
+@pytest.fixture
+def graph(client, register):
+    roberto = register("roberto_carlos")
+    erasmo = register("erasmo_carlos")
+    wanderlea = register("wanderlea")
+
+    posts = [client.post("/posts/", json={"content": f"Post {index}"}, headers=roberto["headers"]).json() for index in range(OWNER_POSTS)]
+    root = posts[0]
+
+    # Thread com respostas encadeadas (profunda) e respostas diretas ao post
+    parent = root["uid"]
+    for index in range(THREAD_SIZE):
+        author = erasmo if index % 2 else wanderlea
+        comment = client.post(f"/posts/{parent}/comment", json={"content": f"Comentário {index}"}, headers=author["headers"]).json()
+        parent = comment["uid"] if index % 5 else root["uid"]
+        client.post(f"/posts/{comment['uid']}/toggle-like", headers=roberto["headers"])
+
+    client.post(f"/users/follow/{roberto['uid']}", headers=erasmo["headers"])
+    client.post(f"/users/follow/{erasmo['uid']}", headers=wanderlea["headers"])
+
+    return {"roberto": roberto, "erasmo": erasmo, "wanderlea": wanderlea, "root": root, "posts": posts}
+
+
+def measure(client, method: str, url: str, **kwargs):
+    with capture_queries() as captured:
+        start = time.process_time()
+        response = client.request(method, url, **kwargs)
+        cpu_ms = (time.process_time() - start) * 1000
+
+    assert response.status_code < 400, response.text
+    stats = captured[-1]
+    return f"{method} {stats.route}", stats.count, cpu_ms
+
+
+CASES = {
+    "post_details": lambda graph: ("GET", f"/posts/{graph['root']['uid']}", {}),
+    "feed": lambda graph: ("GET", "/posts/feed", {"params": {"content_i": "Post 1"}}),
+    "create_post": lambda graph: ("POST", "/posts/", {"json": {"content": "Novo post"}}),
+    "update_post": lambda graph: ("PUT", f"/posts/{graph['root']['uid']}", {"json": {"content": "Editado"}}),
+    "comment": lambda graph: ("POST", f"/posts/{graph['root']['uid']}/comment", {"json": {"content": "Mais um"}}),
+    "like": lambda graph: ("POST", f"/posts/{graph['root']['uid']}/toggle-like", {}),
+    "dislike": lambda graph: ("POST", f"/posts/{graph['root']['uid']}/toggle-dislike", {}),
+    "search_users": lambda graph: ("GET", "/users/", {"params": {"username_i": "carlos"}}),
+    "me": lambda graph: ("GET", "/users/me", {}),
+    "profile": lambda graph: ("GET", "/users/erasmo_carlos", {}),
+    "posts_by_user": lambda graph: ("GET", f"/users/{graph['roberto']['uid']}/posts/", {}),
+    "follow": lambda graph: ("POST", f"/users/follow/{graph['wanderlea']['uid']}", {}),
+    "recommendations": lambda graph: ("GET", "/users/recommendations/", {}),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_query_budget(client, graph, case):
+    method, url, kwargs = CASES[case](graph)
+
+    route, queries, cpu_ms = measure(client, method, url, headers=graph["roberto"]["headers"], **kwargs)
+    max_queries, max_cpu_ms = BUDGETS[route]
+
+    assert queries <= max_queries, f"{route} executou {queries} consultas (limite {max_queries})"
+    assert cpu_ms <= max_cpu_ms, f"{route} usou {cpu_ms:.0f} ms de CPU (limite {max_cpu_ms} ms)"
+
+
+def test_post_details_queries_do_not_grow_with_thread(client, graph):
+    headers = graph["roberto"]["headers"]
+
+    _, with_thread, _ = measure(client, "GET", f"/posts/{graph['root']['uid']}", headers=headers)
+    _, without_thread, _ = measure(client, "GET", f"/posts/{graph['posts'][-1]['uid']}", headers=headers)
+
+    assert with_thread == without_thread
@@ -0,0 +1,107 @@
+import neo4j
+import neo4j.exceptions
+import pytest
+
+from social_network.core.repository import GraphRepository, bind_session_context, route_sessions, where_clause
+from social_network.settings import settings
+
+
+class FakeSession:
+    def __init__(self, driver, config):
+        self.driver = driver
+        self.config = config
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute_read(self, work, query, parameters):
+        return await self._execute("execute_read", query)
+
+    async def execute_write(self, work, query, parameters):
+        return await self._execute("execute_write", query)
+
+    async def _execute(self, method, query):
+        self.driver.calls.append((method, self.config.get("default_access_mode"), query))
+        if self.driver.failures:
+            raise self.driver.failures.pop(0)
+        return [{"n": query}]
+
+
+class FakeDriver:
+    """Driver falso que registra o modo de acesso de cada chamada"""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.sessions = []
+        self.failures = list(failures or [])
+
+    def session(self, **config):
+        self.sessions.append(config)
+        return FakeSession(self, config)
+
+
+@pytest.mark.asyncio
+async def test_reads_and_writes_are_routed():
+    driver = FakeDriver()
+    repository = GraphRepository(driver)
+
+    await repository.read("MATCH (n:Post) RETURN n")
+    await repository.write("CREATE (n:Post) RETURN n")
+
+    assert driver.calls == [
+        ("execute_read", neo4j.READ_ACCESS, "MATCH (n:Post) RETURN n"),
+        ("execute_write", neo4j.WRITE_ACCESS, "CREATE (n:Post) RETURN n"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_errors_after_the_driver_retries_are_not_retried_again():
+    # execute_write já repetiu a transação até o prazo do driver; repetir aqui duplicaria a escrita
+    driver = FakeDriver(failures=[neo4j.exceptions.SessionExpired()])
+    repository = GraphRepository(driver)
+
+    with pytest.raises(neo4j.exceptions.SessionExpired):
+        await repository.write("CREATE (n:Post) RETURN n")
+
+    assert len(driver.calls) == 1
+    assert settings.neo4j_driver_options["max_transaction_retry_time"] == settings.NEO_MAX_TRANSACTION_RETRY_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_bookmarks_are_carried_per_user():
+    driver = FakeDriver()
+    repository = GraphRepository(driver)
+
+    bind_session_context("roberto_carlos", "POST")
+    await repository.write("CREATE (n:Post) RETURN n")
+    bind_session_context("roberto_carlos", "GET")
+    await repository.read("MATCH (n:Post) RETURN n")
+    bind_session_context("erasmo_carlos", "GET")
+    await repository.read("MATCH (n:Post) RETURN n")
+
+    first, second, third = (config["bookmark_manager"] for config in driver.sessions)
+    assert first is second
+    assert first is not third
+
+
+@pytest.mark.asyncio
+async def test_ogm_sessions_follow_request_method():
+    driver = FakeDriver()
+    route_sessions(driver)
+
+    bind_session_context("roberto_carlos", "GET")
+    driver.session()
+    bind_session_context("roberto_carlos", "DELETE")
+    driver.session()
+
+    assert [config["default_access_mode"] for config in driver.sessions] == [neo4j.READ_ACCESS, neo4j.WRITE_ACCESS]
+
+
+def test_where_clause_only_has_the_filters_that_were_set():
+    conditions = {"username": "u.username = $username", "name_i": "toLower(u.full_name) CONTAINS toLower($name_i)"}
+
+    assert where_clause(conditions, {"username": "roberto_carlos", "name_i": None}) == "WHERE u.username = $username"
+    assert where_clause(conditions, {"username": None, "name_i": None}) == ""
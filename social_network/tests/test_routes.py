@@ -1,44 +1,143 @@
-import pytest
-from sqlalchemy import StaticPool
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+CREATE_LIST_USERS_URL = "/users/"
+FEED_URL = "/posts/feed"
+POSTS_URL = "/posts/"
 
-from social_network.users.models import Base, User
 
-CREATE_LIST_USERS_URL = "/users/"
+def create_post(client, headers, content="Primeiro post"):
+    response = client.post(POSTS_URL, json={"content": content}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
 
 
-@pytest.fixture
-@pytest.mark.asyncio
-async def session():
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+def test_register_and_me(client, register):
+    roberto = register("roberto_carlos")
+
+    response = client.get("/users/me", headers=roberto["headers"])
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "roberto_carlos"
 
-    Base.metadata.create_all(engine)
 
-    async_session = sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
+def test_register_duplicated_username(client, register):
+    register("roberto_carlos")
+
+    response = client.post(
+        "/auth/register",
+        json={
+            "username": "roberto_carlos",
+            "email": "outro@example.com",
+            "full_name": "Outro",
+            "password": "123",
+            "bio": "",
+            "avatar_link": "",
+        },
     )
 
-    async with async_session() as async_session:
-        yield async_session
+    assert response.status_code == 400
 
-    Base.metadata.drop_all(engine)
 
+def test_get_users(client, register):
+    roberto = register("roberto_carlos")
+    register("erasmo_carlos")
+    register("wanderlea")
 
-@pytest.mark.asyncio
-async def test_get_users(session: AsyncSession):
-    created_user = User(
-        username="roberto_carlos",
-        email="roberto@carlos.com",
-        full_name="Roberto Carlos",
-        password="123321",
-    )
-    await session.add(created_user)
-    await session.commit()
-    session.refresh(created_user)
+    response = client.get(CREATE_LIST_USERS_URL, params={"username_i": "carlos"}, headers=roberto["headers"])
+
+    assert response.status_code == 200
+    assert sorted(user["username"] for user in response.json()["users"]) == ["erasmo_carlos", "roberto_carlos"]
+
+
+def test_feed_with_comments_and_reactions(client, register):
+    roberto = register("roberto_carlos")
+    erasmo = register("erasmo_carlos")
+    post = create_post(client, roberto["headers"])
+
+    comment = client.post(f"/posts/{post['uid']}/comment", json={"content": "Boa!"}, headers=erasmo["headers"])
+    assert comment.status_code == 200, comment.text
+
+    liked = client.post(f"/posts/{post['uid']}/toggle-like", headers=erasmo["headers"])
+    assert liked.json()["likes"] == 1
+
+    response = client.get(f"/posts/{post['uid']}", headers=erasmo["headers"])
+    details = response.json()
+
+    assert response.status_code == 200
+    assert details["owner"]["username"] == "roberto_carlos"
+    assert details["liked_by_me"] is True
+    assert [(item["content"], item["owner"]["username"]) for item in details["comments"]] == [("Boa!", "erasmo_carlos")]
+
+    feed = client.get(FEED_URL, params={"content": "Primeiro post"}, headers=roberto["headers"]).json()["posts"]
+    assert [(item["uid"], item["likes"], item["liked_by_me"]) for item in feed] == [(post["uid"], 1, False)]
+
+
+def test_toggle_dislike_removes_like(client, register):
+    roberto = register("roberto_carlos")
+    post = create_post(client, roberto["headers"])
+
+    client.post(f"/posts/{post['uid']}/toggle-like", headers=roberto["headers"])
+    response = client.post(f"/posts/{post['uid']}/toggle-dislike", headers=roberto["headers"])
+
+    assert (response.json()["likes"], response.json()["dislikes"]) == (0, 1)
+
+
+def test_follow_and_profile(client, register):
+    roberto = register("roberto_carlos")
+    erasmo = register("erasmo_carlos")
+
+    response = client.post(f"/users/follow/{roberto['uid']}", headers=erasmo["headers"])
+    assert response.status_code == 200, response.text
+
+    again = client.post(f"/users/follow/{roberto['uid']}", headers=erasmo["headers"])
+    assert again.status_code == 400
+
+    profile = client.get("/users/roberto_carlos", headers=erasmo["headers"]).json()
+    assert [user["username"] for user in profile["followed_by"]] == ["erasmo_carlos"]
+
+    client.post(f"/users/unfollow/{roberto['uid']}", headers=erasmo["headers"])
+    profile = client.get("/users/roberto_carlos", headers=erasmo["headers"]).json()
+    assert profile["followed_by"] == []
+
+
+def test_delete_post(client, register):
+    roberto = register("roberto_carlos")
+    post = create_post(client, roberto["headers"])
+
+    assert client.delete(f"/posts/{post['uid']}", headers=roberto["headers"]).status_code == 204
+    assert client.get(f"/posts/{post['uid']}", headers=roberto["headers"]).status_code == 404
+
+
+def test_recommendations(client, register):
+    roberto = register("roberto_carlos")
+
+    response = client.get("/users/recommendations/", headers=roberto["headers"])
+
+    assert response.status_code == 200
+
+
+def test_fast_json_responses_match_default_serialization(client, register, monkeypatch):
+    from social_network.core import responses
+    from social_network.settings import settings
+
+    roberto = register("roberto_carlos")
+    erasmo = register("erasmo_carlos")
+    post = create_post(client, roberto["headers"])
+    client.post(f"/posts/{post['uid']}/comment", json={"content": "Boa!"}, headers=erasmo["headers"])
+    urls = [FEED_URL, f"/posts/{post['uid']}", CREATE_LIST_USERS_URL, "/users/recommendations/"]
+
+    default = [client.get(url, headers=erasmo["headers"]) for url in urls]
+
+    rendered = []
+    render = responses.PydanticJSONResponse.render
+
+    def spy(self, content):
+        rendered.append(self.annotation)
+        return render(self, content)
+
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    monkeypatch.setattr(responses.PydanticJSONResponse, "render", spy)
+    fast = [client.get(url, headers=erasmo["headers"]) for url in urls]
+
+    assert len(rendered) == len(urls)
+    for before, after in zip(default, fast, strict=True):
+        assert after.status_code == before.status_code == 200
+        assert after.json() == before.json()
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from social_network import server
+from social_network.core import metrics
+from social_network.settings import settings
+
+
+def test_server_config_uses_settings_and_cpu_count(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 6)
+    monkeypatch.setattr(settings, "SERVER_BACKLOG", 4096)
+
+    config = server.server_config()
+
+    assert (config["workers"], config["loop"], config["http"], config["backlog"]) == (6, "uvloop", "httptools", 4096)
+    assert config["timeout_keep_alive"] == settings.SERVER_KEEP_ALIVE_SECONDS
+
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 2)
+    assert server.server_config()["workers"] == 2
+
+
+def test_multiple_workers_require_a_shared_broker(monkeypatch):
+    monkeypatch.setattr(settings, "BROKER_BACKEND", "local")
+    server.check_broker(1)
+    with pytest.raises(RuntimeError, match="BROKER_BACKEND"):
+        server.check_broker(4)
+
+    monkeypatch.setattr(settings, "BROKER_BACKEND", "redis")
+    server.check_broker(4)
+
+
+def test_shared_metrics_sum_counters_and_label_gauges_per_worker(tmp_path):
+    registry = metrics.Registry()
+    requests = registry.register(metrics.Counter("requests_total", "Requisições", ("route",)))
+    latency = registry.register(metrics.Histogram("latency_seconds", "Latência", buckets=(0.1, 1.0)))
+    in_flight = registry.register(metrics.Gauge("in_flight", "Em andamento"))
+    registry.share(str(tmp_path))
+    requests.labels("/posts").inc(3)
+    latency.observe(0.05)
+    in_flight.set(2)
+
+    # Worker que já saiu: os contadores continuam na soma, o gauge não
+    dead = {"requests_total": [[["/posts"], 4.0]], "latency_seconds": [[[], [[0, 1, 0], 0.5, 1]]], "in_flight": [[[], 7.0]]}
+    (tmp_path / f"{2**22 + 1}.json").write_text(json.dumps(dead))
+
+    lines = registry.render().splitlines()
+
+    assert 'requests_total{route="/posts"} 7.0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines and "latency_seconds_count 2" in lines
+    assert [line for line in lines if line.startswith("in_flight{")] == [f'in_flight{{worker="{os.getpid()}"}} 2']
+
+
+def test_multiple_workers_share_a_clean_metrics_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    # setenv antes para o monkeypatch restaurar a variável que share_metrics define
+    monkeypatch.setenv("METRICS_DIR", "")
+    (tmp_path / "123.json").write_text("{}")
+
+    assert server.share_metrics(1) is None
+    assert server.share_metrics(4) == str(tmp_path)
+    assert os.environ["METRICS_DIR"] == str(tmp_path) and not list(tmp_path.iterdir())
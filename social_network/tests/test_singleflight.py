@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from social_network.core.instrumentation import QueryStats, bind_query_stats, current_query_stats, record_query
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import bind_session_context, current_session_context
+from social_network.core.singleflight import SingleFlight
+from social_network.posts.repository import MemoryPostReadRepository
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_call():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"uid": "1"}
+
+    results = await asyncio.gather(*(flights.do("1", load) for _ in range(50)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.flights == {}
+
+    await flights.do("1", load)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    flights = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    results = await asyncio.gather(*(flights.do("1", load) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    flights = SingleFlight("test", timeout=0.05)
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def load():
+        started.set()
+        try:
+            await asyncio.sleep(0.02)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "ok"
+
+    first = asyncio.create_task(flights.do("1", load))
+    await started.wait()
+    second = asyncio.create_task(flights.do("1", load))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "ok"
+    assert not cancelled.is_set()
+
+    # Sem ninguém esperando (aqui, por timeout) a busca é cancelada
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        await flights.do("2", slow)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert flights.flights == {}
+
+
+@pytest.mark.asyncio
+async def test_shared_post_tree_is_personalized_per_viewer():
+    graph = MemoryGraph()
+    owner = graph.add_node("User", {"uid": "00000000-0000-0000-0000-0000000000a1", "username": "dono", "full_name": "Dono", "bio": "", "avatar_link": ""})
+    fan = graph.add_node("User", {"uid": "00000000-0000-0000-0000-0000000000a2", "username": "fa", "full_name": "Fã", "bio": "", "avatar_link": ""})
+    post = graph.add_node("Post", {"uid": "00000000-0000-0000-0000-000000000001", "content": "Viral", "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"})
+    graph.connect(owner, "OWNS", post)
+    graph.connect(fan, "LIKED", post)
+    reader = MemoryPostReadRepository(graph)
+
+    uid = "00000000-0000-0000-0000-000000000001"
+    owner_uid, fan_uid = "00000000-0000-0000-0000-0000000000a1", "00000000-0000-0000-0000-0000000000a2"
+    details = await asyncio.gather(*(reader.details(uid, viewer, coalesce=True) for viewer in (owner_uid, fan_uid, owner_uid, fan_uid)))
+
+    assert [post.liked_by_me for post in details] == [False, True, False, True]
+    assert {post.likes for post in details} == {1}
+
+
+@pytest.mark.asyncio
+async def test_shared_queries_are_attributed_to_every_waiter():
+    flights = SingleFlight("test")
+    sessions = []
+
+    async def load():
+        sessions.append(current_session_context())
+        await asyncio.sleep(0.01)
+        record_query("MATCH (p:Post {uid: $uid}) RETURN p", 0.01)
+        return "ok"
+
+    async def request(key: str) -> QueryStats:
+        stats = QueryStats()
+        bind_query_stats(stats)
+        bind_session_context(key, "GET")
+        await flights.do("1", load)
+        return stats
+
+    results = await asyncio.gather(*(request(f"leitor-{index}") for index in range(3)))
+
+    assert [stats.count for stats in results] == [1, 1, 1]
+    assert len(sessions) == 1
+    # A busca compartilhada não usa os bookmarks de quem chegou primeiro
+    assert sessions[0].bookmark_manager is None
+    assert current_query_stats() is None
+
+
+@pytest.mark.asyncio
+async def test_recent_writer_does_not_join_a_flight_started_before_the_write():
+    flights = SingleFlight("test", after_write=60)
+    started = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(current_session_context())
+        call = len(calls)
+        started.set()
+        await asyncio.sleep(0.02)
+        return call
+
+    async def reader():
+        bind_session_context("leitor", "GET")
+        return await flights.do("1", load)
+
+    async def writer():
+        await started.wait()
+        bind_session_context("autor", "POST")
+        bind_session_context("autor", "GET")
+        return await flights.do("1", load)
+
+    results = await asyncio.gather(reader(), writer())
+
+    assert results == [1, 2]
+    # Quem acabou de escrever lê com os próprios bookmarks
+    assert calls[1].bookmark_manager is not None
@@ -0,0 +1,85 @@
+import mmap
+import os
+import time
+
+import numpy as np
+import pytest
+
+from social_network.graph.csr import FollowGraph
+from social_network.graph.snapshot import FollowDelta, FollowSnapshot, SnapshotService, follow_snapshot, write_snapshot
+
+
+def test_snapshot_maps_both_directions_without_copying(tmp_path):
+    path = str(tmp_path / "follows.snapshot")
+    graph = FollowGraph.from_edges(["c", "a", "b"], np.array([0, 0, 1, 2]), np.array([1, 2, 0, 1]))
+    write_snapshot(path, graph, created_at=100.0)
+
+    snapshot = FollowSnapshot(path)
+
+    assert isinstance(snapshot.following_targets.base.obj, mmap.mmap)
+    assert not snapshot.following_targets.flags.writeable
+    assert (snapshot.size, snapshot.edges, snapshot.created_at) == (3, 4, 100.0)
+    assert [snapshot.index(uid) for uid in ("a", "b", "c", "d")] == [1, 2, 0, None]
+    assert snapshot.decode(snapshot.following(0)) == ["a", "b"]
+    assert snapshot.decode(snapshot.followers(1)) == ["c", "b"]
+    assert snapshot.is_following(2, 1) and not snapshot.is_following(1, 2)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_delta_overlays_the_snapshot_until_a_newer_one_replaces_it(tmp_path):
+    path = str(tmp_path / "follows.snapshot")
+    service = SnapshotService(path, interval=0, check_interval=0)
+    assert service.following("a") is None
+
+    write_snapshot(path, FollowGraph.from_edges(["a", "b", "c"], np.array([0, 1]), np.array([1, 0])), created_at=100.0)
+    service.delta.record("a", "c", True, at=150.0)
+    service.delta.record("a", "b", False, at=150.0)
+    service.delta.record("c", "a", True, at=150.0)
+
+    assert service.following("a") == ["c"]
+    assert service.followers("a") == ["b", "c"]
+    assert service.is_following("b", "a") and not service.is_following("a", "b")
+    assert service.mutuals("a") == ["c"]
+
+    # O snapshot novo já contém os follows; o unfollow de depois do início da leitura continua no delta
+    service.delta.record("c", "a", False, at=250.0)
+    write_snapshot(path, FollowGraph.from_edges(["a", "b", "c"], np.array([0, 1, 2]), np.array([2, 0, 0])), created_at=200.0)
+
+    assert service.current().created_at == 200.0
+    assert service.delta.entries == [(250.0, "c", "a", False)]
+    assert service.following("c") == []
+    assert service.mutuals("a") == []
+
+
+@pytest.mark.asyncio
+async def test_snapshot_older_than_the_process_is_not_served(tmp_path):
+    path = str(tmp_path / "follows.snapshot")
+    write_snapshot(path, FollowGraph.from_edges(["a", "b"], np.array([0]), np.array([1])), created_at=time.time() - 86400)
+    service = SnapshotService(path, interval=0, check_interval=0)
+    service.start(None)
+    try:
+        # Os follows desde a criação do arquivo não estão no delta: as leituras vão ao banco
+        assert service.following("a") is None
+
+        write_snapshot(path, FollowGraph.from_edges(["a", "b"], np.array([1]), np.array([0])), created_at=time.time())
+        assert service.following("a") == [] and service.following("b") == ["a"]
+    finally:
+        await service.stop()
+
+
+def test_mutuals_come_from_the_snapshot_and_recent_follows(client, register, tmp_path, monkeypatch):
+    monkeypatch.setattr(follow_snapshot, "path", str(tmp_path / "follows.snapshot"))
+    monkeypatch.setattr(follow_snapshot, "snapshot", None)
+    monkeypatch.setattr(follow_snapshot, "delta", FollowDelta())
+    users = [register(f"mutuo_{index}") for index in range(3)]
+    for follower, followed in [(0, 1), (1, 0), (0, 2)]:
+        client.post(f"/users/follow/{users[followed]['uid']}", headers=users[follower]["headers"])
+
+    without_snapshot = client.get(f"/users/{users[0]['uid']}/mutuals/", headers=users[0]["headers"]).json()["users"]
+    assert client.portal.call(follow_snapshot.build) == 3
+    client.post(f"/users/follow/{users[0]['uid']}", headers=users[2]["headers"])
+    with_snapshot = client.get(f"/users/{users[0]['uid']}/mutuals/", headers=users[0]["headers"]).json()["users"]
+
+    assert [user["username"] for user in without_snapshot] == ["mutuo_1"]
+    assert [user["username"] for user in with_snapshot] == ["mutuo_1", "mutuo_2"]
+    assert client.get("/users/missing/mutuals/", headers=users[0]["headers"]).status_code == 404
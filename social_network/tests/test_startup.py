@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import time
+
+import neo4j.exceptions
+import pytest
+
+from social_network.dependencies import backoff_delays, try_to_connect_neo4j
+from social_network.settings import settings
+
+
+class UnavailableClient:
+    def __init__(self):
+        self.attempts = 0
+
+    async def connect(self, **kwargs):
+        self.attempts += 1
+        raise neo4j.exceptions.ServiceUnavailable("Neo4j fora do ar")
+
+
+def test_backoff_delays_grow_with_jitter_up_to_the_maximum():
+    delays = backoff_delays(0.1, 1.0)
+    samples = [next(delays) for _ in range(10)]
+
+    assert all(0 <= delay <= 1.0 for delay in samples)
+    assert samples[0] <= 0.1
+
+
+@pytest.mark.asyncio
+async def test_connect_gives_up_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "NEO_CONNECT_TIMEOUT", 0.3)
+    monkeypatch.setattr(settings, "NEO_CONNECT_BACKOFF_INITIAL", 0.01)
+    monkeypatch.setattr(settings, "NEO_CONNECT_BACKOFF_MAX", 0.05)
+    client = UnavailableClient()
+    start = time.perf_counter()
+
+    with pytest.raises(RuntimeError, match="unavailable after"):
+        await try_to_connect_neo4j(client)
+
+    assert client.attempts > 2
+    assert time.perf_counter() - start < 1
+
+
+def test_app_import_defers_heavy_modules():
+    code = "import sys, social_network.main; print(' '.join(sorted(m for m in ('argon2', 'pwdlib', 'pyarrow') if m in sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=os.environ.copy(), check=True)
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from social_network.core.broker import Broker, broker
+from social_network.stream.router import events
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_and_asks_for_resync():
+    local = Broker(queue_size=2)
+    subscription = local.subscribe({"post:1"})
+    for count in range(4):
+        local.publish("post:1", "comment", {"count": count})
+    local.publish("post:2", "comment", {})
+
+    received = [(await subscription.get()).event for _ in range(3)]
+    subscription.close()
+
+    assert received == ["comment", "comment", "resync"]
+    assert local.topics == {}
+    assert local.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_counts_are_debounced():
+    local = Broker(debounce=0.05)
+    await local.start()
+    with local.subscribe({"post:1"}) as subscription:
+        for likes in range(10):
+            local.publish_debounced("post:1", "counts", {"likes": likes})
+        message = await asyncio.wait_for(subscription.get(), 1)
+        await asyncio.sleep(0.1)
+        assert subscription.queue.empty()
+    await local.stop()
+
+    assert json.loads(message.data) == {"likes": 9}
+
+
+@pytest.mark.asyncio
+async def test_sse_frames():
+    local = Broker()
+    subscription = local.subscribe({"user:1:posts"})
+    stream = events(subscription)
+
+    assert (await stream.__anext__()).startswith(b"retry: ")
+    local.publish("user:1:posts", "post", {"uid": "1"})
+    assert await stream.__anext__() == b'event: post\ndata: {"uid": "1"}\n\n'
+    await stream.aclose()
+    assert local.subscribers == 0
+
+
+def test_websocket_receives_posts_comments_and_counts(client, register, monkeypatch):
+    monkeypatch.setattr(broker, "debounce", 0.05)
+    author = register("autor_ao_vivo")
+    reader = register("leitor_ao_vivo")
+    client.post(f"/users/follow/{author['uid']}", headers=reader["headers"])
+    watched = client.post("/posts/", json={"content": "Acompanhado"}, headers=reader["headers"]).json()
+
+    token = reader["headers"]["Authorization"].removeprefix("Bearer ")
+    with client.websocket_connect(f"/stream/ws?token={token}&watch={watched['uid']}") as websocket:
+        client.post("/posts/", json={"content": "Novo post"}, headers=author["headers"])
+        message = websocket.receive_json()
+        assert message["event"] == "post"
+        assert message["data"]["content"] == "Novo post"
+
+        client.post(f"/posts/{watched['uid']}/comment", json={"content": "Comentário"}, headers=author["headers"])
+        assert websocket.receive_json()["data"]["comment"]["content"] == "Comentário"
+
+        client.post(f"/posts/{watched['uid']}/toggle-like", headers=author["headers"])
+        message = websocket.receive_json()
+        assert message["event"] == "counts"
+        assert message["data"]["likes"] == 1
+
+    with pytest.raises(WebSocketDisconnect), client.websocket_connect("/stream/ws?token=invalido") as websocket:
+        websocket.receive_json()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from social_network.settings import settings
+from social_network.sync.router import encode_token
+
+
+def test_sync_returns_only_changes_since_the_token(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_TOKEN_LAG_SECONDS", 0)
+    user = register("sincroniza")
+    headers = user["headers"]
+    kept = client.post("/posts/", json={"content": "fica"}, headers=headers).json()
+    edited = client.post("/posts/", json={"content": "antes"}, headers=headers).json()
+    removed = client.post("/posts/", json={"content": "sai"}, headers=headers).json()
+    comment = client.post(f"/posts/{removed['uid']}/comment", json={"content": "junto"}, headers=headers).json()
+
+    first = client.get("/sync", headers=headers).json()
+    assert {post["uid"] for post in first["posts"]} >= {kept["uid"], edited["uid"], removed["uid"], comment["uid"]}
+    assert next(post for post in first["posts"] if post["uid"] == comment["uid"])["parent_uid"] == removed["uid"]
+    assert first["deleted"] == [] and not first["has_more"]
+
+    client.put(f"/posts/{edited['uid']}", json={"content": "depois"}, headers=headers)
+    client.post(f"/posts/{kept['uid']}/toggle-like", headers=headers)
+    client.delete(f"/posts/{removed['uid']}", headers=headers)
+
+    second = client.get("/sync", params={"since": first["token"]}, headers=headers).json()
+    assert [(post["uid"], post["content"]) for post in second["posts"]] == [(edited["uid"], "depois")]
+    assert second["reactions"] == [{"uid": kept["uid"], "likes": 1, "dislikes": 0}]
+    assert set(second["deleted"]) == {removed["uid"], comment["uid"]}
+
+    third = client.get("/sync", params={"since": second["token"]}, headers=headers).json()
+    assert (third["posts"], third["deleted"], third["reactions"]) == ([], [], [])
+
+
+def test_sync_pages_and_rejects_bad_tokens(client, register):
+    headers = register("pagina")["headers"]
+    for content in ("um", "dois"):
+        client.post("/posts/", json={"content": content}, headers=headers)
+
+    page = client.get("/sync", params={"limit": 1}, headers=headers).json()
+    assert len(page["posts"]) == 1 and page["has_more"]
+    rest = client.get("/sync", params={"since": page["token"], "limit": 100}, headers=headers).json()
+    # A página seguinte começa depois do último (instante, uid) entregue, sem repetir nem pular
+    assert page["posts"][0]["uid"] not in {post["uid"] for post in rest["posts"]}
+    assert len(rest["posts"]) >= 1 and not rest["has_more"]
+
+    assert client.get("/sync", params={"since": "nope"}, headers=headers).status_code == 400
+    assert client.get("/sync", params={"since": "zz.abc"}, headers=headers).status_code == 400
+    expired = encode_token(datetime.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+    assert client.get("/sync", params={"since": expired}, headers=headers).status_code == 410
+
+
+def test_sync_pages_through_items_sharing_the_same_instant(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_TOKEN_LAG_SECONDS", 0)
+    headers = register("empate")["headers"]
+    post = client.post("/posts/", json={"content": "com comentarios"}, headers=headers).json()
+    comments = [client.post(f"/posts/{post['uid']}/comment", json={"content": str(index)}, headers=headers).json() for index in range(2)]
+    token = client.get("/sync", headers=headers).json()["token"]
+    # O post e os comentários viram tombstones com o mesmo deleted_at
+    client.delete(f"/posts/{post['uid']}", headers=headers)
+
+    deleted, pages = [], 0
+    while True:
+        page = client.get("/sync", params={"since": token, "limit": 1}, headers=headers).json()
+        deleted += page["deleted"]
+        token, pages = page["token"], pages + 1
+        if not page["has_more"] or pages > 10:
+            break
+
+    assert sorted(deleted) == sorted([post["uid"], *(comment["uid"] for comment in comments)])
+    assert pages <= 4
+
+
+def test_first_sync_pages_through_posts_older_than_the_retention(client, register, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_TOKEN_LAG_SECONDS", 0)
+    headers = register("antigo")["headers"]
+    created = [client.post("/posts/", json={"content": str(index)}, headers=headers).json()["uid"] for index in range(3)]
+    graph = client.app.state.memory_graph
+    old = datetime.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 10)
+    for node_id in graph.find("Post"):
+        graph.update_node(node_id, {"updated_at": old})
+
+    received, token, pages = [], None, 0
+    while pages < 20:
+        response = client.get("/sync", params={"since": token, "limit": 1} if token else {"limit": 1}, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        received += [post["uid"] for post in page["posts"]]
+        token, pages = page["token"], pages + 1
+        if not page["has_more"]:
+            break
+
+    assert set(created) <= set(received) and pages < 20
+    # Depois da passada completa o token é incremental, a partir do início dela
+    client.delete(f"/posts/{created[0]}", headers=headers)
+    assert client.get("/sync", params={"since": token}, headers=headers).json()["deleted"] == [created[0]]
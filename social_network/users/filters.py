@@ -11,13 +11,13 @@ def filter_user(filter_parameters: UserFilterSchema):
     filters = {}
 
     if filter_parameters.name:
-        filters["name"] = {"$eq": filter_parameters.name}
+        filters["full_name"] = {"$eq": filter_parameters.name}
 
     if filter_parameters.name_i:
-        if not filters.get("name"):
-            filters["name"] = {"$icontains": filter_parameters.name_i}
+        if not filters.get("full_name"):
+            filters["full_name"] = {"$icontains": filter_parameters.name_i}
         else:
-            filters["name"].update({"$icontains": filter_parameters.name_i})
+            filters["full_name"].update({"$icontains": filter_parameters.name_i})
 
     if filter_parameters.username:
         filters["username"] = {"$eq": filter_parameters.username}
@@ -0,0 +1,212 @@
+from fastapi import Request
+
+from social_network.core.memory import MemoryGraph
+from social_network.core.repository import GraphRepository, where_clause
+from social_network.core.singleflight import SingleFlight
+from social_network.dependencies import get_repository
+from social_network.posts.repository import USER_MINIMAL_FIELDS, USER_MINIMAL_PROJECTION, MemoryPostReadRepository, PostReadRepository, to_native
+from social_network.settings import settings
+from social_network.users.filters import filter_user
+from social_network.users.schemas import UserFilterSchema, UserList, UserPublic, UserSort
+
+PROFILE_PROJECTION = f"""u {{.uid, .username, .full_name, .email, .bio, .avatar_link, .influence, .community, .created_at, .updated_at,
+    following: [(u)-[:FOLLOWING]->(f:User) | f {USER_MINIMAL_PROJECTION}],
+    followed_by: [(u)<-[:FOLLOWING]-(f:User) | f {USER_MINIMAL_PROJECTION}]
+}}"""
+
+PROFILE_QUERY = f"""
+MATCH (u:User)
+WHERE u.username = $username OR u.uid = $uid
+RETURN {PROFILE_PROJECTION} AS user
+LIMIT 1
+"""
+
+PROFILES_QUERY = f"""
+MATCH (u:User)
+WHERE u.uid IN $uids
+RETURN {PROFILE_PROJECTION} AS user
+"""
+
+MINIMAL_QUERY = f"""
+MATCH (u:User)
+WHERE u.uid IN $uids
+RETURN u {USER_MINIMAL_PROJECTION} AS user
+"""
+
+MUTUALS_QUERY = f"""
+MATCH (u:User {{uid: $uid}})-[:FOLLOWING]->(f:User)-[:FOLLOWING]->(u)
+RETURN f {USER_MINIMAL_PROJECTION} AS user
+ORDER BY f.username
+"""
+
+# Os mais influentes da mesma comunidade que o usuário ainda não segue
+CIRCLE_QUERY = f"""
+MATCH (u:User {{uid: $uid}})
+MATCH (c:User {{community: u.community}})
+WHERE c <> u AND NOT (u)-[:FOLLOWING]->(c)
+RETURN c {USER_MINIMAL_PROJECTION} AS user
+ORDER BY coalesce(c.influence, 0.0) DESC, c.username
+LIMIT $limit
+"""
+
+SEARCH_CONDITIONS = {
+    "name": "u.full_name = $name",
+    "name_i": "toLower(u.full_name) CONTAINS toLower($name_i)",
+    "username": "u.username = $username",
+    "username_i": "toLower(u.username) CONTAINS toLower($username_i)",
+}
+
+SEARCH_RETURN = f"""RETURN u {USER_MINIMAL_PROJECTION} AS user
+SKIP $offset
+LIMIT $limit
+"""
+
+# Sem influência calculada conta como 0, senão os nulos viriam primeiro no DESC
+SEARCH_BY_INFLUENCE_RETURN = f"""RETURN u {USER_MINIMAL_PROJECTION} AS user
+ORDER BY coalesce(u.influence, 0.0) DESC, u.username
+SKIP $offset
+LIMIT $limit
+"""
+
+SEARCH_RETURNS = {None: SEARCH_RETURN, "influence": SEARCH_BY_INFLUENCE_RETURN}
+
+profile_flights = SingleFlight("user_profile", timeout=settings.SINGLEFLIGHT_TIMEOUT_SECONDS, after_write=settings.SINGLEFLIGHT_AFTER_WRITE_SECONDS)
+
+PROFILE_FIELDS = ("uid", "username", "full_name", "email", "bio", "avatar_link", "influence", "community", "created_at", "updated_at")
+
+
+def search_query(filters: dict, sort: UserSort | None = None) -> str:
+    return f"MATCH (u:User)\n{where_clause(SEARCH_CONDITIONS, filters)}\n{SEARCH_RETURNS[sort]}"
+
+
+class UserReadRepository:
+    """Leituras de usuários em Cypher escrito à mão, sem instanciar modelos do OGM"""
+
+    def __init__(self, repository: GraphRepository):
+        self.repository = repository
+        self.posts = PostReadRepository(repository)
+
+    async def search(self, filters: UserFilterSchema, limit: int, offset: int, sort: UserSort | None = None) -> UserList:
+        return UserList.model_validate({"users": await self.search_rows(filters, limit, offset, sort)})
+
+    async def profile(self, viewer_uid: str, username: str | None = None, uid: str | None = None, coalesce: bool = False) -> UserPublic | None:
+        """Com `coalesce` pedidos simultâneos do mesmo perfil compartilham a busca; só as reações são por usuário"""
+        user = await profile_flights.do((username, uid), lambda: self.profile_tree(username, uid)) if coalesce else await self.profile_tree(username, uid)
+        if not user:
+            return None
+        return UserPublic.model_validate({**user, "posts": await self.posts.personalize(user["posts"], viewer_uid)})
+
+    async def profile_tree(self, username: str | None, uid: str | None) -> dict | None:
+        user = await self.profile_row(username, uid)
+        if not user:
+            return None
+        user = to_native(dict(user))
+        return {**user, "posts": await self.posts.trees(await self.posts.owner_rows([str(user["uid"])]))}
+
+    async def profiles(self, viewer_uid: str, uids: list[str]) -> list[UserPublic]:
+        """Perfis de vários usuários com um número fixo de consultas, na ordem de `uids`"""
+        if not uids:
+            return []
+
+        users = {str(user["uid"]): user for user in await self.profile_rows(uids)}
+        return await self.with_posts([users[uid] for uid in uids if uid in users], viewer_uid)
+
+    async def with_posts(self, users: list[dict], viewer_uid: str) -> list[UserPublic]:
+        users = [to_native(dict(user)) for user in users]
+        posts = await self.posts.by_owners([str(user["uid"]) for user in users], viewer_uid)
+        return [UserPublic.model_validate({**user, "posts": posts.get(str(user["uid"]), [])}) for user in users]
+
+    async def search_rows(self, filters: UserFilterSchema, limit: int, offset: int, sort: UserSort | None = None) -> list[dict]:
+        values = filters.model_dump()
+        records = await self.repository.read(search_query(values, sort), **values, limit=limit, offset=offset)
+        return [record["user"] for record in records]
+
+    async def profile_row(self, username: str | None, uid: str | None) -> dict | None:
+        records = await self.repository.read(PROFILE_QUERY, username=username, uid=uid)
+        return records[0]["user"] if records else None
+
+    async def profile_rows(self, uids: list[str]) -> list[dict]:
+        records = await self.repository.read(PROFILES_QUERY, uids=uids)
+        return [record["user"] for record in records]
+
+    async def minimal_rows(self, uids: list[str]) -> list[dict]:
+        """Dados mínimos de vários usuários, na ordem de `uids`"""
+        if not uids:
+            return []
+
+        records = await self.repository.read(MINIMAL_QUERY, uids=uids)
+        users = {str(record["user"]["uid"]): record["user"] for record in records}
+        return [users[uid] for uid in uids if uid in users]
+
+    async def mutual_rows(self, uid: str) -> list[dict]:
+        records = await self.repository.read(MUTUALS_QUERY, uid=uid)
+        return [record["user"] for record in records]
+
+    async def circle_rows(self, uid: str, limit: int) -> list[dict]:
+        records = await self.repository.read(CIRCLE_QUERY, uid=uid, limit=limit)
+        return [record["user"] for record in records]
+
+
+class MemoryUserReadRepository(UserReadRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+        self.posts = MemoryPostReadRepository(graph)
+
+    async def search_rows(self, filters: UserFilterSchema, limit: int, offset: int, sort: UserSort | None = None) -> list[dict]:
+        await self.graph.round_trip("memory:user_search")
+        node_ids = self.graph.find("User", filter_user(filters))
+        if sort == "influence":
+            node_ids.sort(key=lambda node_id: (-(self.graph.nodes[node_id].props.get("influence") or 0.0), self.graph.nodes[node_id].props["username"]))
+        node_ids = node_ids[offset : offset + limit]
+        return [self.graph.project(node_id, USER_MINIMAL_FIELDS) for node_id in node_ids]
+
+    async def profile_row(self, username: str | None, uid: str | None) -> dict | None:
+        await self.graph.round_trip("memory:user_profile")
+        node_ids = self.graph.find("User", {"username": username}) if username else self.graph.find("User", {"uid": uid})
+        if not node_ids:
+            return None
+
+        return self.project(node_ids[0])
+
+    async def profile_rows(self, uids: list[str]) -> list[dict]:
+        await self.graph.round_trip("memory:user_profiles")
+        return [self.project(node_id) for uid in uids for node_id in self.graph.find("User", {"uid": uid})]
+
+    async def minimal_rows(self, uids: list[str]) -> list[dict]:
+        await self.graph.round_trip("memory:user_minimal")
+        return [self.graph.project(node_id, USER_MINIMAL_FIELDS) for uid in uids for node_id in self.graph.find("User", {"uid": uid})]
+
+    async def mutual_rows(self, uid: str) -> list[dict]:
+        await self.graph.round_trip("memory:user_mutuals")
+        mutuals = [
+            other
+            for node_id in self.graph.find("User", {"uid": uid})
+            for other in self.graph.neighbors(node_id, "FOLLOWING", "OUTGOING")
+            if node_id in self.graph.neighbors(other, "FOLLOWING", "OUTGOING")
+        ]
+        return sorted((self.graph.project(other, USER_MINIMAL_FIELDS) for other in mutuals), key=lambda user: user["username"])
+
+    async def circle_rows(self, uid: str, limit: int) -> list[dict]:
+        await self.graph.round_trip("memory:user_circle")
+        node_ids = self.graph.find("User", {"uid": uid})
+        community = self.graph.nodes[node_ids[0]].props.get("community") if node_ids else None
+        if community is None:
+            return []
+
+        following = set(self.graph.neighbors(node_ids[0], "FOLLOWING", "OUTGOING"))
+        members = [node_id for node_id in self.graph.find("User", {"community": community}) if node_id != node_ids[0] and node_id not in following]
+        members.sort(key=lambda node_id: (-(self.graph.nodes[node_id].props.get("influence") or 0.0), self.graph.nodes[node_id].props["username"]))
+        return [self.graph.project(node_id, USER_MINIMAL_FIELDS) for node_id in members[:limit]]
+
+    def project(self, node_id: int) -> dict:
+        return {
+            **self.graph.project(node_id, PROFILE_FIELDS),
+            "following": [self.graph.project(other, USER_MINIMAL_FIELDS) for other in self.graph.neighbors(node_id, "FOLLOWING", "OUTGOING")],
+            "followed_by": [self.graph.project(other, USER_MINIMAL_FIELDS) for other in self.graph.neighbors(node_id, "FOLLOWING", "INCOMING")],
+        }
+
+
+def get_user_reader(request: Request) -> UserReadRepository:
+    if settings.GRAPH_BACKEND == "memory":
+        return MemoryUserReadRepository(request.app.state.memory_graph)
+    return UserReadRepository(get_repository(request))
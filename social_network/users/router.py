@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -7,16 +8,19 @@ from pyneo4j_ogm.queries.query_builder import RelationshipMatchDirection
 # from sqlalchemy import select
 # from sqlalchemy.ext.asyncio import AsyncSession
 from social_network import security
+from social_network.core.responses import FastJSONRoute
 from social_network.dependencies import get_current_user
+from social_network.graph.snapshot import follow_snapshot
+from social_network.notifications.aggregator import notification_aggregator
 
 # from social_network.database import get_session
 # from social_network.users.filters import UserFilterSchema, filter_user
-from social_network.posts.schemas import PostDetails, PostList, UserMinimal
-from social_network.users.filters import filter_user
+from social_network.posts.schemas import PostList
 from social_network.users.models import User
-from social_network.users.schemas import UserCreate, UserFilterSchema, UserList, UserPublic, UserUpdate, UserUpdatePartial
+from social_network.users.repository import UserReadRepository, get_user_reader
+from social_network.users.schemas import UserCreate, UserFilterSchema, UserList, UserPublic, UserSort, UserUpdate, UserUpdatePartial
 
-user_router = APIRouter(prefix="/users", tags=["users"])
+user_router = APIRouter(prefix="/users", tags=["users"], route_class=FastJSONRoute)
 
 
 @user_router.post(
@@ -27,7 +31,7 @@ user_router = APIRouter(prefix="/users", tags=["users"])
         status.HTTP_400_BAD_REQUEST: {"description": "User with the same data already exists."},
     },
 )
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, user_reader: UserReadRepository = Depends(get_user_reader)):
     db_user: User = User(**user.model_dump(exclude="password"))
 
     existent_user = await User.find_one({"username": user.username})
@@ -46,11 +50,11 @@ async def create_user(user: UserCreate):
                 detail="User with the same email exists",
             )
 
-    db_user.password = security.get_password_hash(user.password)
+    db_user.password = await asyncio.to_thread(security.get_password_hash, user.password)
     await db_user.create()
     await db_user.refresh()
 
-    return UserPublic.from_user(db_user)
+    return await UserPublic.from_user(db_user, db_user, user_reader)
 
 
 @user_router.post(
@@ -67,7 +71,7 @@ async def create_user(user: UserCreate):
         },
     },
 )
-async def follow_user(user_to_follow_id: str, current_user: User = Depends(get_current_user)):
+async def follow_user(user_to_follow_id: str, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
     user_to_follow = await User.find_one({"uid": user_to_follow_id})
 
     if user_to_follow_id == str(current_user.uid):
@@ -82,9 +86,10 @@ async def follow_user(user_to_follow_id: str, current_user: User = Depends(get_c
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "You are already following this user")
 
     await current_user.following.connect(user_to_follow)
-    await current_user.refresh()
+    follow_snapshot.record(str(current_user.uid), user_to_follow_id, followed=True)
+    notification_aggregator.record("follow", str(current_user.uid), recipient_uid=user_to_follow_id)
 
-    return await UserPublic.from_user(current_user, current_user)
+    return await UserPublic.from_user(current_user, current_user, user_reader)
 
 
 @user_router.post(
@@ -101,7 +106,7 @@ async def follow_user(user_to_follow_id: str, current_user: User = Depends(get_c
         },
     },
 )
-async def unfollow_user(user_to_unfollow_id: str, current_user: User = Depends(get_current_user)):
+async def unfollow_user(user_to_unfollow_id: str, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
     user_to_unfollow = await User.find_one({"uid": user_to_unfollow_id})
 
     if user_to_unfollow_id == str(current_user.uid):
@@ -116,9 +121,9 @@ async def unfollow_user(user_to_unfollow_id: str, current_user: User = Depends(g
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "You are not following this user")
 
     await current_user.following.disconnect(user_to_unfollow)
-    await current_user.refresh()
+    follow_snapshot.record(str(current_user.uid), user_to_unfollow_id, followed=False)
 
-    return await UserPublic.from_user(current_user, current_user)
+    return await UserPublic.from_user(current_user, current_user, user_reader)
 
 
 @user_router.get(
@@ -132,33 +137,26 @@ async def get_users(
     username_i: str | None = Query(None, description="Busca por username parecido"),
     limit: int = 100,
     offset: int = 0,
+    sort: UserSort | None = Query(None, description="influence ordena pelos mais influentes"),
     current_user: User = Depends(get_current_user),
+    user_reader: UserReadRepository = Depends(get_user_reader),
 ):
-    filter_parameters = filter_user(
-        UserFilterSchema(
-            name_i=name_i,
-            name=name,
-            username=username,
-            username_i=username_i,
-        )
+    filters = UserFilterSchema(
+        name_i=name_i,
+        name=name,
+        username=username,
+        username_i=username_i,
     )
 
-    results = await User.find_many(filter_parameters, auto_fetch_nodes=True)
-
-    for ind, user in enumerate(results):
-        results[ind] = UserMinimal(**user.model_dump())
-
-    results = results[offset:limit] if offset < limit else []
-    all_users = UserList.model_validate({"users": results})
-    return all_users
+    return await user_reader.search(filters, limit=limit, offset=offset, sort=sort)
 
 
 @user_router.get(
     "/me",
     response_model=UserPublic,
 )
-async def me(current_user: User = Depends(get_current_user)):
-    return await UserPublic.from_user(current_user, current_user)
+async def me(current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
+    return await user_reader.profile(str(current_user.uid), uid=str(current_user.uid))
 
 
 @user_router.get(
@@ -166,18 +164,22 @@ async def me(current_user: User = Depends(get_current_user)):
     response_model=UserPublic,
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
+        status.HTTP_504_GATEWAY_TIMEOUT: {"description": "Timed out loading the user"},
     },
 )
-async def get_user_by_username(username: str, current_user: User = Depends(get_current_user)):
-    user_db = await User.find_one({"username": username}, auto_fetch_nodes=True)
+async def get_user_by_username(username: str, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
+    try:
+        user = await user_reader.profile(str(current_user.uid), username=username, coalesce=True)
+    except TimeoutError:
+        raise HTTPException(status.HTTP_504_GATEWAY_TIMEOUT, "Timed out loading user") from None
 
-    if not user_db:
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found!",
         )
 
-    return await UserPublic.from_user(user_db, current_user)
+    return user
 
 
 # @user_router.put(
@@ -214,7 +216,7 @@ async def get_user_by_username(username: str, current_user: User = Depends(get_c
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def update_partial_user(user_id: str, user_update: UserUpdatePartial, current_user: User = Depends(get_current_user)):
+async def update_partial_user(user_id: str, user_update: UserUpdatePartial, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
     exist_user: User = await User.find_one({"uid": user_id}, auto_fetch_nodes=True)
 
     if not exist_user:
@@ -224,7 +226,7 @@ async def update_partial_user(user_id: str, user_update: UserUpdatePartial, curr
         )
 
     if user_update.password:
-        exist_user.password = security.get_password_hash(user_update.password)
+        exist_user.password = await asyncio.to_thread(security.get_password_hash, user_update.password)
 
     if user_update.full_name:
         exist_user.full_name = user_update.full_name
@@ -238,7 +240,7 @@ async def update_partial_user(user_id: str, user_update: UserUpdatePartial, curr
     await exist_user.update()
     await exist_user.refresh()
 
-    return await UserPublic.from_user(exist_user, current_user)
+    return await UserPublic.from_user(exist_user, current_user, user_reader)
 
 
 @user_router.delete(
@@ -266,7 +268,11 @@ async def delete_user(user_id: str):
     "/recommendations/",
     response_model=list[UserPublic],
 )
-async def recomendations(current_user: User = Depends(get_current_user)):
+async def recomendations(
+    sort: UserSort | None = Query(None, description="influence ordena pelos mais influentes"),
+    current_user: User = Depends(get_current_user),
+    user_reader: UserReadRepository = Depends(get_user_reader),
+):
     recommendations = await User.find_many(
         {
             "$patterns": [
@@ -308,7 +314,50 @@ async def recomendations(current_user: User = Depends(get_current_user)):
         }
     )
 
-    return [await UserPublic.from_user(user, current_user) for user in recommendations]
+    profiles = await user_reader.profiles(str(current_user.uid), [str(user.uid) for user in recommendations])
+    if sort == "influence":
+        profiles.sort(key=lambda profile: profile.influence or 0.0, reverse=True)
+    return profiles
+
+
+@user_router.get(
+    "/{user_id}/mutuals/",
+    response_model=UserList,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "User not found"},
+    },
+)
+async def get_mutuals(user_id: str, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
+    """Quem o usuário segue e também o segue; vem do snapshot dos follows quando há um aberto"""
+    if not await User.count({"uid": user_id}):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found!")
+
+    mutuals = follow_snapshot.mutuals(user_id)
+    if mutuals is None:
+        users = await user_reader.mutual_rows(user_id)
+    else:
+        users = sorted(await user_reader.minimal_rows(mutuals), key=lambda user: user["username"])
+    return UserList.model_validate({"users": users})
+
+
+@user_router.get(
+    "/{user_id}/circle/",
+    response_model=UserList,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "User not found"},
+    },
+)
+async def get_circle(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    user_reader: UserReadRepository = Depends(get_user_reader),
+):
+    """Os mais influentes da comunidade do usuário que ele ainda não segue; vazio antes do primeiro cálculo"""
+    if not await User.count({"uid": user_id}):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found!")
+
+    return UserList.model_validate({"users": await user_reader.circle_rows(user_id, limit)})
 
 
 @user_router.get(
@@ -318,18 +367,13 @@ async def recomendations(current_user: User = Depends(get_current_user)):
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def get_posts_from_user(user_id: str, current_user: User = Depends(get_current_user)):
-    user_db = await User.find_one({"uid": user_id}, auto_fetch_nodes=True)
-
-    if not user_db:
+async def get_posts_from_user(user_id: str, current_user: User = Depends(get_current_user), user_reader: UserReadRepository = Depends(get_user_reader)):
+    if not await User.count({"uid": user_id}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found!",
         )
 
-    posts = user_db.posts.nodes
-
-    for ind, post in enumerate(posts):
-        posts[ind] = await PostDetails.from_post(post, current_user)
+    posts = await user_reader.posts.by_owner(user_id, str(current_user.uid))
 
     return PostList.model_validate({"posts": posts})